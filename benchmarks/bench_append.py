@@ -0,0 +1,50 @@
+"""
+Time to grow a replace workflow one request at a time, by rebuilding it
+after every request and by appending to it. Responses are canned, so
+this measures parsing and matching, not the network.
+
+Run with `PYTHONPATH=. python benchmarks/bench_append.py [requests]`
+"""
+
+import sys
+import time
+from unittest import mock
+from requestify.models import _ReplaceRequestify
+
+CURL = (
+    "curl -X POST 'https://api.example.com/users/{index}/orders' "
+    "-H 'Accept: application/json' "
+    "-H 'X-Request-Id: {index}' "
+    '-d \'{{"previous": "order-{previous}", "page": "{page}"}}\''
+)
+
+
+def get_responses(requests, *_):
+    return [
+        {'id': f'order-{request._url.split("/")[-2]}'} for request in requests
+    ]
+
+
+def main(count: int) -> None:
+    curls = [
+        CURL.format(index=i, previous=i - 1, page=i % 10) for i in range(count)
+    ]
+    with mock.patch('requestify.models.get_responses', get_responses):
+        start = time.perf_counter()
+        for i in range(1, count + 1):
+            rebuilt = _ReplaceRequestify(*curls[:i])
+        rebuild_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        appended = _ReplaceRequestify(curls[0])
+        for curl in curls[1:]:
+            appended.append(curl)
+        append_time = time.perf_counter() - start
+
+    assert rebuilt._dependencies == appended._dependencies
+    print(f'rebuild  {rebuild_time:8.3f}s')
+    print(f'append   {append_time:8.3f}s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
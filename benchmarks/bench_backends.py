@@ -0,0 +1,108 @@
+"""
+Compares the generated requests function, requests class and urllib3
+backends against a local server.
+
+Run with `PYTHONPATH=. python benchmarks/bench_backends.py [calls]`
+"""
+
+import sys
+import time
+from local_server import start_server
+from requestify.models import _RequestifyList
+from requestify.text_utils import (
+    generate_imports_text,
+    generate_function_text,
+    generate_class_text,
+    generate_requestify_list_function,
+    generate_requestify_list_class,
+    generate_urllib3_pool_text,
+    generate_urllib3_list_constants_text,
+    generate_urllib3_list_function,
+    REQUEST_CLASS_NAME,
+)
+
+CURLS = (
+    "curl 'https://api.example.com/items' -H 'Accept: application/json' "
+    "-H 'Cookie: session=abc; theme=dark'",
+    "curl 'https://api.example.com/items' -H 'Accept: application/json' "
+    """-d '{"name": "requestify", "count": 10}'""",
+)
+
+
+def build_requests(base_url: str) -> _RequestifyList:
+    rl = _RequestifyList(*CURLS)
+    # the url regex does not accept ip:port, so point the parsed
+    # requests to the local server afterwards
+    for request in rl:
+        request._url = base_url + '/items'
+    return rl
+
+
+def requests_function_module(rl: _RequestifyList) -> str:
+    functions = generate_requestify_list_function(rl)
+    return '\n\n'.join(
+        generate_imports_text('requests')
+        + [generate_function_text(function) for function in functions]
+    )
+
+
+def requests_class_module(rl: _RequestifyList) -> str:
+    return '\n\n'.join(
+        generate_imports_text('requests')
+        + [generate_class_text(generate_requestify_list_class(rl))]
+    )
+
+
+def urllib3_module(rl: _RequestifyList) -> str:
+    functions = generate_urllib3_list_function(rl)
+    return '\n\n'.join(
+        generate_imports_text('urllib3')
+        + [generate_urllib3_pool_text()]
+        + generate_urllib3_list_constants_text(rl)
+        + [generate_function_text(function) for function in functions]
+    )
+
+
+def load(text: str) -> dict:
+    namespace = {}
+    exec(compile(text, '<generated>', 'exec'), namespace)
+    return namespace
+
+
+def run(name: str, functions: list, calls: int) -> None:
+    # warm up connection pools
+    for function in functions:
+        function()
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        for function in functions:
+            function()
+    elapsed = time.perf_counter() - start
+    total = calls * len(functions)
+    print(
+        f'{name:<18} {total:>7} requests  {elapsed:8.3f}s  '
+        f'{total / elapsed:9.1f} req/s  {elapsed / total * 1e6:8.1f} us/req'
+    )
+
+
+def main(calls: int) -> None:
+    server, base_url = start_server()
+    rl = build_requests(base_url)
+    names = [request._function_name for request in rl]
+    try:
+        namespace = load(requests_function_module(rl))
+        run('requests function', [namespace[n] for n in names], calls)
+
+        namespace = load(requests_class_module(rl))
+        instance = namespace[REQUEST_CLASS_NAME]()
+        run('requests class', [getattr(instance, n) for n in names], calls)
+
+        namespace = load(urllib3_module(rl))
+        run('urllib3', [namespace[n] for n in names], calls)
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
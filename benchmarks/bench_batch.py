@@ -0,0 +1,50 @@
+"""
+Batch conversion of a directory of capture files: the first run,
+a run with nothing changed and a run after changing one file.
+
+Run with `PYTHONPATH=. python benchmarks/bench_batch.py [files]`
+"""
+
+import os
+import sys
+import tempfile
+import time
+from requestify.batch import convert_batch
+
+CURL = (
+    "curl -X GET 'https://api{index}.example.com/users/{index}' "
+    "-H 'Accept: application/json' -H 'Cookie: session=abc{index}'\n"
+)
+
+
+def _timed(name: str, pattern: str, directory: str) -> None:
+    start = time.perf_counter()
+    result = convert_batch(pattern, directory)
+    elapsed = time.perf_counter() - start
+    print(
+        f'{name:<20} {len(result.converted):>6} converted '
+        f'in {elapsed:.2f}s'
+    )
+
+
+def main(count: int) -> None:
+    root = tempfile.mkdtemp()
+    captures = os.path.join(root, 'captures')
+    for index in range(count):
+        directory = os.path.join(captures, f'group{index % 10}')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{index}.curl')
+        with open(path, mode='w', encoding='utf8') as capture:
+            capture.write(CURL.format(index=index))
+
+    pattern = os.path.join(captures, '**', '*.curl')
+    out = os.path.join(root, 'out')
+    _timed('first run', pattern, out)
+    _timed('nothing changed', pattern, out)
+    with open(os.path.join(captures, 'group0', '0.curl'), 'a') as capture:
+        capture.write(CURL.format(index='changed'))
+    _timed('one file changed', pattern, out)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,58 @@
+"""
+Output size, generation time and import time of a module generated from
+many near-identical requests, with and without clustering.
+
+Run with `PYTHONPATH=. python benchmarks/bench_clustering.py [requests]`
+"""
+
+import sys
+import time
+from requestify.models import _RequestifyList
+from requestify.output import generate_module
+from requestify.clustering import generate_clustered_module
+
+CURL = (
+    "curl 'https://api.example.com/users/{index}/orders?page={page}' "
+    "-H 'Accept: application/json, text/plain, */*' "
+    "-H 'Accept-Language: en-US,en;q=0.9,ro;q=0.8' "
+    "-H 'Origin: https://example.com' "
+    "-H 'Referer: https://example.com/' "
+    "-H 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/102.0.0.0 Safari/537.36' "
+    "-H 'X-Request-Id: {index}' "
+    "-H 'Cookie: session=abcdef0123456789; theme=dark; locale=en'"
+)
+
+
+def measure(name: str, generate) -> None:
+    start = time.perf_counter()
+    module = generate()
+    generate_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    exec(compile(module, '<generated>', 'exec'), {})
+    import_time = time.perf_counter() - start
+
+    print(
+        f'{name:<10} {len(module) / 1024:10.1f} KiB  '
+        f'generate {generate_time:7.3f}s  import {import_time:7.3f}s'
+    )
+
+
+def main(count: int) -> None:
+    rl = _RequestifyList(
+        *(CURL.format(index=i, page=i % 10) for i in range(count))
+    )
+    for use_ast in (False, True):
+        emitter = 'ast' if use_ast else 'black'
+        measure(
+            f'plain/{emitter}', lambda: generate_module(rl, use_ast=use_ast)
+        )
+        measure(
+            f'cluster/{emitter}',
+            lambda: generate_clustered_module(rl, use_ast=use_ast),
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
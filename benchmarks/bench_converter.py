@@ -0,0 +1,43 @@
+"""
+Conversions per second of one Converter shared by a growing number of
+threads, with black and with the ast emitter. Every input is distinct,
+so the format cache only helps with functions that repeat across them.
+
+Run with `PYTHONPATH=. python benchmarks/bench_converter.py [inputs]`
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requestify.converter import Converter, ConverterConfig
+
+CURL = (
+    "curl 'https://api.example.com/users/{index}/orders' "
+    "-H 'Accept: application/json' "
+    "-H 'X-Request-Id: {index}' "
+    "-H 'Cookie: session=abcdef0123456789; theme=dark'"
+)
+
+
+def main(count: int) -> None:
+    texts = [
+        f'{CURL.format(index=i)}\ncurl -X POST https://example.com/{i % 10}'
+        for i in range(count)
+    ]
+    for use_ast in (False, True):
+        emitter = 'ast' if use_ast else 'black'
+        for threads in (1, 2, 4, 8):
+            converter = Converter(ConverterConfig(use_ast=use_ast))
+            start = time.perf_counter()
+            with ThreadPoolExecutor(threads) as executor:
+                conversions = list(executor.map(converter.convert, texts))
+            elapsed = time.perf_counter() - start
+            assert not any(conversion.errors for conversion in conversions)
+            print(
+                f'{emitter:<6} {threads} threads  '
+                f'{count / elapsed:9.1f} conversions/s'
+            )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,65 @@
+"""
+Latency of converting one cURL command by starting `python -m requestify`,
+by forwarding it to a daemon with the thin client, and by sending it to
+the daemon from a running process (as an editor integration would).
+
+Run with `PYTHONPATH=. python benchmarks/bench_daemon.py [calls]`
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from requestify.daemon import send_job
+
+CURL = (
+    "curl -X GET https://api.example.com/items -H 'Accept: application/json'"
+)
+
+
+def _time(call, calls: int) -> float:
+    times = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def _wait_for(path: str) -> None:
+    for _ in range(100):
+        if os.path.exists(path):
+            return
+        time.sleep(0.1)
+    raise TimeoutError('The daemon did not start')
+
+
+def main(calls: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), 'requestify.sock')
+    daemon = subprocess.Popen(
+        [sys.executable, '-m', 'requestify', '--serve', path]
+    )
+    try:
+        _wait_for(path)
+        cli = [sys.executable, '-m', 'requestify', '-s', CURL]
+        client = [sys.executable, '-m', 'requestify.daemon', path, '-s', CURL]
+        cases = {
+            'python -m requestify': lambda: subprocess.run(
+                cli, capture_output=True, check=True
+            ),
+            'python -m requestify.daemon': lambda: subprocess.run(
+                client, capture_output=True, check=True
+            ),
+            'send_job': lambda: send_job(path, ['-s', CURL]),
+        }
+        for name, call in cases.items():
+            print(f'{name:<30} {_time(call, calls):>8.1f} ms per call')
+    finally:
+        daemon.terminate()
+        daemon.wait()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
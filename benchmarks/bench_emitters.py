@@ -0,0 +1,42 @@
+"""
+Code generation throughput, in functions per second, of the text + black
+emitter and the ast emitter.
+
+Run with `PYTHONPATH=. python benchmarks/bench_emitters.py [requests]`
+"""
+
+import sys
+import time
+from requestify.models import _RequestifyList
+from requestify.output import generate_module
+from requestify.utils import FormatCache
+
+CURL = (
+    "curl 'https://api.example.com/users/{index}' "
+    "-H 'Accept: application/json, text/plain, */*' "
+    "-H 'Accept-Language: en-US,en;q=0.9' "
+    "-H 'User-Agent: Mozilla/5.0 (X11; Linux x86_64) Gecko/20100101' "
+    "-H 'X-Request-Id: {index}' "
+    "-H 'Cookie: session=abcdef0123456789; theme=dark'"
+)
+
+
+def measure(name: str, rl: _RequestifyList, **options) -> None:
+    start = time.perf_counter()
+    generate_module(rl, **options)
+    elapsed = time.perf_counter() - start
+    print(
+        f'{name:<12} {len(rl):>6} functions  {elapsed:8.3f}s  '
+        f'{len(rl) / elapsed:10.1f} functions/s'
+    )
+
+
+def main(count: int) -> None:
+    rl = _RequestifyList(*(CURL.format(index=i) for i in range(count)))
+    # a fresh cache, so every function goes through black
+    measure('black', rl, cache=FormatCache())
+    measure('ast', rl, use_ast=True)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
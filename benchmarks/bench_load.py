@@ -0,0 +1,38 @@
+"""
+Drives a local server at fixed arrival rates with `requestify.load`.
+Latency is measured from each request's scheduled send time, so it grows
+once the rate gets past what the server (or the client) can keep up with.
+
+Run with `PYTHONPATH=. python benchmarks/bench_load.py [seconds]`
+"""
+
+import sys
+from local_server import start_server
+from requestify.models import _RequestifyList
+from requestify.load import get_stages, load
+
+CURLS = (
+    "curl -X GET 'https://api.example.com/items' "
+    "-H 'Accept: application/json'",
+    "curl -X POST 'https://api.example.com/items' "
+    """-d '{"name": "requestify", "count": 10}'""",
+)
+
+
+def main(duration: float) -> None:
+    server, base_url = start_server()
+    rl = _RequestifyList(*CURLS)
+    # the url regex does not accept ip:port, so point the parsed
+    # requests to the local server afterwards
+    for request in rl:
+        request._url = base_url + '/items'
+
+    for rate in (100, 400, 1600):
+        stages = get_stages(rate, duration, ramp_up=duration / 4)
+        print(f'{rate} requests/s')
+        print(load(rl, stages, weights=[3, 1]).format_table(), end='\n\n')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0)
@@ -0,0 +1,48 @@
+"""
+Throughput and peak memory of the NDJSON stream over a generated log,
+to show memory stays flat however many cURL commands are streamed.
+
+Run with `PYTHONPATH=. python benchmarks/bench_ndjson.py [requests]`
+"""
+
+import io
+import sys
+import time
+import tracemalloc
+from requestify.models import _RequestifyObject
+from requestify.output import write_ndjson
+
+CURL = (
+    "curl -X GET 'https://api{host}.example.com/users/{index}' "
+    "-H 'Accept: application/json' -H 'Cookie: session=abc{index}'"
+)
+
+
+class _Discard(io.TextIOBase):
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def _curls(count: int):
+    for index in range(count):
+        yield CURL.format(host=index % 20, index=index)
+
+
+def main(count: int) -> None:
+    # imports the url parser, which would count as memory otherwise
+    write_ndjson(_Discard(), _curls(1), _RequestifyObject)
+    for requests in (count // 10, count):
+        tracemalloc.start()
+        start = time.perf_counter()
+        write_ndjson(_Discard(), _curls(requests), _RequestifyObject)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f'{requests} requests: {requests / elapsed:.0f} records/s, '
+            f'peak memory {peak / 1024:.0f} KiB'
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,38 @@
+"""
+Replays requests against a local server from one process and from
+several, to show how far sharding the replay lets it scale.
+
+Run with `PYTHONPATH=. python benchmarks/bench_processes.py [iterations]`
+"""
+
+import os
+import sys
+from local_server import start_server
+from requestify.models import _RequestifyList
+from requestify.bench import bench
+from requestify.parallel import bench_processes
+
+CURL = (
+    "curl -X GET 'https://api.example.com/items' "
+    "-H 'Accept: application/json'"
+)
+CONCURRENCY = 32
+
+
+def main(iterations: int) -> None:
+    server, base_url = start_server()
+    rl = _RequestifyList(CURL)
+    # the url regex does not accept ip:port
+    for request in rl:
+        request._url = base_url + '/items'
+
+    result = bench(rl, iterations, CONCURRENCY)
+    print(f'1 process: {result.throughput:.1f} requests/s')
+    for processes in sorted({2, 4, os.cpu_count() or 1} - {1}):
+        result = bench_processes(rl, iterations, CONCURRENCY, processes)
+        print(f'{processes} processes: {result.throughput:.1f} requests/s')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
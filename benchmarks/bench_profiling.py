@@ -0,0 +1,39 @@
+"""
+Parsing time of many requests with profiling disabled (the default) and
+enabled, to show what the timing hooks cost in either case.
+
+Run with `PYTHONPATH=. python benchmarks/bench_profiling.py [requests]`
+"""
+
+import sys
+import time
+from requestify.models import _RequestifyList
+from requestify.profiling import profiled
+
+CURL = (
+    "curl 'https://api.example.com/users/{index}/orders' "
+    "-H 'Accept: application/json' "
+    "-H 'X-Request-Id: {index}' "
+    '--data-raw \'{{"page": {index}, "size": 50}}\''
+)
+
+
+def measure(curls: list[str]) -> float:
+    start = time.perf_counter()
+    _RequestifyList(*curls)
+    return time.perf_counter() - start
+
+
+def main(count: int) -> None:
+    curls = [CURL.format(index=i) for i in range(count)]
+    measure(curls)
+    disabled = min(measure(curls) for _ in range(5))
+    with profiled() as profiler:
+        enabled = min(measure(curls) for _ in range(5))
+    print(f'disabled {disabled * 1e6 / count:8.2f} us/request')
+    print(f'enabled  {enabled * 1e6 / count:8.2f} us/request')
+    print(profiler.format_table())
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,36 @@
+"""
+Replays requests against a local server with `requestify.bench`, to show
+the replay engine's own overhead and the report it prints.
+
+Run with `PYTHONPATH=. python benchmarks/bench_replay.py [iterations]`
+"""
+
+import sys
+from local_server import start_server
+from requestify.models import _RequestifyList
+from requestify.bench import bench
+
+CURLS = (
+    "curl -X GET 'https://api.example.com/items' "
+    "-H 'Accept: application/json' -H 'Cookie: session=abc; theme=dark'",
+    "curl -X POST 'https://api.example.com/items' "
+    """-d '{"name": "requestify", "count": 10}'""",
+)
+
+
+def main(iterations: int) -> None:
+    server, base_url = start_server()
+    rl = _RequestifyList(*CURLS)
+    # the url regex does not accept ip:port, so point the parsed
+    # requests to the local server afterwards
+    for request in rl:
+        request._url = base_url + '/items'
+
+    for concurrency in (1, 10, 50):
+        print(f'concurrency {concurrency}')
+        print(bench(rl, iterations, concurrency).format_table(), end='\n\n')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,67 @@
+"""
+Import time of a large generated client written as a single module and
+as a sharded package, measured in fresh interpreters when using one
+function.
+
+Run with `PYTHONPATH=. python benchmarks/bench_sharding.py [requests]`
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from requestify.models import _RequestifyList
+from requestify.output import to_file, write_package
+
+HOSTS = 20
+CURL = (
+    "curl 'https://api{host}.example.com/users/{index}' "
+    "-H 'Accept: application/json' -H 'X-Request-Id: {index}' "
+    "-H 'Cookie: session=abcdef0123456789'"
+)
+IMPORT = (
+    'import time\n'
+    'start = time.perf_counter()\n'
+    'import client\n'
+    'client.get_api3_example_com\n'
+    'print(time.perf_counter() - start)'
+)
+
+
+def import_time(directory: str) -> float:
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT],
+        cwd=directory,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output)
+
+
+def main(count: int) -> None:
+    rl = _RequestifyList(
+        *(CURL.format(host=i % HOSTS, index=i) for i in range(count))
+    )
+    with tempfile.TemporaryDirectory() as module_dir:
+        with tempfile.TemporaryDirectory() as package_dir:
+            to_file(rl, os.path.join(module_dir, 'client.py'), use_ast=True)
+            write_package(
+                rl, os.path.join(package_dir, 'client'), use_ast=True
+            )
+
+            for name, directory in (
+                ('module', module_dir),
+                ('package', package_dir),
+            ):
+                # the first import also compiles the bytecode cache
+                cold = import_time(directory)
+                warm = import_time(directory)
+                print(
+                    f'{name:<8} first import {cold * 1000:8.1f}ms  '
+                    f'cached import {warm * 1000:8.1f}ms'
+                )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
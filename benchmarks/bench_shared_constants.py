@@ -0,0 +1,70 @@
+"""
+Output size, black formatting time and import time of a large generated
+module, with and without shared header/cookie constants.
+
+Run with `PYTHONPATH=. python benchmarks/bench_shared_constants.py [requests]`
+"""
+
+import sys
+import time
+from requestify.models import _RequestifyList
+from requestify.utils import beautify_string
+from requestify.text_utils import (
+    generate_imports_text,
+    generate_function_text,
+    generate_requestify_list_function,
+    generate_shared_constants_text,
+)
+
+CURL = (
+    "curl 'https://api.example.com/users/{index}' "
+    "-H 'Accept: application/json, text/plain, */*' "
+    "-H 'Accept-Language: en-US,en;q=0.9,ro;q=0.8' "
+    "-H 'Connection: keep-alive' "
+    "-H 'Origin: https://example.com' "
+    "-H 'Referer: https://example.com/' "
+    "-H 'Sec-Fetch-Dest: empty' "
+    "-H 'Sec-Fetch-Mode: cors' "
+    "-H 'Sec-Fetch-Site: same-site' "
+    "-H 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/102.0.0.0 Safari/537.36' "
+    "-H 'X-Request-Id: {index}' "
+    "-H 'Cookie: session=abcdef0123456789; theme=dark; locale=en'"
+)
+
+
+def generate_module(rl: _RequestifyList, shared_constants: bool) -> str:
+    functions = generate_requestify_list_function(
+        rl, shared_constants=shared_constants
+    )
+    constants = generate_shared_constants_text(rl) if shared_constants else []
+    return '\n\n'.join(
+        generate_imports_text('requests')
+        + constants
+        + [generate_function_text(function) for function in functions]
+    )
+
+
+def measure(name: str, text: str) -> None:
+    start = time.perf_counter()
+    formatted = beautify_string(text)
+    format_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    exec(compile(formatted, '<generated>', 'exec'), {})
+    import_time = time.perf_counter() - start
+
+    print(
+        f'{name:<10} {len(formatted) / 1024:10.1f} KiB  '
+        f'format {format_time:7.3f}s  import {import_time:7.3f}s'
+    )
+
+
+def main(count: int) -> None:
+    rl = _RequestifyList(*(CURL.format(index=i) for i in range(count)))
+    measure('inline', generate_module(rl, shared_constants=False))
+    measure('shared', generate_module(rl, shared_constants=True))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
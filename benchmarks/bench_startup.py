@@ -0,0 +1,68 @@
+"""
+Startup cost of requestify, measured with `python -X importtime` in fresh
+interpreters: the import time of the whole tree and the slowest modules
+it imports, when parsing a cURL command and when starting the CLI.
+
+Run with `PYTHONPATH=. python benchmarks/bench_startup.py [runs]`
+"""
+
+import re
+import statistics
+import subprocess
+import sys
+
+CASES = {
+    'parse': (
+        "CURL = 'curl -X GET https://api.example.com/items'\n"
+        'from requestify.models import _RequestifyObject\n'
+        '_RequestifyObject(CURL)._url'
+    ),
+    'generate (ast)': (
+        "CURL = 'curl -X GET https://api.example.com/items'\n"
+        'from requestify.models import _RequestifyObject\n'
+        'from requestify.output import generate_module\n'
+        'generate_module(_RequestifyObject(CURL), use_ast=True)'
+    ),
+    'cli': 'import requestify.__main__',
+}
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_REGEX = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+SLOWEST = 5
+
+
+def get_import_times(code: str) -> dict[str, int]:
+    """
+    Cumulative import time, in microseconds, of every top level import
+    """
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_REGEX.match(line)
+        # nested imports are indented, and counted by their importer
+        if match and len(match.group(3)) == 1:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+def main(runs: int) -> None:
+    for name, code in CASES.items():
+        runs_times = [get_import_times(code) for _ in range(runs)]
+        totals = [sum(times.values()) for times in runs_times]
+        print(
+            f'{name}: {statistics.median(totals) / 1000:.1f} ms '
+            f'of imports (median of {runs})'
+        )
+        slowest = sorted(
+            runs_times[-1].items(), key=lambda item: item[1], reverse=True
+        )
+        for module, cumulative in slowest[:SLOWEST]:
+            print(f'  {module:<40} {cumulative / 1000:>8.1f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
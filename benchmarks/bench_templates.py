@@ -0,0 +1,50 @@
+"""
+Time to build requests for many parameter rows, by filling in and parsing
+a cURL per row, and by rendering a template parsed once.
+
+Run with `PYTHONPATH=. python benchmarks/bench_templates.py [rows]`
+"""
+
+import sys
+import time
+from requestify.models import _RequestifyObject
+from requestify.templates import CurlTemplate
+
+TEMPLATE = (
+    "curl -X POST 'https://api.example.com/users/{{user_id}}/orders' "
+    "-H 'Accept: application/json, text/plain, */*' "
+    "-H 'Accept-Language: en-US,en;q=0.9,ro;q=0.8' "
+    "-H 'Authorization: Bearer {{token}}' "
+    "-H 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/102.0.0.0 Safari/537.36' "
+    "-H 'Cookie: session=abcdef0123456789; theme=dark; locale=en' "
+    """-d '{"user": "{{user_id}}", "quantity": 1}'"""
+)
+
+
+def measure(name: str, build, rows: list[dict]) -> None:
+    start = time.perf_counter()
+    for row in rows:
+        build(row)
+    elapsed = time.perf_counter() - start
+    print(
+        f'{name:<8} {elapsed:7.3f}s  '
+        f'{len(rows) / elapsed:12,.0f} requests/s'
+    )
+
+
+def parse(row: dict) -> _RequestifyObject:
+    curl = TEMPLATE
+    for name, value in row.items():
+        curl = curl.replace(f'{{{{{name}}}}}', str(value))
+    return _RequestifyObject(curl)
+
+
+def main(count: int) -> None:
+    rows = [{'user_id': i, 'token': f'token{i}'} for i in range(count)]
+    measure('parse', parse, rows)
+    measure('render', CurlTemplate(TEMPLATE).render, rows)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -1,23 +1,44 @@
+import os
 import sys
+import json
+import signal
 import argparse
-import pyperclip
+from typing import Callable, Iterable, Iterator
 from requestify.models import (
     _RequestifyList,
     _RequestifyObject,
     _ReplaceRequestify,
+    iter_requestify,
 )
+from requestify.output import (
+    generate_module,
+    write_module,
+    write_ndjson,
+    write_package,
+)
+from requestify.clustering import generate_clustered_module
+from requestify.batch import (
+    convert_batch,
+    format_batch_result,
+    is_batch_pattern,
+)
+from requestify.network import NetworkMetrics
+from requestify.profiling import profiled
+from requestify.templates import (
+    CurlTemplate,
+    generate_template_module,
+    iter_rows,
+)
+from requestify.utils import FormatCache, iter_curls
 
 
 def _get_file(filename: str) -> list[str]:
-    requests = []
-    request = ''
+    return list(_iter_file(filename))
+
+
+def _iter_file(filename: str) -> Iterator[str]:
     with open(filename, mode='r', encoding='utf8') as in_file:
-        for line in in_file:
-            request += line
-            if 'curl' in line:
-                requests.append(request)
-                request = ''
-    return requests
+        yield from iter_curls(in_file)
 
 
 def from_string(base_string):
@@ -25,25 +46,48 @@ def from_string(base_string):
 
 
 def from_clipboard():
+    import pyperclip
+
     return _RequestifyObject(pyperclip.paste())
 
 
 def from_file(filename, replace=False):
     requests_from_file = _get_file(filename)
     assert requests_from_file, 'No data in the specified file'
-    if len(requests_from_file) == 1:
+    return _from_curls(requests_from_file, replace)
+
+
+def _from_curls(curls, replace=False):
+    if len(curls) == 1:
         assert (
             not replace
         ), 'No requests to replace (only one request was passed)'
-        requests = _RequestifyObject(requests_from_file[0])
+        requests = _RequestifyObject(curls[0])
     else:
         if replace:
-            requests = _ReplaceRequestify(*requests_from_file)
+            requests = _ReplaceRequestify(*curls)
         else:
-            requests = _RequestifyList(*requests_from_file)
+            requests = _RequestifyList(*curls)
     return requests
 
 
+# The async counterparts can be awaited from code that already runs in an
+# event loop (asyncio.run cannot be called there), and share its client
+async def afrom_string(base_string):
+    return from_string(base_string)
+
+
+async def afrom_file(filename, replace=False, client=None):
+    import asyncio
+
+    # read in a thread, so other tasks on the loop keep running
+    requests_from_file = await asyncio.to_thread(_get_file, filename)
+    assert requests_from_file, 'No data in the specified file'
+    if not replace or len(requests_from_file) == 1:
+        return _from_curls(requests_from_file, replace)
+    return await _ReplaceRequestify.acreate(*requests_from_file, client=client)
+
+
 def get_args():
     arg = argparse.ArgumentParser(description='Convert cURL to requests.')
 
@@ -57,7 +101,9 @@ def get_args():
     arg.add_argument(
         '-f',
         metavar='file',
-        help='Use cURLs from file',
+        help='Use cURLs from file. With wildcards (quoted, like '
+        "'captures/**/*.curl'), convert every matching file to a module "
+        'in the -o directory, skipping files unchanged since the last run',
     )
 
     arg.add_argument(
@@ -68,34 +114,510 @@ def get_args():
 
     arg.add_argument('-o', metavar='file', help='Write output to file')
 
+    arg.add_argument(
+        '--serve',
+        metavar='socket',
+        help='Stay up and run the jobs sent to a unix socket, with '
+        '`python -m requestify.daemon socket [arguments]`',
+    )
+
     arg.add_argument('-har', metavar='file', help='Use cURLS from HAR file')
-    return arg
 
+    arg.add_argument(
+        '--cache',
+        metavar='file',
+        help='Reuse formatted code from (and save it to) a cache file',
+    )
 
-def parse_args(parser):
-    args = parser.parse_args()
+    arg.add_argument(
+        '--ast',
+        action='store_true',
+        help='Generate code from an ast instead of formatting it with black',
+    )
 
-    if len(sys.argv) <= 1:
-        parser.print_help()
-        sys.exit(1)
+    arg.add_argument(
+        '--package',
+        action='store_true',
+        help='Write a lazily imported package with one module per host to -o',
+    )
+
+    arg.add_argument(
+        '--shard-size',
+        metavar='n',
+        type=int,
+        help='With --package, write one module per n requests instead',
+    )
+
+    arg.add_argument(
+        '--params',
+        metavar='file',
+        help='Treat the cURL (-s or -f) as a template with {{name}} '
+        'placeholders, and replay it for every row of a CSV or NDJSON file',
+    )
+
+    arg.add_argument(
+        '--dedupe',
+        action='store_true',
+        help='Generate identical requests once, '
+        'with a replay function that sends them in the original order',
+    )
+
+    arg.add_argument(
+        '--cluster',
+        action='store_true',
+        help='Generate one parametrized function and a data table '
+        'for requests that only differ in ids, parameters or values',
+    )
+
+    arg.add_argument(
+        '--replace',
+        action='store_true',
+        help='With -f, send the requests and generate a workflow class '
+        'whose requests use values from the responses of earlier ones',
+    )
+
+    arg.add_argument(
+        '--metrics',
+        metavar='file',
+        help='With --replace, write connection reuse, DNS/connect, TLS, '
+        'time to first byte and download times, bytes and statuses of the '
+        'requests sent to file (in Prometheus\' text format if it ends '
+        'with .prom, as JSON otherwise)',
+    )
+
+    arg.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep the output (-o, or stdout) up to date with the file (-f) '
+        'or the clipboard (-c), regenerating only the cURLs that changed',
+    )
+
+    arg.add_argument(
+        '--profile',
+        nargs='?',
+        const='-',
+        metavar='file',
+        help='Time parsing, fetching, matching and formatting, printing '
+        'a breakdown to stderr (or writing it to file as JSON)',
+    )
+
+    arg.add_argument(
+        '--ndjson',
+        action='store_true',
+        help='Write one JSON record per request (function name, method, '
+        'url, headers, cookies and data) as soon as it is read. cURLs are '
+        'read from stdin unless -s or -f is given, and `-har -` reads one '
+        'HAR entry per line from stdin',
+    )
+
+    arg.add_argument(
+        '--code',
+        action='store_true',
+        help='With --ndjson, add the generated function to every record',
+    )
+
+    arg.add_argument(
+        '--bench',
+        action='store_true',
+        help='Replay the requests and report their latency, throughput, '
+        'errors and bytes transferred instead of generating code',
+    )
+
+    arg.add_argument(
+        '-n',
+        metavar='n',
+        type=int,
+        default=1,
+        help='With --bench, replay every request n times',
+    )
+
+    arg.add_argument(
+        '--concurrency',
+        metavar='n',
+        type=int,
+        default=10,
+        help='With --bench, the most requests in flight at once',
+    )
+
+    arg.add_argument(
+        '--processes',
+        metavar='n',
+        type=int,
+        help='With --bench, split the replays (and the concurrency) '
+        'between n processes. With a batch of files, convert them in '
+        'n processes',
+    )
+
+    arg.add_argument(
+        '--hedge',
+        metavar='budget',
+        type=float,
+        help='With --bench, resend idempotent requests that take longer '
+        'than the p95 of their endpoint, as long as the resent requests '
+        'stay under budget (a fraction of all the requests)',
+    )
+
+    arg.add_argument(
+        '--json',
+        action='store_true',
+        help='With --bench, report as JSON instead of a table',
+    )
 
+    arg.add_argument(
+        '--rate',
+        metavar='r',
+        type=float,
+        help='With --bench, send r requests per second, however long '
+        'they take, instead of replaying them -n times',
+    )
+
+    arg.add_argument(
+        '--duration',
+        metavar='s',
+        type=float,
+        default=10.0,
+        help='With --rate, send requests for s seconds',
+    )
+
+    arg.add_argument(
+        '--ramp-up',
+        metavar='s',
+        type=float,
+        default=0.0,
+        help='With --rate, go from 0 to r requests per second '
+        'over the first s seconds',
+    )
+
+    arg.add_argument(
+        '--weights',
+        metavar='w1,w2,...',
+        help='With --rate, how often each request is sent, relative '
+        'to the others (one weight per request)',
+    )
+
+    arg.add_argument(
+        '--speed',
+        metavar='x',
+        type=float,
+        default=1.0,
+        help='With -har and --bench, send the requests at their captured '
+        'times, x times faster',
+    )
+    return arg
+
+
+def _get_requests(args) -> list[_RequestifyObject]:
+    if args.params:
+        template = CurlTemplate(args.s or _get_file(args.f)[0])
+        return list(template.iter_requests(iter_rows(args.params)))
+    if args.f:
+        return list(
+            _RequestifyList(*_get_file(args.f), deduplicate=args.dedupe)
+        )
     if args.s:
-        from_string(args.s)
+        return [from_string(args.s)]
+    if args.c:
+        return [from_clipboard()]
+    return []
+
+
+def _get_ndjson_inputs(args) -> tuple[Iterable, Callable]:
+    """
+    What to parse, read lazily so any amount of input fits in memory,
+    and how to parse it
+    """
+    if args.har:
+        from requestify.har import har_entry_to_request, iter_har_entries
 
+        if args.har == '-':
+            lines = (line for line in sys.stdin if line.strip())
+            return lines, lambda line: har_entry_to_request(json.loads(line))
+        return iter_har_entries(args.har), har_entry_to_request
     if args.f:
-        from_file(args.f)
+        return _iter_file(args.f), _RequestifyObject
+    if args.s:
+        return [args.s], _RequestifyObject
+    return iter_curls(sys.stdin), _RequestifyObject
+
+
+def run_watch(args, stdout) -> None:
+    from requestify.watch import (
+        CaptureFile,
+        Clipboard,
+        IncrementalModule,
+        format_changes,
+        watch,
+    )
 
-    if args.c and args.s:
-        from_clipboard()
+    assert args.f or args.c, '--watch needs a file (-f) or the clipboard (-c)'
+    source = CaptureFile(args.f) if args.f else Clipboard()
 
-    if args.c and args.f:
-        from_clipboard()
+    def write(module: str) -> None:
+        if not args.o:
+            stdout.write(module)
+            stdout.flush()
+            return
+        # replaced at once, so whatever imports it never reads half of it
+        temporary_path = args.o + '.tmp'
+        with open(temporary_path, mode='w', encoding='utf8') as out_file:
+            out_file.write(module)
+        os.replace(temporary_path, args.o)
+
+    def report(changes) -> None:
+        sys.stderr.write(format_changes(changes) + '\n')
+
+    module = IncrementalModule(replace=args.replace, use_ast=args.ast)
+    watch(source, write, module, report)
+
+
+def run_bench(args, out_file, client=None, run_coroutine=None) -> None:
+    """
+    A daemon replays on its own client and event loop (client, and
+    run_coroutine to run the replay on it), instead of new ones
+    """
+    # the replay modules import httpx, so only --bench loads them
+    import asyncio
+    from requestify.bench import abench
+    from requestify.hedge import HedgePolicy
+    from requestify.parallel import bench_processes
+    from requestify.load import get_stages, aload
+    from requestify.har import get_har_entries, iter_har_entries, areplay_har
+
+    run_coroutine = run_coroutine or asyncio.run
+    hedge = None
+    if args.har:
+        entries = get_har_entries(iter_har_entries(args.har))
+        result = run_coroutine(areplay_har(entries, args.speed, client))
+    elif args.rate:
+        weights = (
+            [float(weight) for weight in args.weights.split(',')]
+            if args.weights
+            else None
+        )
+        stages = get_stages(args.rate, args.duration, args.ramp_up)
+        result = run_coroutine(
+            aload(_get_requests(args), stages, weights, client)
+        )
+    elif args.processes:
+        # every process has its own client
+        result = bench_processes(
+            _get_requests(args), args.n, args.concurrency, args.processes
+        )
+    else:
+        if args.hedge is not None:
+            hedge = HedgePolicy(budget=args.hedge)
+        result = run_coroutine(
+            abench(
+                _get_requests(args), args.n, args.concurrency, client, hedge
+            )
+        )
+
+    if args.json:
+        report = result.to_dict()
+        if hedge is not None:
+            report['hedging'] = hedge.to_dict()
+        out_file.write(json.dumps(report, indent=2) + '\n')
+    else:
+        out_file.write(result.format_table() + '\n')
+        if hedge is not None:
+            out_file.write(hedge.format_summary() + '\n')
+
+
+def run(args, stdout, cache=None, client=None, run_coroutine=None) -> None:
+    if not args.profile:
+        _run(args, stdout, cache, client, run_coroutine)
+        return
+
+    with profiled() as profiler:
+        # reported even when the conversion fails
+        try:
+            _run(args, stdout, cache, client, run_coroutine)
+        finally:
+            if args.profile == '-':
+                sys.stderr.write(profiler.format_table() + '\n')
+            else:
+                with open(args.profile, mode='w', encoding='utf8') as out:
+                    out.write(profiler.to_json())
+
+
+def _run(args, stdout, cache=None, client=None, run_coroutine=None) -> None:
+    """
+    Does what the parsed arguments ask, writing to -o or stdout
+    """
+    if args.f and is_batch_pattern(args.f):
+        assert args.o, 'A batch of files needs an output directory (-o)'
+        result = convert_batch(args.f, args.o, args.ast, args.processes)
+        stdout.write(format_batch_result(result) + '\n')
+        if result.failed:
+            sys.exit(1)
+        return
+
+    if args.watch:
+        run_watch(args, stdout)
+        return
+
+    if args.package:
+        assert args.f and args.o, '--package needs a file (-f) and -o'
+        write_package(
+            _RequestifyList(*_get_file(args.f)),
+            args.o,
+            shard_size=args.shard_size,
+            cache=cache,
+            use_ast=args.ast,
+        )
+        if cache is not None:
+            cache.save()
+        return
+
+    out_file = open(args.o, mode='w', encoding='utf8') if args.o else stdout
+
+    try:
+        if args.bench:
+            run_bench(args, out_file, client, run_coroutine)
+        elif args.ndjson:
+            inputs, parse = _get_ndjson_inputs(args)
+            write_ndjson(
+                out_file,
+                inputs,
+                parse,
+                with_code=args.code,
+                cache=cache,
+                use_ast=args.ast,
+            )
+        elif args.params:
+            template = args.s or _get_file(args.f)[0]
+            out_file.write(
+                generate_template_module(
+                    CurlTemplate(template),
+                    args.params,
+                    cache=cache,
+                    use_ast=args.ast,
+                )
+            )
+        elif args.f and args.cluster:
+            out_file.write(
+                generate_clustered_module(
+                    _RequestifyList(*_get_file(args.f)),
+                    cache=cache,
+                    use_ast=args.ast,
+                )
+            )
+        elif args.f and args.replace:
+            metrics = NetworkMetrics() if args.metrics else None
+            out_file.write(
+                generate_module(
+                    _ReplaceRequestify(*_get_file(args.f), metrics=metrics),
+                    cache=cache,
+                    use_ast=args.ast,
+                )
+            )
+            if metrics is not None:
+                metrics.save(args.metrics)
+        elif args.f and args.dedupe:
+            out_file.write(
+                generate_module(
+                    _RequestifyList(*_get_file(args.f), deduplicate=True),
+                    cache=cache,
+                    use_ast=args.ast,
+                    replay=True,
+                )
+            )
+        elif args.har:
+            from requestify.har import iter_har_entries, iter_har_requests
+
+            requests = iter_har_requests(iter_har_entries(args.har))
+            write_module(out_file, requests, cache=cache, use_ast=args.ast)
+        elif args.f:
+            # files can hold any number of requests, so they are streamed
+            requests = iter_requestify(_iter_file(args.f))
+            write_module(out_file, requests, cache=cache, use_ast=args.ast)
+        else:
+            requestify = None
+            if args.s:
+                requestify = from_string(args.s)
+
+            if args.c:
+                requestify = from_clipboard()
+
+            if requestify is not None:
+                out_file.write(
+                    generate_module(requestify, cache=cache, use_ast=args.ast)
+                )
+    finally:
+        if out_file is not stdout:
+            out_file.close()
+
+    if cache is not None:
+        cache.save()
+
+
+def get_daemon_job(parser, client=None, run_coroutine=None):
+    """
+    Runs the arguments sent to a daemon, reusing its format caches
+    and, for replays, its client
+    """
+    # by --cache file, jobs without one share an in-memory cache
+    caches: dict = {}
+
+    def job(argv, stdout) -> None:
+        if not argv:
+            parser.print_help()
+            sys.exit(1)
+        args = parser.parse_args(argv)
+        if args.serve or args.watch:
+            parser.error('daemon jobs cannot --serve or --watch')
+        reads_stdin = not (args.s or args.f or args.har) or args.har == '-'
+        if args.ndjson and reads_stdin:
+            parser.error('a daemon cannot read stdin, use -s, -f or -har file')
+        if args.cache not in caches:
+            caches[args.cache] = FormatCache(args.cache)
+        if client is not None:
+            # cookies set by the responses of earlier jobs
+            client.cookies.clear()
+        run(args, stdout, caches[args.cache], client, run_coroutine)
+
+    return job
+
+
+def serve(path, parser) -> None:
+    import httpx
+    from requestify.daemon import Daemon, EventLoopThread
+    from requestify.utils import beautify_string
+
+    # imported now rather than by the first job that needs them
+    import requestify.har
+    import requestify.parallel
+
+    beautify_string('pass')
+    loop = EventLoopThread()
+    limits = httpx.Limits(max_connections=1000)
+    client = httpx.AsyncClient(limits=limits)
+    job = get_daemon_job(parser, client, loop.run)
+    # exit through the finally blocks, which remove the socket
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        with Daemon(path, job) as daemon:
+            daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run(client.aclose())
+        loop.close()
+
+
+def parse_args(parser):
+    args = parser.parse_args()
+
+    if len(sys.argv) <= 1:
+        parser.print_help()
+        sys.exit(1)
 
-    if args.s and args.o:
-        from_string(args.s)
+    if args.serve:
+        serve(args.serve, parser)
+        return
 
-    if args.f and args.o:
-        from_file(args.s)
+    cache = FormatCache(args.cache) if args.cache else None
+    run(args, sys.stdout, cache)
 
 
 if __name__ == '__main__':
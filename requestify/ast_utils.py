@@ -0,0 +1,319 @@
+from __future__ import annotations
+import ast
+from typing import Any, Optional
+from .models import _RequestifyObject, _RequestifyList, _ReplaceRequestify
+from .constants import (
+    REQUEST_VARIABLE_NAME,
+    REQUEST_CLASS_NAME,
+    REQUEST_MATCHING_DATA_DICT_NAME,
+    REQUEST_DEPENDENCIES_DICT_NAME,
+)
+from .text_utils import (
+    FunctionBase,
+    get_shared_constants,
+    generate_function_text,
+    generate_replacement_run_text,
+    generate_unnested_class_function,
+    generate_replay_function,
+    _get_shared_constant_name,
+)
+from .utils import CodeExpression, code_repr, join_chunks, INDENT
+
+# Builds the same code as text_utils, but as ast nodes, which are rendered
+# by `ast.unparse` into stable, correctly quoted code without running black
+
+
+"""
+Values
+"""
+
+
+def value_to_ast(value: Any) -> ast.expr:
+    if isinstance(value, CodeExpression):
+        return ast.parse(code_repr(value), mode='eval').body
+    if isinstance(value, dict):
+        return ast.Dict(
+            keys=[value_to_ast(key) for key in value],
+            values=[value_to_ast(v) for v in value.values()],
+        )
+    if isinstance(value, list):
+        return ast.List(elts=[value_to_ast(v) for v in value], ctx=ast.Load())
+    if isinstance(value, tuple):
+        return ast.Tuple(elts=[value_to_ast(v) for v in value], ctx=ast.Load())
+    return ast.Constant(value=value)
+
+
+def _dict_to_ast(
+    req: _RequestifyObject,
+    values: dict[str, Any],
+    kind: str,
+    shared_constants: Optional[dict[str, dict[str, Any]]],
+) -> ast.expr:
+    name = _get_shared_constant_name(req, kind) if shared_constants else ''
+    if name not in (shared_constants or {}):
+        return value_to_ast(values)
+
+    shared = shared_constants[name]
+    overrides = {k: v for k, v in values.items() if k not in shared}
+    constant = ast.Name(id=name, ctx=ast.Load())
+    if not overrides:
+        return constant
+    overrides_ast = value_to_ast(overrides)
+    return ast.Dict(
+        keys=[None, *overrides_ast.keys],
+        values=[constant, *overrides_ast.values],
+    )
+
+
+def _assign(name: str, value: ast.expr) -> ast.Assign:
+    return ast.Assign(
+        targets=[ast.Name(id=name, ctx=ast.Store())], value=value
+    )
+
+
+"""
+Requests
+"""
+
+
+def generate_request_statements(
+    req: _RequestifyObject,
+    with_headers=True,
+    with_cookies=True,
+    shared_constants: Optional[dict[str, dict[str, Any]]] = None,
+) -> list[ast.stmt]:
+    statements = []
+    keywords = []
+
+    if with_headers:
+        headers = _dict_to_ast(req, req._headers, 'HEADERS', shared_constants)
+        statements.append(_assign('headers', headers))
+        keywords.append('headers')
+
+    if with_cookies:
+        cookies = _dict_to_ast(req, req._cookies, 'COOKIES', shared_constants)
+        statements.append(_assign('cookies', cookies))
+        keywords.append('cookies')
+
+    if req._data:
+        statements.append(_assign('data', value_to_ast(req._data)))
+        keywords.append('data')
+
+    call = ast.Call(
+        func=ast.Attribute(
+            value=ast.Name(id='requests', ctx=ast.Load()),
+            attr=req._method,
+            ctx=ast.Load(),
+        ),
+        args=[value_to_ast(req._url)],
+        keywords=[
+            ast.keyword(arg=name, value=ast.Name(id=name, ctx=ast.Load()))
+            for name in keywords
+        ],
+    )
+    statements.append(_assign(REQUEST_VARIABLE_NAME, call))
+    return statements
+
+
+def generate_replacement_statements(
+    req: _RequestifyObject, with_headers=True, with_cookies=True
+) -> list[ast.stmt]:
+    statements = generate_request_statements(req, with_headers, with_cookies)
+    workflow = ast.parse(
+        f"self.{REQUEST_MATCHING_DATA_DICT_NAME}['{req._function_name}']",
+        mode='eval',
+    ).body
+    workflow.ctx = ast.Store()
+    statements.append(
+        ast.Assign(
+            targets=[workflow],
+            value=ast.Name(id=REQUEST_VARIABLE_NAME, ctx=ast.Load()),
+        )
+    )
+    return statements
+
+
+"""
+Functions and classes
+"""
+
+
+def generate_function_ast(
+    name: str,
+    body: list[ast.stmt],
+    is_in_class=False,
+    arguments: tuple[str, ...] = (),
+) -> ast.FunctionDef:
+    parameters = ', '.join((*(['self'] if is_in_class else []), *arguments))
+    function = ast.parse(f'def {name}({parameters}): pass').body[0]
+    function.body = body
+    return function
+
+
+def generate_class_ast(
+    class_name: str, class_body: list[ast.FunctionDef]
+) -> ast.ClassDef:
+    class_ast = ast.parse(f'class {class_name}: pass').body[0]
+    class_ast.body = class_body
+    return class_ast
+
+
+def generate_requestify_function_ast(
+    req: _RequestifyObject,
+    with_headers=True,
+    with_cookies=True,
+    shared_constants: Optional[dict[str, dict[str, Any]]] = None,
+) -> ast.FunctionDef:
+    return generate_function_ast(
+        req._function_name,
+        generate_request_statements(
+            req, with_headers, with_cookies, shared_constants
+        ),
+    )
+
+
+def generate_requestify_list_function_ast(
+    rl: _RequestifyList,
+    with_headers=True,
+    with_cookies=True,
+    shared_constants=False,
+) -> list[ast.FunctionDef]:
+    constants = get_shared_constants(rl) if shared_constants else None
+    return [
+        generate_requestify_function_ast(
+            request, with_headers, with_cookies, constants
+        )
+        for request in rl._requests
+    ]
+
+
+def generate_requestify_list_class_ast(
+    rl: _RequestifyList, with_headers=True, with_cookies=True
+) -> ast.ClassDef:
+    class_body = [
+        generate_function_ast(
+            request._function_name,
+            generate_request_statements(request, with_headers, with_cookies),
+            is_in_class=True,
+        )
+        for request in rl._requests
+    ]
+    return generate_class_ast(REQUEST_CLASS_NAME, class_body)
+
+
+def generate_replacement_ast(
+    rreq: _ReplaceRequestify,
+    with_headers=True,
+    with_cookies=True,
+    with_run=False,
+) -> ast.ClassDef:
+    init_body = [
+        ast.parse(f'self.{REQUEST_MATCHING_DATA_DICT_NAME} = {{}}').body[0]
+    ]
+    if with_run:
+        dependencies = ast.parse(
+            f'self.{REQUEST_DEPENDENCIES_DICT_NAME} = None'
+        ).body[0]
+        dependencies.value = value_to_ast(rreq._dependencies)
+        init_body.append(dependencies)
+
+    class_body = [generate_function_ast('__init__', init_body, True)]
+    for request in rreq._requests:
+        class_body.append(
+            generate_function_ast(
+                request._function_name,
+                generate_replacement_statements(
+                    request, with_headers, with_cookies
+                ),
+                is_in_class=True,
+            )
+        )
+
+    if with_run:
+        run = generate_unnested_class_function(
+            FunctionBase('run', generate_replacement_run_text())
+        )
+        class_body.append(ast.parse(generate_function_text(run)).body[0])
+
+    return generate_class_ast(REQUEST_CLASS_NAME, class_body)
+
+
+def generate_replay_ast(rl: _RequestifyList) -> ast.FunctionDef:
+    return ast.parse(
+        generate_function_text(generate_replay_function(rl))
+    ).body[0]
+
+
+"""
+Modules
+"""
+
+
+def generate_module_ast(
+    requestify: _RequestifyObject | _RequestifyList | _ReplaceRequestify,
+    with_headers=True,
+    with_cookies=True,
+    shared_constants=False,
+    replay=False,
+) -> ast.Module:
+    if isinstance(requestify, _ReplaceRequestify):
+        body = [
+            *ast.parse('import requests').body,
+            generate_replacement_ast(
+                requestify, with_headers, with_cookies, with_run=True
+            ),
+        ]
+    elif isinstance(requestify, _RequestifyObject):
+        body = [
+            *ast.parse('import requests').body,
+            generate_requestify_function_ast(
+                requestify, with_headers, with_cookies
+            ),
+        ]
+    else:
+        constants = (
+            get_shared_constants(requestify) if shared_constants else {}
+        )
+        body = [
+            *ast.parse('import requests').body,
+            *[
+                _assign(name, value_to_ast(values))
+                for name, values in constants.items()
+                if (with_headers and name.endswith('_HEADERS'))
+                or (with_cookies and name.endswith('_COOKIES'))
+            ],
+            *generate_requestify_list_function_ast(
+                requestify, with_headers, with_cookies, shared_constants
+            ),
+            *([generate_replay_ast(requestify)] if replay else []),
+        ]
+    return ast.fix_missing_locations(ast.Module(body=body, type_ignores=[]))
+
+
+def unparse_module(module: ast.Module) -> str:
+    chunks = []
+    for statement in module.body:
+        text = unparse_statement(statement)
+        is_import = isinstance(statement, (ast.Import, ast.ImportFrom))
+        if is_import and chunks and chunks[-1].startswith(('import', 'from')):
+            chunks[-1] += '\n' + text
+        else:
+            chunks.append(text)
+    return join_chunks(chunks)
+
+
+# like ast.unparse, but with a blank line between the functions of a class
+def unparse_statement(statement: ast.stmt) -> str:
+    statement = ast.fix_missing_locations(statement)
+    if not isinstance(statement, ast.ClassDef):
+        return ast.unparse(statement)
+
+    header = ast.unparse(statement).split('\n', 1)[0]
+    functions = [
+        '\n'.join(
+            INDENT + line if line else line
+            for line in ast.unparse(function).split('\n')
+        )
+        for function in statement.body
+    ]
+    return header + '\n' + '\n\n'.join(functions)
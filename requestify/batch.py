@@ -0,0 +1,213 @@
+from __future__ import annotations
+import glob
+import hashlib
+import json
+import os
+from collections import namedtuple
+from importlib import metadata
+from typing import Any, Optional
+from .models import _RequestifyObject, _RequestifyList
+from .constants import BATCH_MANIFEST_NAME, VERSION
+from .utils import iter_curls
+
+BatchResult = namedtuple('BatchResult', 'converted unchanged removed failed')
+"""
+input files (relative to the pattern's base directory) that were
+converted, skipped as unchanged and removed, failed maps the input files
+that could not be converted to their error
+"""
+
+# starting worker processes takes longer than converting fewer files
+MIN_PARALLEL_FILES = 8
+
+
+# file names can hold [, * and ?, so an existing file is never a pattern
+def is_batch_pattern(pattern: str) -> bool:
+    return glob.has_magic(pattern) and not os.path.isfile(pattern)
+
+
+def get_base_directory(pattern: str) -> str:
+    """
+    The directory before the first wildcard, that input files
+    are named relative to: captures/**/*.curl -> captures
+    """
+    if not glob.has_magic(pattern):
+        return os.path.dirname(pattern) or os.curdir
+    parts = []
+    for part in pattern.split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.sep.join(parts) or os.curdir
+
+
+def get_batch_files(pattern: str) -> dict[str, str]:
+    """
+    Files matching the pattern, by their path relative to its base directory
+    """
+    base = get_base_directory(pattern)
+    return {
+        os.path.relpath(path, base): path
+        for path in sorted(glob.glob(pattern, recursive=True))
+        if os.path.isfile(path)
+    }
+
+
+def get_output_path(name: str) -> str:
+    return os.path.splitext(name)[0] + '.py'
+
+
+def hash_file(path: str) -> str:
+    with open(path, mode='rb') as in_file:
+        return hashlib.sha256(in_file.read()).hexdigest()
+
+
+def hash_sources(directory: str) -> str:
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            digest.update(name.encode('utf-8'))
+            digest.update(hash_file(os.path.join(directory, name)).encode())
+    return digest.hexdigest()
+
+
+def _get_version() -> str:
+    # an uninstalled checkout changes without its version changing,
+    # so what it would generate is told apart by its sources
+    if VERSION == 'unknown':
+        return f'source {hash_sources(os.path.dirname(__file__))}'
+    return VERSION
+
+
+def _get_settings(use_ast: bool) -> dict[str, Any]:
+    # the installed black's version, without importing it
+    formatter = 'ast' if use_ast else f'black {metadata.version("black")}'
+    return {'version': _get_version(), 'formatter': formatter}
+
+
+def read_manifest(path: str) -> dict[str, Any]:
+    try:
+        with open(path, mode='r', encoding='utf8') as manifest_file:
+            return json.load(manifest_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_manifest(path: str, manifest: dict[str, Any]) -> None:
+    # written whole and then renamed, so an interrupted run cannot leave
+    # a manifest that lists outputs that were never written
+    temporary_path = path + '.tmp'
+    with open(temporary_path, mode='w', encoding='utf8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    os.replace(temporary_path, path)
+
+
+def convert_file(path: str, output_path: str, use_ast=False) -> None:
+    # imported here, as worker processes only need it to convert
+    from .output import generate_module
+
+    with open(path, mode='r', encoding='utf8') as in_file:
+        curls = list(iter_curls(in_file))
+    assert curls, 'No data in the specified file'
+    requestify = (
+        _RequestifyObject(curls[0])
+        if len(curls) == 1
+        else _RequestifyList(*curls)
+    )
+    module = generate_module(requestify, use_ast=use_ast)
+    os.makedirs(os.path.dirname(output_path) or os.curdir, exist_ok=True)
+    with open(output_path, mode='w', encoding='utf8') as out_file:
+        out_file.write(module)
+
+
+def _convert_file(path: str, output_path: str, use_ast: bool) -> Optional[str]:
+    """
+    convert_file for worker processes, returning the error instead
+    of raising it so one bad file does not stop the batch
+    """
+    try:
+        convert_file(path, output_path, use_ast)
+    except (AssertionError, ValueError, OSError) as error:
+        return f'{type(error).__name__}: {error}'
+    return None
+
+
+def convert_batch(
+    pattern: str,
+    directory: str,
+    use_ast=False,
+    processes: Optional[int] = None,
+) -> BatchResult:
+    """
+    Converts every file matching the pattern to a module in directory,
+    keeping its path relative to the pattern's base directory. Content
+    hashes of the inputs are kept in a manifest, so later runs only convert
+    files that changed (or everything, if requestify or black changed).
+    """
+    manifest_path = os.path.join(directory, BATCH_MANIFEST_NAME)
+    manifest = read_manifest(manifest_path)
+    settings = _get_settings(use_ast)
+    hashes = manifest.get('files', {})
+    if manifest.get('settings') != settings:
+        hashes = {}
+
+    files = get_batch_files(pattern)
+    current_hashes = {name: hash_file(path) for name, path in files.items()}
+    changed = [
+        name
+        for name, file_hash in current_hashes.items()
+        if hashes.get(name) != file_hash
+        or not os.path.exists(os.path.join(directory, get_output_path(name)))
+    ]
+    removed = [name for name in manifest.get('files', {}) if name not in files]
+    for name in removed:
+        output_path = os.path.join(directory, get_output_path(name))
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+    jobs = [
+        (
+            files[name],
+            os.path.join(directory, get_output_path(name)),
+            use_ast,
+        )
+        for name in changed
+    ]
+    processes = min(processes or os.cpu_count() or 1, len(jobs))
+    if processes > 1 and len(jobs) >= MIN_PARALLEL_FILES:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(processes) as executor:
+            errors = list(executor.map(_convert_file, *zip(*jobs)))
+    else:
+        errors = [_convert_file(*job) for job in jobs]
+
+    failed = {name: error for name, error in zip(changed, errors) if error}
+    os.makedirs(directory, exist_ok=True)
+    write_manifest(
+        manifest_path,
+        {
+            'settings': settings,
+            'files': {
+                name: file_hash
+                for name, file_hash in current_hashes.items()
+                if name not in failed
+            },
+        },
+    )
+    return BatchResult(
+        [name for name in changed if name not in failed],
+        [name for name in files if name not in changed],
+        removed,
+        failed,
+    )
+
+
+def format_batch_result(result: BatchResult) -> str:
+    lines = [f'{name}: {error}' for name, error in result.failed.items()]
+    lines.append(
+        f'{len(result.converted)} converted, {len(result.unchanged)} '
+        f'unchanged, {len(result.removed)} removed, '
+        f'{len(result.failed)} failed'
+    )
+    return '\n'.join(lines)
@@ -0,0 +1,248 @@
+from __future__ import annotations
+import asyncio
+import functools
+import json
+import time
+from collections import namedtuple
+from typing import Any, Iterable, Optional
+import httpx
+from .models import _RequestifyObject, _RequestifyList
+from .constants import BENCH_TOTAL_NAME
+from .stats import RequestStats
+from .hedge import HedgePolicy, get_endpoint
+from .utils import encode_body, get_sent_headers
+
+PreparedRequest = namedtuple('PreparedRequest', 'name method url headers body')
+"""
+request with its headers (cookies included) and body encoded once,
+so replaying it many times does not encode them again
+"""
+
+Sample = namedtuple(
+    'Sample', 'name latency status bytes_sent bytes_received error'
+)
+"""
+one replayed request, latency is in microseconds,
+error is the name of the exception raised by a failed request
+"""
+
+
+def prepare(request: _RequestifyObject) -> PreparedRequest:
+    return PreparedRequest(
+        request._function_name,
+        request._method.upper(),
+        str(request._url),
+        get_sent_headers(request._headers, request._cookies, request._data),
+        encode_body(request._data),
+    )
+
+
+async def timed_request(
+    client: httpx.AsyncClient,
+    request: PreparedRequest,
+    intended_start: Optional[int] = None,
+    hedge: Optional[HedgePolicy] = None,
+) -> Sample:
+    """
+    Sends the request, timing it from intended_start (a perf_counter_ns
+    value) if it is given instead of from when it was actually sent,
+    so time spent waiting to be sent counts as latency.
+    With a hedge policy, a slow request may be sent twice.
+    """
+    start = (
+        time.perf_counter_ns() if intended_start is None else intended_start
+    )
+    send = functools.partial(
+        client.request,
+        request.method,
+        request.url,
+        headers=request.headers,
+        content=request.body,
+    )
+    try:
+        if hedge is None:
+            response = await send()
+        else:
+            response = await hedge.request(
+                get_endpoint(request.method, request.url), request.method, send
+            )
+    # InvalidURL, StreamError and the like are not HTTPErrors, and one bad
+    # request must not end the benchmark, so anything it raises is counted
+    except Exception as error:
+        latency = (time.perf_counter_ns() - start) // 1000
+        return Sample(request.name, latency, None, 0, 0, type(error).__name__)
+
+    latency = (time.perf_counter_ns() - start) // 1000
+    return Sample(
+        request.name,
+        latency,
+        response.status_code,
+        len(request.body or b''),
+        len(response.content),
+        None,
+    )
+
+
+class BenchResult:
+    """
+    Stats of every replayed request, by function name,
+    and the wall time the replay took
+    """
+
+    def __init__(
+        self,
+        requests: Optional[dict[str, RequestStats]] = None,
+        elapsed=0.0,
+    ):
+        self.requests = requests or {}
+        self.elapsed = elapsed
+
+    def record(self, sample: Sample) -> None:
+        if sample.name not in self.requests:
+            self.requests[sample.name] = RequestStats()
+        self.requests[sample.name].record(
+            sample.latency,
+            sample.status,
+            sample.bytes_sent,
+            sample.bytes_received,
+            sample.error,
+        )
+
+    def merge(self, other: BenchResult) -> None:
+        """
+        Adds the stats of a replay that ran at the same time as this one
+        """
+        for name, stats in other.requests.items():
+            if name not in self.requests:
+                self.requests[name] = RequestStats()
+            self.requests[name].merge(stats)
+        self.elapsed = max(self.elapsed, other.elapsed)
+
+    @property
+    def total(self) -> RequestStats:
+        total = RequestStats()
+        for stats in self.requests.values():
+            total.merge(stats)
+        return total
+
+    @property
+    def throughput(self) -> float:
+        return self.total.count / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'elapsed': self.elapsed,
+            'throughput': self.throughput,
+            'requests': {
+                name: stats.to_dict() for name, stats in self.requests.items()
+            },
+            BENCH_TOTAL_NAME: self.total.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> BenchResult:
+        return cls(
+            {
+                name: RequestStats.from_dict(stats)
+                for name, stats in data['requests'].items()
+            },
+            data['elapsed'],
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def format_table(self) -> str:
+        header = (
+            f'{"request":<32} {"count":>8} {"errors":>7} {"p50 ms":>9} '
+            f'{"p90 ms":>9} {"p99 ms":>9} {"max ms":>9} {"sent":>10} '
+            f'{"received":>10}'
+        )
+        rows = [header, '-' * len(header)]
+        for name, stats in [
+            *self.requests.items(),
+            (BENCH_TOTAL_NAME, self.total),
+        ]:
+            latency = stats.latency
+            rows.append(
+                f'{name:<32} {stats.count:>8} {stats.error_rate:>7.1%} '
+                + ' '.join(
+                    f'{value / 1000:>9.2f}'
+                    for value in (
+                        latency.percentile(50),
+                        latency.percentile(90),
+                        latency.percentile(99),
+                        latency.max or 0,
+                    )
+                )
+                + f' {stats.bytes_sent:>10} {stats.bytes_received:>10}'
+            )
+        rows.append(
+            f'{self.total.count} requests in {self.elapsed:.2f}s, '
+            f'{self.throughput:.1f} requests/s'
+        )
+        return '\n'.join(rows)
+
+
+async def areplay(
+    requests: Iterable[PreparedRequest],
+    concurrency=10,
+    client: Optional[httpx.AsyncClient] = None,
+    hedge: Optional[HedgePolicy] = None,
+) -> BenchResult:
+    """
+    Sends the requests in order, with at most `concurrency` of them
+    in flight (not counting hedges), on a shared client
+    """
+    assert concurrency > 0, 'Concurrency must be positive'
+    queue = iter(requests)
+    result = BenchResult()
+
+    # workers pull from the same iterator, so the replay order is kept
+    async def worker(client: httpx.AsyncClient):
+        for request in queue:
+            result.record(await timed_request(client, request, hedge=hedge))
+
+    async def run(client: httpx.AsyncClient):
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        result.elapsed = time.perf_counter() - start
+
+    if client is not None:
+        await run(client)
+    else:
+        # room for a hedge of every request in flight
+        connections = concurrency * 2 if hedge else concurrency
+        limits = httpx.Limits(max_connections=connections)
+        async with httpx.AsyncClient(limits=limits) as client:
+            await run(client)
+    return result
+
+
+async def abench(
+    requests: _RequestifyList | Iterable[_RequestifyObject],
+    iterations=1,
+    concurrency=10,
+    client: Optional[httpx.AsyncClient] = None,
+    hedge: Optional[HedgePolicy] = None,
+) -> BenchResult:
+    """
+    Replays every request `iterations` times
+    """
+    assert iterations > 0, 'Nothing to replay'
+    prepared = [prepare(request) for request in requests]
+    assert prepared, 'There must be at least one request'
+    queue = (request for _ in range(iterations) for request in prepared)
+    return await areplay(queue, concurrency, client, hedge)
+
+
+def bench(
+    requests: _RequestifyList | Iterable[_RequestifyObject],
+    iterations=1,
+    concurrency=10,
+    client: Optional[httpx.AsyncClient] = None,
+    hedge: Optional[HedgePolicy] = None,
+) -> BenchResult:
+    return asyncio.run(
+        abench(requests, iterations, concurrency, client, hedge)
+    )
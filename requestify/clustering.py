@@ -0,0 +1,287 @@
+from __future__ import annotations
+import ast
+import copy
+import keyword
+from collections import namedtuple, defaultdict
+from typing import Any, Optional
+from urllib.parse import urlsplit, parse_qsl, quote_plus
+from .models import _RequestifyObject, _RequestifyList
+from .constants import GENERATED_NAMES, PATH_ID_REGEX
+from .text_utils import generate_imports_text
+from .ast_utils import (
+    generate_function_ast,
+    generate_request_statements,
+    generate_requestify_function_ast,
+    unparse_statement,
+    value_to_ast,
+)
+from .utils import (
+    CodeExpression,
+    FormatCache,
+    INDENT,
+    beautify_chunks,
+    beautify_netloc,
+    join_chunks,
+)
+
+Slot = namedtuple('Slot', 'name location key')
+"""
+name is the argument of the parametrized function,
+location is 'path', 'query', 'headers', 'cookies' or 'data',
+key is the index of the path segment or query parameter,
+or the header, cookie or data key (None if data is not a dict)
+"""
+
+Cluster = namedtuple('Cluster', 'name requests slots')
+"""
+requests that only differ in the values of their slots,
+name is the name of the parametrized function
+"""
+
+
+def _split_url(url: str) -> tuple[str, list[str], list[tuple[str, str]]]:
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split('/') if segment]
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    return f'{parts.scheme}://{parts.netloc}', segments, query
+
+
+# requests with the same shape can be generated by the same function
+def _get_shape(req: _RequestifyObject) -> tuple:
+    base, segments, query = _split_url(req._url)
+    path_template = tuple(
+        '{}' if PATH_ID_REGEX.match(segment) else segment
+        for segment in segments
+    )
+    data_shape = (
+        tuple(req._data)
+        if isinstance(req._data, dict)
+        else type(req._data).__name__
+    )
+    return (
+        req._method,
+        base,
+        path_template,
+        tuple(key for key, _ in query),
+        tuple(req._headers),
+        tuple(req._cookies),
+        data_shape,
+    )
+
+
+def _get_values(req: _RequestifyObject) -> dict[tuple[str, Any], Any]:
+    _, segments, query = _split_url(req._url)
+    values = {}
+    values.update(
+        {('path', index): segment for index, segment in enumerate(segments)}
+    )
+    values.update(
+        {('query', index): value for index, (_, value) in enumerate(query)}
+    )
+    values.update({('headers', k): v for k, v in req._headers.items()})
+    values.update({('cookies', k): v for k, v in req._cookies.items()})
+    if isinstance(req._data, dict):
+        values.update({('data', k): v for k, v in req._data.items()})
+    else:
+        values[('data', None)] = req._data
+    return values
+
+
+def _get_slot_name(
+    req: _RequestifyObject, location: str, key: Any, existing: set[str]
+) -> str:
+    if location == 'path':
+        _, segments, _ = _split_url(req._url)
+        name = f'{segments[key - 1]}_id' if key else 'path'
+    elif location == 'query':
+        _, _, query = _split_url(req._url)
+        name = query[key][0]
+    else:
+        name = key if key is not None else location
+
+    name = beautify_netloc(str(name)).strip('_').lower()
+    if not name.isidentifier() or keyword.iskeyword(name):
+        name = f'{location}_{name}'.strip('_')
+
+    unique_name = name
+    count = 1
+    while unique_name in existing:
+        unique_name = f'{name}_{count}'
+        count += 1
+    existing.add(unique_name)
+    return unique_name
+
+
+def _get_cluster_name(req: _RequestifyObject, existing: set[str]) -> str:
+    base, segments, _ = _split_url(req._url)
+    endpoint = [s for s in segments if not PATH_ID_REGEX.match(s)]
+    name = beautify_netloc(
+        '_'.join([req._method, urlsplit(base).netloc, *endpoint])
+    ).lower()
+
+    unique_name = name
+    count = 1
+    while unique_name in existing:
+        unique_name = f'{name}_{count}'
+        count += 1
+    existing.add(unique_name)
+    return unique_name
+
+
+def cluster_requests(rl: _RequestifyList) -> list[Cluster]:
+    """
+    Groups requests by method, host, path template, query keys and header,
+    cookie and data shape, in order of first appearance. The values that
+    differ between requests of a group become its slots.
+    """
+    groups = defaultdict(list)
+    for request in rl._requests:
+        groups[_get_shape(request)].append(request)
+
+    clusters = []
+    # requests of small clusters are generated as their own functions,
+    # so cluster names must not take any of their names
+    cluster_names = {str(request) for request in rl._requests}
+    for requests in groups.values():
+        first, *rest = requests
+        first_values = _get_values(first)
+        slot_names = set(GENERATED_NAMES)
+        slots = [
+            Slot(
+                _get_slot_name(first, location, key, slot_names),
+                location,
+                key,
+            )
+            for (location, key), value in first_values.items()
+            if any(
+                _get_values(request)[(location, key)] != value
+                for request in rest
+            )
+        ]
+        name = _get_cluster_name(first, cluster_names)
+        clusters.append(Cluster(name, requests, slots))
+    return clusters
+
+
+def get_table(cluster: Cluster) -> list[tuple]:
+    rows = []
+    for request in cluster.requests:
+        values = _get_values(request)
+        rows.append(
+            tuple(values[(slot.location, slot.key)] for slot in cluster.slots)
+        )
+    return rows
+
+
+def parametrize(cluster: Cluster) -> _RequestifyObject:
+    """
+    A copy of the first request of the cluster,
+    with every slot replaced by its argument
+    """
+    first = cluster.requests[0]
+    req = copy.copy(first)
+    req._headers = dict(first._headers)
+    req._cookies = dict(first._cookies)
+    req._data = (
+        dict(first._data) if isinstance(first._data, dict) else first._data
+    )
+
+    base, segments, query = _split_url(first._url)
+    escape = lambda s: s.replace('{', '{{').replace('}', '}}')
+    segments = [escape(segment) for segment in segments]
+    # parse_qsl decoded them, so they are encoded again (braces included)
+    query = [
+        (quote_plus(key, safe='/:'), quote_plus(value, safe='/:'))
+        for key, value in query
+    ]
+    url_has_slots = False
+
+    for slot in cluster.slots:
+        argument = CodeExpression(slot.name)
+        if slot.location == 'path':
+            segments[slot.key] = f'{{{slot.name}}}'
+            url_has_slots = True
+        elif slot.location == 'query':
+            query[slot.key] = (query[slot.key][0], f'{{{slot.name}}}')
+            url_has_slots = True
+        elif slot.location == 'headers':
+            req._headers[slot.key] = argument
+        elif slot.location == 'cookies':
+            req._cookies[slot.key] = argument
+        elif slot.key is None:
+            req._data = argument
+        else:
+            req._data[slot.key] = argument
+
+    if url_has_slots:
+        url = escape(base) + ''.join(f'/{segment}' for segment in segments)
+        if query:
+            url += '?' + '&'.join(f'{key}={value}' for key, value in query)
+        req._url = CodeExpression(f"f'{url}'")
+    return req
+
+
+def _generate_table_text(name: str, rows: list[tuple]) -> str:
+    lines = [f'{INDENT}{ast.unparse(value_to_ast(row))},' for row in rows]
+    return f'{name} = [\n' + '\n'.join(lines) + '\n]'
+
+
+def generate_cluster_chunks(
+    cluster: Cluster, with_headers=True, with_cookies=True
+) -> list[str]:
+    """
+    The table of slot values, the parametrized function
+    and a replay_ function that calls it with every row of the table
+    """
+    table_name = cluster.name.upper()
+    arguments = tuple(slot.name for slot in cluster.slots)
+    function = generate_function_ast(
+        cluster.name,
+        generate_request_statements(
+            parametrize(cluster), with_headers, with_cookies
+        ),
+        arguments=arguments,
+    )
+    replay = ast.parse(
+        f'def replay_{cluster.name}():\n'
+        f'    for row in {table_name}:\n'
+        f'        {cluster.name}(*row)'
+    ).body[0]
+    return [
+        _generate_table_text(table_name, get_table(cluster)),
+        unparse_statement(function),
+        unparse_statement(replay),
+    ]
+
+
+def generate_clustered_module(
+    rl: _RequestifyList,
+    with_headers=True,
+    with_cookies=True,
+    cache: Optional[FormatCache] = None,
+    use_ast=False,
+    min_cluster_size=2,
+) -> str:
+    """
+    Like generate_module, but clusters of at least min_cluster_size
+    requests are generated as one parametrized function and a table
+    """
+    chunks = ['\n'.join(generate_imports_text('requests'))]
+    for cluster in cluster_requests(rl):
+        if len(cluster.requests) >= min_cluster_size and cluster.slots:
+            chunks += generate_cluster_chunks(
+                cluster, with_headers, with_cookies
+            )
+        else:
+            chunks += [
+                unparse_statement(
+                    generate_requestify_function_ast(
+                        request, with_headers, with_cookies
+                    )
+                )
+                for request in cluster.requests
+            ]
+
+    if not use_ast:
+        chunks = beautify_chunks(chunks, cache)
+    return join_chunks(chunks)
@@ -1,14 +1,34 @@
 import re
+from importlib import metadata
 from urllib import parse
 from . import utils
 
+# recorded in batch manifests, so upgrading regenerates everything
+try:
+    VERSION = metadata.version('requestify')
+# a checkout that was never installed
+except metadata.PackageNotFoundError:
+    VERSION = 'unknown'
+
 JSON_ERROR_NAME = 'JSONDecodeError'
 
 # name that will be used for class with requests
 REQUEST_CLASS_NAME = 'RequestsTest'
 REQUEST_MATCHING_DATA_DICT_NAME = 'workflow'
+REQUEST_DEPENDENCIES_DICT_NAME = 'dependencies'
+REPLAY_FUNCTION_NAME = 'replay'
 REQUEST_VARIABLE_NAME = 'request'
 RESPONSE_VARIABLE_NAME = 'response'
+# names the body of a generated function uses, arguments must not shadow them
+GENERATED_NAMES = (
+    'headers',
+    'cookies',
+    'data',
+    REQUEST_VARIABLE_NAME,
+    'requests',
+)
+# name of the shared urllib3.PoolManager in generated urllib3 code
+URLLIB3_POOL_VARIABLE_NAME = 'http'
 
 # methods to be called if data flags are present
 DATA_HANDLER = {
@@ -29,3 +49,22 @@ OPTS_REGEX = re.compile(
 URL_REGEX = re.compile(
     '((?:(?<=[^a-zA-Z0-9]){0,}(?:(?:https?\:\/\/){0,1}(?:[a-zA-Z0-9\%]{1,}\:[a-zA-Z0-9\%]{1,}[@]){,1})(?:(?:\w{1,}\.{1}){1,5}(?:(?:[a-zA-Z]){1,})|(?:[a-zA-Z]{1,}\/[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}\:[0-9]{1,4}){1})){1}(?:(?:(?:\/{0,1}(?:[a-zA-Z0-9\-\_\=\-]){1,})*)(?:[?][a-zA-Z0-9\=\%\&\_\-]{1,}){0,1})(?:\.(?:[a-zA-Z0-9]){0,}){0,1})'
 )
+
+# path segments that identify a resource rather than an endpoint
+PATH_ID_REGEX = re.compile(
+    r'^(?:\d+|[0-9a-fA-F]{8,}|[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12})$'
+)
+
+# {{name}} placeholders of cURL templates, filled from parameter rows
+TEMPLATE_PLACEHOLDER_REGEX = re.compile(r'\{\{\s*([A-Za-z_]\w*)\s*\}\}')
+# stands in for the placeholder with the given index while parsing a template
+TEMPLATE_SENTINEL = 'requestify_placeholder_{}_'
+TEMPLATE_SENTINEL_REGEX = re.compile(r'requestify_placeholder_(\d+)_')
+# constant holding the parameter file read by generated template replays
+TEMPLATE_PARAMETERS_FILE_NAME = 'PARAMETERS_FILE'
+# name the stats of all requests together are reported under
+BENCH_TOTAL_NAME = 'total'
+# file in the output directory of a batch conversion, with the input hashes
+BATCH_MANIFEST_NAME = '.requestify-manifest.json'
+# methods that can be sent twice without changing what they do
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
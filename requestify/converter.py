@@ -0,0 +1,158 @@
+from __future__ import annotations
+import threading
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from collections import namedtuple
+from typing import Optional
+from .models import _RequestifyObject, _RequestifyList, _ReplaceRequestify
+from .daemon import EventLoopThread
+from .utils import FormatCache, iter_curls, join_chunks
+
+ConverterConfig = namedtuple(
+    'ConverterConfig',
+    'with_headers with_cookies use_ast replace',
+    defaults=(True, True, False, False),
+)
+"""
+how a Converter generates modules, with replace the requests are sent
+and turned into a workflow whose requests read from earlier responses
+"""
+
+ConversionError = namedtuple('ConversionError', 'curl type message')
+"""
+a cURL command that could not be converted (None if the whole
+conversion failed, such as when replaying it), and why
+"""
+
+Conversion = namedtuple('Conversion', 'code errors')
+"""
+the module generated from the cURL commands that could be converted
+(None if none could), and the errors of the ones that could not
+"""
+
+
+class _NotStoredPolicy(DefaultCookiePolicy):
+    """
+    Cookies set by responses are not kept, the ones a request is sent
+    with still are
+    """
+
+    def set_ok(self, cookie, request) -> bool:
+        return False
+
+
+class Converter:
+    """
+    Converts text with cURL commands to modules. Its configuration cannot
+    change, its format cache is locked and replays run on one event loop
+    thread with one client, so a converter can be shared by threads.
+    Errors are returned with the conversion, nothing is printed.
+    """
+
+    def __init__(
+        self,
+        config: Optional[ConverterConfig] = None,
+        cache: Optional[FormatCache] = None,
+    ):
+        self._config = config or ConverterConfig()
+        self._cache = cache if cache is not None else FormatCache()
+        # guards starting and stopping the event loop thread
+        self._lock = threading.Lock()
+        self._loop: Optional[EventLoopThread] = None
+        self._client = None
+
+    @property
+    def config(self) -> ConverterConfig:
+        return self._config
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def parse(
+        self, text: str
+    ) -> tuple[list[_RequestifyObject], list[ConversionError]]:
+        """
+        The requests of the cURL commands in text that could be parsed,
+        with unique function names, and errors for the ones that could not
+        """
+        requests = []
+        errors = []
+        function_names = _RequestifyList()
+        for curl in iter_curls(text.splitlines(keepends=True)):
+            try:
+                request = _RequestifyObject(curl)
+            except (AssertionError, ValueError) as error:
+                errors.append(
+                    ConversionError(
+                        curl.strip(), type(error).__name__, str(error)
+                    )
+                )
+                continue
+            function_names._set_function_name(request)
+            requests.append(request)
+        return requests, errors
+
+    def convert(self, text: str) -> Conversion:
+        from .output import generate_module, iter_module_chunks
+
+        config = self._config
+        requests, errors = self.parse(text)
+        if not requests:
+            return Conversion(None, errors)
+
+        if config.replace and len(requests) > 1:
+            client = self._get_client()
+            try:
+                workflow = self._loop.run(
+                    _ReplaceRequestify.acreate(
+                        *(request._base_string for request in requests),
+                        client=client,
+                    )
+                )
+            # InvalidURL and errors decoding the responses (ValueError) are
+            # not HTTPErrors, and are returned like them
+            except Exception as error:
+                errors.append(
+                    ConversionError(None, type(error).__name__, str(error))
+                )
+                return Conversion(None, errors)
+            code = generate_module(
+                workflow,
+                config.with_headers,
+                config.with_cookies,
+                cache=self._cache,
+                use_ast=config.use_ast,
+            )
+            return Conversion(code, errors)
+
+        chunks = iter_module_chunks(
+            requests,
+            config.with_headers,
+            config.with_cookies,
+            cache=self._cache,
+            use_ast=config.use_ast,
+        )
+        return Conversion(join_chunks(chunks), errors)
+
+    def _get_client(self):
+        # created once, so replays from every thread share its connections
+        with self._lock:
+            if self._client is None:
+                import httpx
+
+                self._loop = EventLoopThread()
+                # conversions share it, so none may send on the cookies the
+                # responses of another one set
+                self._client = httpx.AsyncClient(
+                    cookies=CookieJar(_NotStoredPolicy())
+                )
+            return self._client
+
+    def close(self) -> None:
+        with self._lock:
+            if self._loop is not None:
+                self._loop.run(self._client.aclose())
+                self._loop.close()
+                self._loop = self._client = None
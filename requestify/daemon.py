@@ -0,0 +1,135 @@
+from __future__ import annotations
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+from typing import Any, Awaitable, Callable, Optional, TextIO, TypeVar
+
+T = TypeVar('T')
+
+# runs the command line arguments of a job, writing its output to the file
+Job = Callable[[list[str], TextIO], None]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        response = self.server.run(request['argv'], request.get('cwd'))
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class Daemon(socketserver.UnixStreamServer):
+    """
+    Runs the jobs sent to a unix socket one at a time, in one process
+    that stays up, so they share its imports, caches and connections
+    """
+
+    def __init__(self, path: str, job: Job):
+        self.job = job
+        if os.path.exists(path):
+            assert not _is_listening(path), f'A daemon is serving on {path}'
+            # left behind by a daemon that was killed
+            os.unlink(path)
+        super().__init__(path, _Handler)
+
+    def run(self, argv: list[str], cwd: Optional[str] = None) -> dict:
+        """
+        Runs a job from the client's directory, with what it prints
+        and its exit status sent back to the client
+        """
+        stdout, stderr = io.StringIO(), io.StringIO()
+        status = 0
+        previous_cwd = os.getcwd()
+        try:
+            if cwd:
+                os.chdir(cwd)
+            with contextlib.redirect_stdout(stdout):
+                with contextlib.redirect_stderr(stderr):
+                    self.job(argv, stdout)
+        # argparse exits on --help and on bad arguments
+        except SystemExit as error:
+            status = error.code if isinstance(error.code, int) else 1
+        except Exception:
+            stderr.write(traceback.format_exc())
+            status = 1
+        finally:
+            os.chdir(previous_cwd)
+        return {
+            'stdout': stdout.getvalue(),
+            'stderr': stderr.getvalue(),
+            'status': status,
+        }
+
+    def server_close(self) -> None:
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.server_address)
+
+
+def _is_listening(path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+        return True
+
+
+class EventLoopThread:
+    """
+    An event loop running in a background thread, so the replays of
+    different jobs can share a client and its connection pool
+    """
+
+    def __init__(self):
+        import asyncio
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, daemon=True
+        )
+        self._thread.start()
+
+    def run(self, coroutine: Awaitable[T]) -> T:
+        import asyncio
+
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def close(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def send_job(path: str, argv: list[str], cwd: Optional[str] = None) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        request = {'argv': argv, 'cwd': cwd or os.getcwd()}
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as response:
+            return json.loads(response.readline())
+
+
+# Only imports the standard library, so forwarding a job costs little
+# more than starting the interpreter
+def main(argv: Optional[list[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        sys.stderr.write(
+            'usage: python -m requestify.daemon socket [arguments]\n'
+        )
+        return 2
+    path, *job = argv
+    response: dict[str, Any] = send_job(path, job)
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    return response['status']
+
+
+if __name__ == '__main__':
+    sys.exit(main())
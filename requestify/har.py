@@ -0,0 +1,284 @@
+from __future__ import annotations
+import asyncio
+import json
+import shlex
+import sys
+from collections import namedtuple
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, Optional, TextIO
+from urllib.parse import urlencode
+import httpx
+from .models import _RequestifyObject, _RequestifyList
+from .bench import prepare
+from .load import LoadResult, areplay_schedule
+
+HarEntry = namedtuple('HarEntry', 'offset request')
+"""
+request of a HAR capture, sent offset seconds after the first one
+"""
+
+# set by the client for every request, from the url and body
+SKIPPED_HEADERS = ('content-length', 'host')
+
+
+# read at least this many characters at once while streaming a capture
+HAR_READ_SIZE = 1 << 16
+
+
+class _JsonStream:
+    """
+    Decodes the values of a JSON document one at a time, reading the
+    file as they are needed, so only the value being decoded is in memory
+    """
+
+    def __init__(self, in_file: TextIO):
+        self._file = in_file
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._position = 0
+
+    def _read(self) -> bool:
+        # read as much as is buffered, so decoding a big value that keeps
+        # failing as incomplete is retried a logarithmic number of times
+        text = self._file.read(max(HAR_READ_SIZE, len(self._buffer)))
+        if not text:
+            return False
+        self._buffer = self._buffer[self._position :] + text
+        self._position = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self._position < len(self._buffer):
+                if not self._buffer[self._position].isspace():
+                    return self._buffer[self._position]
+                self._position += 1
+            if not self._read():
+                return ''
+
+    def expect(self, character: str) -> None:
+        if self.peek() != character:
+            raise ValueError(
+                f'Expected {character!r} in the HAR capture, '
+                f'found {self.peek()!r}'
+            )
+        self._position += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(
+                    self._buffer, self._position
+                )
+            except json.JSONDecodeError:
+                # incomplete until the whole file has been read
+                if self._read():
+                    continue
+                raise
+            # a number may go on in the part of the file not read yet
+            if end == len(self._buffer) and self._read():
+                continue
+            self._position = end
+            return value
+
+    def items(self) -> Iterator[str]:
+        """
+        Keys of the object starting here, each value must be read
+        (value, or items/elements for containers) before the next key
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self._position += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self._position += 1
+                continue
+            self.expect('}')
+            return
+
+    def elements(self) -> Iterator[Any]:
+        self.expect('[')
+        if self.peek() == ']':
+            self._position += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self._position += 1
+                continue
+            self.expect(']')
+            return
+
+
+def iter_har_entries(filename: str) -> Iterator[dict[str, Any]]:
+    """
+    The entries of a HAR capture, read one at a time instead of
+    loading the whole capture (response bodies included) at once
+    """
+    with open(filename, mode='r', encoding='utf8') as in_file:
+        stream = _JsonStream(in_file)
+        for key in stream.items():
+            if key != 'log':
+                stream.value()
+                continue
+            for log_key in stream.items():
+                if log_key == 'entries':
+                    yield from stream.elements()
+                else:
+                    stream.value()
+
+
+def _get_body(entry: dict[str, Any]) -> Optional[str]:
+    post_data = entry['request'].get('postData') or {}
+    if post_data.get('text'):
+        return post_data['text']
+    if post_data.get('params'):
+        return urlencode(
+            [
+                (param['name'], param.get('value', ''))
+                for param in post_data['params']
+            ]
+        )
+    return None
+
+
+def _get_headers(entry: dict[str, Any]) -> list[tuple[str, str]]:
+    return [
+        (header['name'], header['value'])
+        for header in entry['request'].get('headers', [])
+        # http/2 pseudo headers (:authority, :path, ...) are not real headers
+        if not header['name'].startswith(':')
+        and header['name'].lower() not in SKIPPED_HEADERS
+    ]
+
+
+def har_entry_to_curl(entry: dict[str, Any]) -> str:
+    request = entry['request']
+    parts = [
+        'curl',
+        '-X',
+        request['method'].upper(),
+        shlex.quote(request['url']),
+    ]
+    for name, value in _get_headers(entry):
+        parts += ['-H', shlex.quote(f'{name}: {value}')]
+    body = _get_body(entry)
+    if body:
+        # sent as is, whatever its content type
+        parts += ['--data-binary', shlex.quote(body)]
+    return ' '.join(parts)
+
+
+def iter_har_curls(entries: Iterable[dict[str, Any]]) -> Iterator[str]:
+    for entry in entries:
+        yield har_entry_to_curl(entry)
+
+
+def har_entry_to_request(entry: dict[str, Any]) -> _RequestifyObject:
+    """
+    Built from the parts of the entry, so its url and body are
+    exactly as captured, whatever the cURL parser would make of them
+    """
+    request = entry['request']
+    body = _get_body(entry)
+    return _RequestifyObject._from_parts(
+        har_entry_to_curl(entry),
+        request['method'],
+        request['url'],
+        [f'{name}: {value}' for name, value in _get_headers(entry)],
+        body.encode('utf-8') if body else {},
+    )
+
+
+def _report(index: int, error: Exception) -> None:
+    sys.stderr.write(
+        f'Skipped HAR entry {index}: {type(error).__name__}: {error}\n'
+    )
+
+
+def _iter_valid_entries(
+    entries: Iterable[dict[str, Any]],
+    report: Callable[[int, Exception], None],
+) -> Iterator[tuple[int, dict[str, Any], _RequestifyObject]]:
+    for index, entry in enumerate(entries):
+        try:
+            request = har_entry_to_request(entry)
+        except (KeyError, TypeError, ValueError, AttributeError) as error:
+            report(index, error)
+        else:
+            yield index, entry, request
+
+
+# Like iter_requestify, for the requests of a capture
+def iter_har_requests(
+    entries: Iterable[dict[str, Any]],
+    report: Callable[[int, Exception], None] = _report,
+) -> Iterator[_RequestifyObject]:
+    """
+    Entries that are not valid requests are passed to report,
+    with their index, and skipped
+    """
+    function_names = _RequestifyList()
+    for _, _, request in _iter_valid_entries(entries, report):
+        function_names._set_function_name(request)
+        yield request
+
+
+def _parse_time(started: str) -> datetime:
+    # fromisoformat only understands a trailing Z from python 3.11
+    return datetime.fromisoformat(started.replace('Z', '+00:00'))
+
+
+def get_har_entries(
+    entries: Iterable[dict[str, Any]],
+    report: Callable[[int, Exception], None] = _report,
+) -> list[HarEntry]:
+    """
+    The requests of the capture, in the order they were sent,
+    with their url and body exactly as captured. Entries that are not
+    valid requests are passed to report, with their index, and skipped
+    """
+    started = []
+    for index, entry, request in _iter_valid_entries(entries, report):
+        try:
+            started.append((_parse_time(entry['startedDateTime']), request))
+        except (KeyError, TypeError, ValueError) as error:
+            report(index, error)
+    if not started:
+        return []
+
+    started.sort(key=lambda item: item[0])
+    first = started[0][0]
+    return [
+        HarEntry((time - first).total_seconds(), request)
+        for time, request in started
+    ]
+
+
+async def areplay_har(
+    entries: Iterable[HarEntry],
+    speed=1.0,
+    client: Optional[httpx.AsyncClient] = None,
+) -> LoadResult:
+    """
+    Sends every request at its original offset divided by speed, so
+    requests that overlapped in the capture overlap in the replay
+    """
+    assert speed > 0, 'Speed must be positive'
+    schedule = (
+        (entry.offset / speed, prepare(entry.request)) for entry in entries
+    )
+    return await areplay_schedule(schedule, client)
+
+
+def replay_har(
+    entries: Iterable[HarEntry],
+    speed=1.0,
+    client: Optional[httpx.AsyncClient] = None,
+) -> LoadResult:
+    return asyncio.run(areplay_har(entries, speed, client))
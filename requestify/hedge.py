@@ -0,0 +1,139 @@
+from __future__ import annotations
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+from urllib.parse import urlsplit
+from .constants import IDEMPOTENT_METHODS, PATH_ID_REGEX
+from .stats import Histogram
+
+T = TypeVar('T')
+
+
+def get_endpoint(method: str, url: str) -> str:
+    """
+    What latencies are grouped by: the method, host and path template,
+    so requests for different resources (/users/1, /users/2) share them
+    """
+    parts = urlsplit(str(url))
+    path = '/'.join(
+        '{}' if PATH_ID_REGEX.match(segment) else segment
+        for segment in parts.path.split('/')
+    )
+    return f'{method.upper()} {parts.netloc}{path}'
+
+
+class HedgePolicy:
+    """
+    Sends a second copy of an idempotent request that has taken longer
+    than `percentile` of the latencies seen for its endpoint, and uses
+    whichever copy answers first. Hedges are kept under `budget`, a
+    fraction of all the requests sent. Endpoints with fewer than
+    `min_samples` latencies are hedged after `delay` seconds if it is
+    given, and not at all otherwise.
+    """
+
+    def __init__(
+        self,
+        percentile=95.0,
+        budget=0.05,
+        min_samples=20,
+        delay: Optional[float] = None,
+    ):
+        assert 0 < percentile < 100, 'The percentile must be below 100'
+        assert 0 <= budget <= 1, 'The budget must be between 0 and 1'
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.delay = delay
+        # endpoint -> latencies (in microseconds) of its answered requests
+        self.latencies: dict[str, Histogram] = {}
+        self.requests = 0
+        self.hedged = 0
+        self.won = 0
+
+    def get_delay(self, endpoint: str, method: str) -> Optional[float]:
+        """
+        Seconds to wait for an answer before hedging,
+        None if the request must not be hedged
+        """
+        if method.upper() not in IDEMPOTENT_METHODS:
+            return None
+        latencies = self.latencies.get(endpoint)
+        if latencies is None or latencies.count < self.min_samples:
+            return self.delay
+        return latencies.percentile(self.percentile) / 1e6
+
+    def _within_budget(self) -> bool:
+        return self.hedged < self.budget * self.requests
+
+    def record(self, endpoint: str, latency: int) -> None:
+        if endpoint not in self.latencies:
+            self.latencies[endpoint] = Histogram()
+        self.latencies[endpoint].record(latency)
+
+    async def request(
+        self,
+        endpoint: str,
+        method: str,
+        send: Callable[[], Awaitable[T]],
+    ) -> T:
+        """
+        Awaits send(), calling it a second time if the first call is slow,
+        and returns the first result. The other call is cancelled.
+        """
+        self.requests += 1
+        start = time.perf_counter_ns()
+        delay = self.get_delay(endpoint, method)
+        primary = asyncio.ensure_future(send())
+        tasks = {primary}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self._within_budget():
+                    self.hedged += 1
+                    tasks.add(asyncio.ensure_future(send()))
+            while True:
+                done, tasks = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                # a failed copy only counts if the other cannot answer
+                answered = [task for task in done if task.exception() is None]
+                if answered or not tasks:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            # waited for, so a cancelled copy is closed before returning
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if not answered:
+            return primary.result()
+        winner = primary if primary in answered else answered[0]
+        if winner is not primary:
+            self.won += 1
+        self.record(endpoint, (time.perf_counter_ns() - start) // 1000)
+        return winner.result()
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.requests if self.requests else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        return self.won / self.hedged if self.hedged else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'hedged': self.hedged,
+            'won': self.won,
+            'hedge_rate': self.hedge_rate,
+            'win_rate': self.win_rate,
+        }
+
+    def format_summary(self) -> str:
+        return (
+            f'hedged {self.hedged} of {self.requests} requests '
+            f'({self.hedge_rate:.1%}), {self.won} hedges won '
+            f'({self.win_rate:.1%})'
+        )
@@ -0,0 +1,173 @@
+from __future__ import annotations
+import asyncio
+import math
+import random
+import time
+from collections import namedtuple
+from typing import Any, Iterable, Iterator, Optional, Sequence
+import httpx
+from .models import _RequestifyObject, _RequestifyList
+from .stats import Histogram
+from .bench import BenchResult, PreparedRequest, prepare, timed_request
+
+Stage = namedtuple('Stage', 'duration start_rate end_rate')
+"""
+duration in seconds, during which the arrival rate (requests per second)
+goes linearly from start_rate to end_rate
+"""
+
+
+def get_stages(rate: float, duration: float, ramp_up=0.0) -> list[Stage]:
+    """
+    A ramp from 0 to rate over ramp_up seconds,
+    then rate for the rest of duration
+    """
+    assert rate > 0 and duration > 0, 'Rate and duration must be positive'
+    assert 0 <= ramp_up <= duration, 'The ramp up must fit in the duration'
+    stages = [Stage(ramp_up, 0, rate)] if ramp_up else []
+    if duration > ramp_up:
+        stages.append(Stage(duration - ramp_up, rate, rate))
+    return stages
+
+
+def iter_schedule(stages: Iterable[Stage]) -> Iterator[float]:
+    """
+    Seconds from the start at which every request should be sent.
+    The k-th request is sent when k requests are due, that is when the
+    integral of the rate reaches k, whatever happens to earlier requests.
+    """
+    stage_start = 0.0
+    due_at_stage_start = 0.0
+    arrival = 0
+    for stage in stages:
+        # requests due t seconds into the stage: due + b * t + a * t ** 2
+        a = (stage.end_rate - stage.start_rate) / (2 * stage.duration)
+        b = stage.start_rate
+        while True:
+            missing = arrival - due_at_stage_start
+            discriminant = b * b + 4 * a * missing
+            if missing > 0 and (
+                discriminant < 0 or b + math.sqrt(discriminant) <= 0
+            ):
+                break
+            # the smallest root, written to stay accurate when a is ~0
+            offset = (
+                2 * missing / (b + math.sqrt(discriminant))
+                if missing > 0
+                else 0.0
+            )
+            if offset >= stage.duration:
+                break
+            yield stage_start + offset
+            arrival += 1
+        stage_start += stage.duration
+        due_at_stage_start += b * stage.duration + a * stage.duration**2
+
+
+class LoadResult(BenchResult):
+    """
+    BenchResult of an open-loop run, which also records how late
+    every request was actually sent compared to its schedule
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.send_lag = Histogram()
+
+    def merge(self, other: BenchResult) -> None:
+        super().merge(other)
+        if isinstance(other, LoadResult):
+            self.send_lag.merge(other.send_lag)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**super().to_dict(), 'send_lag': self.send_lag.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> LoadResult:
+        result = cls(BenchResult.from_dict(data).requests, data['elapsed'])
+        result.send_lag = Histogram.from_dict(data['send_lag'])
+        return result
+
+    def format_table(self) -> str:
+        return (
+            super().format_table()
+            + f'\nsend lag p99 {self.send_lag.percentile(99) / 1000:.2f} ms,'
+            f' max {(self.send_lag.max or 0) / 1000:.2f} ms'
+        )
+
+
+async def areplay_schedule(
+    schedule: Iterable[tuple[float, PreparedRequest]],
+    client: Optional[httpx.AsyncClient] = None,
+) -> LoadResult:
+    """
+    Sends every request at its offset (in seconds from the start), without
+    waiting for earlier ones to finish. Latency is measured from when every
+    request should have been sent, so a slow server cannot hide the time
+    requests spent queued behind it.
+    """
+    result = LoadResult()
+    tasks = set()
+
+    async def send(client: httpx.AsyncClient, request, intended_start: int):
+        result.send_lag.record(
+            (time.perf_counter_ns() - intended_start) // 1000
+        )
+        result.record(await timed_request(client, request, intended_start))
+
+    async def run(client: httpx.AsyncClient):
+        start = time.perf_counter_ns()
+        for offset, request in schedule:
+            intended_start = start + int(offset * 1e9)
+            delay = (intended_start - time.perf_counter_ns()) / 1e9
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(send(client, request, intended_start))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+        result.elapsed = (time.perf_counter_ns() - start) / 1e9
+
+    if client is not None:
+        await run(client)
+    else:
+        # open-loop runs can have many requests in flight
+        limits = httpx.Limits(max_connections=1000)
+        async with httpx.AsyncClient(limits=limits) as client:
+            await run(client)
+    return result
+
+
+async def aload(
+    requests: _RequestifyList | Iterable[_RequestifyObject],
+    stages: Sequence[Stage],
+    weights: Optional[Sequence[float]] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    seed: Optional[int] = None,
+) -> LoadResult:
+    """
+    Sends requests at the rates of the stages, picking each one from
+    requests (by weights, if given)
+    """
+    prepared = [prepare(request) for request in requests]
+    assert prepared, 'There must be at least one request'
+    assert weights is None or len(weights) == len(
+        prepared
+    ), 'There must be one weight per request'
+    choose = random.Random(seed).choices
+    schedule = (
+        (offset, choose(prepared, weights)[0])
+        for offset in iter_schedule(stages)
+    )
+    return await areplay_schedule(schedule, client)
+
+
+def load(
+    requests: _RequestifyList | Iterable[_RequestifyObject],
+    stages: Sequence[Stage],
+    weights: Optional[Sequence[float]] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    seed: Optional[int] = None,
+) -> LoadResult:
+    return asyncio.run(aload(requests, stages, weights, client, seed))
@@ -1,5 +1,8 @@
+from __future__ import annotations
 import re
-from typing import Any, Optional
+import json
+import hashlib
+from typing import Any, TYPE_CHECKING, Optional, Iterable, Iterator
 from collections import defaultdict
 from .utils import (
     pairwise,
@@ -13,9 +16,17 @@ from .utils import (
     get_scheme,
     get_url_path,
     get_responses,
+    aget_responses,
     path_location_to_int,
+    CodeExpression,
 )
 from .constants import DATA_HANDLER, REQUEST_MATCHING_DATA_DICT_NAME, URL_REGEX
+from .profiling import timed
+
+if TYPE_CHECKING:
+    import httpx
+    from .hedge import HedgePolicy
+    from .network import NetworkMetrics
 
 
 class _RequestifyObject:
@@ -49,7 +60,7 @@ class _RequestifyObject:
         return NotImplemented
 
     def __init__(self, base_string: str):
-        self._base_string = ' '.join(base_string.replace('\\', '').split())
+        self._base_string = self._normalize(base_string)
         self._url = ''
         self._method = 'get'
         self._headers: dict[str, Any] = {}
@@ -59,6 +70,51 @@ class _RequestifyObject:
         self._function_name = ''
         self._generate()
 
+    @classmethod
+    def _from_parts(
+        cls,
+        base_string: str,
+        method: str,
+        url: str,
+        headers: list[str],
+        data: Any,
+    ) -> _RequestifyObject:
+        """
+        A request captured some other way (a HAR entry) that is already
+        split into its parts, so nothing has to be found in base_string
+        """
+        request = cls.__new__(cls)
+        request._function_name = ''
+        request._base_string = cls._normalize(base_string)
+        request._url = url
+        request._method = method.lower()
+        request._headers = {}
+        request._cookies = {}
+        request._data = data
+        request._set_headers(headers)
+        request._set_function_name()
+        return request
+
+    @staticmethod
+    def _normalize(base_string: str) -> str:
+        return ' '.join(base_string.replace('\\', '').split())
+
+    # requests with the same fingerprint send the same thing,
+    # whatever the order of their headers and cookies
+    def _fingerprint(self) -> str:
+        canonical = json.dumps(
+            [
+                self._method,
+                str(self._url),
+                sorted(self._headers.items()),
+                sorted(self._cookies.items()),
+                self._data,
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
     def _generate(self) -> None:
         meta = self._base_string.split(' ', 2)
         assert len(meta) > 1, 'No URL provided'
@@ -73,7 +129,9 @@ class _RequestifyObject:
         self._set_function_name()
 
     def _initialize_curl_and_url_only(self, url: str) -> None:
-        if re.search(URL_REGEX, url):
+        with timed('parse_url', self):
+            found = re.search(URL_REGEX, url)
+        if found:
             self._url = url
             self._method = 'get'
         else:
@@ -85,7 +143,8 @@ class _RequestifyObject:
         self._set_opts(meta)
 
     def _set_url(self, meta: str) -> None:
-        self._url = format_url(find_url_or_error(meta))
+        with timed('parse_url', self):
+            self._url = format_url(find_url_or_error(meta))
 
     def _set_method(self, meta: str) -> None:
         found = find_method(meta)
@@ -110,23 +169,24 @@ class _RequestifyObject:
         self._set_headers(headers)
 
     def _set_body(self, opts: list[tuple[str, str]]) -> None:
-        for option in opts:
-            for flag, value in pairwise(option):
-                if flag in DATA_HANDLER:
-                    self._data = DATA_HANDLER[flag](value)
+        with timed('decode_body', self):
+            for option in opts:
+                for flag, value in pairwise(option):
+                    if flag in DATA_HANDLER:
+                        self._data = DATA_HANDLER[flag](value)
 
     def _set_headers(self, headers: list[str]) -> None:
-        header = None
-        try:
-            for header in headers:
+        for header in headers:
+            try:
                 k, v = header.split(': ', 1)
                 if k.lower() == 'cookie':
                     self._set_cookie(v)
                 else:
                     self._headers[k] = v
-        except ValueError:
-            print(f'invalid data: {header}')
-            raise
+            # raised with the header instead of printing it, so callers
+            # (possibly on other threads) can report it themselves
+            except ValueError as error:
+                raise ValueError(f'Invalid header: {header}') from error
 
     def _set_cookie(self, text: str) -> None:
         try:
@@ -169,11 +229,18 @@ class _RequestifyObject:
 
 
 class _RequestifyList(object):
-    def __init__(self, *curls: str):
-        self._base_list = curls
+    def __init__(self, *curls: str, deduplicate=False):
+        self._base_list = list(curls)
         self._requests: list[_RequestifyObject] = []
+        # index in _requests of the request sent at every original position
+        self._positions: list[int] = []
         self._existing_function_names = defaultdict(int)
-        self._generate()
+        self._deduplicate = deduplicate
+        # normalized cURL / fingerprint -> index in _requests, kept so
+        # requests added later are deduplicated against earlier ones
+        self._seen_curls: dict[str, int] = {}
+        self._seen_fingerprints: dict[str, int] = {}
+        self._generate(deduplicate)
 
     def __len__(self):
         return len(self._requests)
@@ -191,58 +258,326 @@ class _RequestifyList(object):
     def __repr__(self):
         return f'RequestifyList{[request.__repr__() for request in self._requests]}'
 
-    def _generate(self) -> None:
-        for curl in self._base_list:
-            request = _RequestifyObject(curl)
-            self._requests.append(request)
+    def _generate(self, deduplicate=False) -> None:
+        self._add(self._base_list, deduplicate)
+
+    def _add(
+        self, curls: Iterable[str], deduplicate=False
+    ) -> list[_RequestifyObject]:
+        """
+        Parses the cURLs after the requests already in the list,
+        returning the requests that were not duplicates
+        """
+        start = len(self._requests)
+        if deduplicate:
+            self._add_deduplicated(curls)
+        else:
+            for curl in curls:
+                request = _RequestifyObject(curl)
+                self._positions.append(len(self._requests))
+                self._requests.append(request)
+
+        added = self._requests[start:]
+        for request in added:
+            self._set_function_name(request)
+        return added
+
+    def _add_deduplicated(self, curls: Iterable[str]) -> None:
+        # copies of the same cURL are not parsed again,
+        # reordered headers and cookies are caught by the fingerprint
+        for curl in curls:
+            normalized = _RequestifyObject._normalize(curl)
+            if normalized not in self._seen_curls:
+                request = _RequestifyObject(curl)
+                fingerprint = request._fingerprint()
+                if fingerprint not in self._seen_fingerprints:
+                    self._seen_fingerprints[fingerprint] = len(self._requests)
+                    self._requests.append(request)
+                self._seen_curls[normalized] = self._seen_fingerprints[
+                    fingerprint
+                ]
+            self._positions.append(self._seen_curls[normalized])
+
+    def append(self, curl: str) -> Optional[_RequestifyObject]:
+        """
+        Adds a cURL after the others, returning its request
+        (None if it duplicates one already in a deduplicated list)
+        """
+        added = self.extend([curl])
+        return added[0] if added else None
+
+    def extend(self, curls: Iterable[str]) -> list[_RequestifyObject]:
+        """
+        Adds cURLs after the others, naming them as if they had been
+        passed to the constructor, without going over the earlier ones
+        """
+        curls = list(curls)
+        self._base_list.extend(curls)
+        return self._add(curls, self._deduplicate)
+
+    def _get_occurrences(self) -> dict[str, list[int]]:
+        """
+        Function name -> original positions of the request
+        """
+        occurrences = {
+            request._function_name: [] for request in self._requests
+        }
+        for position, index in enumerate(self._positions):
+            occurrences[self._requests[index]._function_name].append(position)
+        return occurrences
+
+    def _get_replay_order(self) -> list[_RequestifyObject]:
+        """
+        The requests in the order they were originally sent, duplicates included
+        """
+        return [self._requests[index] for index in self._positions]
+
+    def _set_function_name(self, request: _RequestifyObject) -> None:
+        base_function_name = request._function_name
+        function_count = self._existing_function_names[base_function_name]
+        function_name = f"{base_function_name}{('_' + str(function_count) if function_count else '')}"
+        request._function_name = (
+            function_name if function_name else base_function_name
+        )
+        self._existing_function_names[base_function_name] += 1
 
-        self._set_function_names()
 
-    def _set_function_names(self) -> None:
-        for request in self._requests:
-            base_function_name = request._function_name
-            function_count = self._existing_function_names[base_function_name]
-            function_name = f"{base_function_name}{('_' + str(function_count) if function_count else '')}"
-            request._function_name = (
-                function_name if function_name else base_function_name
-            )
-            self._existing_function_names[base_function_name] += 1
+# Parses cURLs one at a time, giving them the same unique function names
+# _RequestifyList would, without keeping the parsed requests around
+def iter_requestify(curls: Iterable[str]) -> Iterator[_RequestifyObject]:
+    function_names = _RequestifyList()
+    for curl in curls:
+        request = _RequestifyObject(curl)
+        function_names._set_function_name(request)
+        yield request
+
+
+# a request and what its response returned
+SavedResponse = tuple[_RequestifyObject, Any]
 
 
 class _ReplaceRequestify:
-    def __init__(self, *curls):
-        self._requests = _RequestifyList(*curls)
+    def __init__(
+        self,
+        *curls,
+        deduplicate=False,
+        processes=None,
+        hedge=None,
+        responses=None,
+        metrics=None,
+    ):
+        self._setup(curls, deduplicate, processes, hedge, responses, metrics)
+        self._map_requests_to_responses()
+        self._initialize_matching_data()
+
+    @classmethod
+    async def acreate(
+        cls,
+        *curls,
+        deduplicate=False,
+        hedge=None,
+        responses=None,
+        client: Optional[httpx.AsyncClient] = None,
+        metrics=None,
+    ) -> _ReplaceRequestify:
+        """
+        Builds the workflow from inside a running event loop, fetching the
+        responses on that loop and on client, if one is given
+        """
+        self = cls.__new__(cls)
+        self._setup(curls, deduplicate, None, hedge, responses, metrics)
+        assert len(self._requests) > 0, 'There must be at least one request'
+        await self._afetch(list(self._requests), client)
+        self._initialize_matching_data()
+        return self
+
+    def _setup(
+        self,
+        curls: Iterable[str],
+        deduplicate: bool,
+        processes: Optional[int],
+        hedge: Optional[HedgePolicy],
+        responses: Optional[dict[str, Any]],
+        metrics: Optional[NetworkMetrics],
+    ) -> None:
+        # duplicates would only be fetched again
+        self._requests = _RequestifyList(*curls, deduplicate=deduplicate)
+        # fetch the responses from this many processes
+        self._processes = processes
+        # HedgePolicy to resend slow idempotent requests with, if any
+        self._hedge = hedge
+        # responses fetched before, by request fingerprint, which are
+        # reused instead of fetched again (new ones are added to it)
+        self._responses = responses
+        # NetworkMetrics the requests are traced into, if any
+        self._metrics = metrics
 
         # requests and data they produced
         self._requests_and_their_responses: dict[
             _RequestifyObject, dict[str, Any] | list[dict[str, Any]]
         ] = {}
-        self._map_requests_to_responses()
-        self._initialize_matching_data()
+        # function name -> function names whose responses it reads from
+        self._dependencies: dict[str, list[str]] = {}
 
     def _map_requests_to_responses(self) -> None:
         assert len(self._requests) > 0, 'There must be at least one request'
-        responses = get_responses(self._requests)
-        for request, response in zip(self._requests, responses):
-            self._requests_and_their_responses[request] = response
+        self._fetch(list(self._requests))
+
+    def _fetch(self, requests: list[_RequestifyObject]) -> None:
+        missing = self._get_missing(requests)
+        responses = (
+            get_responses(missing, self._processes, self._hedge, self._metrics)
+            if missing
+            else []
+        )
+        self._save_responses(requests, missing, responses)
+
+    async def _afetch(
+        self,
+        requests: list[_RequestifyObject],
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> None:
+        missing = self._get_missing(requests)
+        responses = (
+            await aget_responses(missing, self._hedge, client, self._metrics)
+            if missing
+            else []
+        )
+        self._save_responses(requests, missing, responses)
+
+    def _get_missing(
+        self, requests: list[_RequestifyObject]
+    ) -> list[_RequestifyObject]:
+        if self._responses is None:
+            return requests
+        return [
+            request
+            for request in requests
+            if request._fingerprint() not in self._responses
+        ]
+
+    def _save_responses(
+        self,
+        requests: list[_RequestifyObject],
+        missing: list[_RequestifyObject],
+        responses: list[Any],
+    ) -> None:
+        if self._responses is None:
+            for request, response in zip(requests, responses):
+                self._requests_and_their_responses[request] = response
+            return
+
+        for request, response in zip(missing, responses):
+            self._responses[request._fingerprint()] = response
+        for request in requests:
+            self._requests_and_their_responses[request] = self._responses[
+                request._fingerprint()
+            ]
 
     def _initialize_matching_data(self) -> None:
+        for current_request in self._requests:
+            self._dependencies[current_request._function_name] = []
         for current_request in self._requests:
             self._match_everything(current_request)
 
-    def _match_everything(self, current_request: _RequestifyObject):
-        self._match_data(current_request)
-        self._match_headers(current_request)
-        self._match_url(current_request)
+    def append(self, curl: str) -> Optional[_RequestifyObject]:
+        added = self.extend([curl])
+        return added[0] if added else None
+
+    def extend(self, curls: Iterable[str]) -> list[_RequestifyObject]:
+        """
+        Adds cURLs to the workflow, fetching only their responses. The new
+        requests are matched against every response, and the earlier ones
+        only against the new responses, as nothing else changed for them.
+        """
+        earlier = list(self._requests)
+        added = self._requests.extend(curls)
+        if added:
+            self._fetch(added)
+            self._match_added(earlier, added)
+        return added
+
+    async def aappend(
+        self, curl: str, client: Optional[httpx.AsyncClient] = None
+    ) -> Optional[_RequestifyObject]:
+        added = await self.aextend([curl], client)
+        return added[0] if added else None
+
+    async def aextend(
+        self,
+        curls: Iterable[str],
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> list[_RequestifyObject]:
+        earlier = list(self._requests)
+        added = self._requests.extend(curls)
+        if added:
+            await self._afetch(added, client)
+            self._match_added(earlier, added)
+        return added
+
+    def _match_added(
+        self,
+        earlier: list[_RequestifyObject],
+        added: list[_RequestifyObject],
+    ) -> None:
+        for request in added:
+            self._dependencies[request._function_name] = []
+        for request in added:
+            self._match_everything(request)
+        # by identity, as matching a url changes the request's hash
+        added_ids = {id(request) for request in added}
+        candidates = [
+            item
+            for item in self._requests_and_their_responses.items()
+            if id(item[0]) in added_ids
+        ]
+        for request in earlier:
+            self._match_everything(request, candidates)
+
+    def _add_dependency(
+        self,
+        current_request: _RequestifyObject,
+        matching_request: _RequestifyObject,
+    ) -> None:
+        dependencies = self._dependencies[current_request._function_name]
+        if matching_request._function_name not in dependencies:
+            dependencies.append(matching_request._function_name)
+
+    # candidates are the requests and responses searched for values,
+    # every other request's if they are not given
+    def _match_everything(
+        self,
+        current_request: _RequestifyObject,
+        candidates: Optional[list[SavedResponse]] = None,
+    ):
+        with timed('match', current_request):
+            self._match_data(current_request, candidates)
+            self._match_headers(current_request, candidates)
+            self._match_url(current_request, candidates)
 
-    def _match_data(self, current_request: _RequestifyObject):
-        self._match(current_request, current_request._data)
+    def _match_data(
+        self,
+        current_request: _RequestifyObject,
+        candidates: Optional[list[SavedResponse]] = None,
+    ):
+        self._match(current_request, current_request._data, candidates)
 
-    def _match_headers(self, current_request: _RequestifyObject):
-        self._match(current_request, current_request._headers)
+    def _match_headers(
+        self,
+        current_request: _RequestifyObject,
+        candidates: Optional[list[SavedResponse]] = None,
+    ):
+        self._match(current_request, current_request._headers, candidates)
 
-    def _match_url(self, current_request: _RequestifyObject):
+    def _match_url(
+        self,
+        current_request: _RequestifyObject,
+        candidates: Optional[list[SavedResponse]] = None,
+    ):
         current_url = current_request._url
+        # already reads from a response
+        if isinstance(current_url, CodeExpression):
+            return
         path = get_url_path(current_url)
         if path:
             got_matched = False
@@ -255,10 +590,10 @@ class _ReplaceRequestify:
             replaced_values = []
             for path_value in path_values:
                 matching_field, indices = self._get_matching_field_and_indices(
-                    current_request, path_value
+                    current_request, path_value, candidates
                 ) or (None, [])
                 matching_request = self._get_matching_request(
-                    current_request, path_value
+                    current_request, path_value, candidates
                 )
                 if matching_field and matching_request:
                     base_replacement_path_value = self._create_new_assignment(
@@ -270,6 +605,7 @@ class _ReplaceRequestify:
                         f'{{{base_replacement_path_value}}}'
                     )
                     replaced_values.append(replacement_path_value)
+                    self._add_dependency(current_request, matching_request)
                     got_matched = True
                 else:
                     replaced_values.append(path_value)
@@ -277,19 +613,22 @@ class _ReplaceRequestify:
             scheme = get_scheme(current_url)
             if got_matched:
                 url = "f'" + scheme + base + '/'.join(replaced_values) + "'"
-                current_request._url = url
+                current_request._url = CodeExpression(url)
 
     def _match(
         self,
         current_request: _RequestifyObject,
         replacement_dict: dict,
+        candidates: Optional[list[SavedResponse]] = None,
     ):
         for current_field, current_value in replacement_dict.items():
+            if isinstance(current_value, CodeExpression):
+                continue
             matching_field, indices = self._get_matching_field_and_indices(
-                current_request, current_value
+                current_request, current_value, candidates
             ) or (None, [])
             matching_request = self._get_matching_request(
-                current_request, current_value
+                current_request, current_value, candidates
             )
             if matching_field and matching_request:
                 replacement_dict[current_field] = self._create_new_assignment(
@@ -297,6 +636,7 @@ class _ReplaceRequestify:
                     matching_field,
                     indices,
                 )
+                self._add_dependency(current_request, matching_request)
 
     @staticmethod
     def _get_key_and_index_where_values_match(
@@ -321,13 +661,22 @@ class _ReplaceRequestify:
                     return (key, prev_indices)
         return None
 
+    def _get_saved_responses(
+        self, candidates: Optional[list[SavedResponse]] = None
+    ) -> Iterable[SavedResponse]:
+        if candidates is None:
+            return self._requests_and_their_responses.items()
+        return candidates
+
     def _get_matching_field_and_indices(
-        self, request: _RequestifyObject, value: Any
+        self,
+        request: _RequestifyObject,
+        value: Any,
+        candidates: Optional[list[SavedResponse]] = None,
     ) -> Optional[tuple[Any, list[int]]]:
-        for (
-            saved_request,
-            saved_response,
-        ) in self._requests_and_their_responses.items():
+        for saved_request, saved_response in self._get_saved_responses(
+            candidates
+        ):
             # do not match responses returned by the same request we are trying to find matches for
             if saved_request == request:
                 continue
@@ -341,11 +690,15 @@ class _ReplaceRequestify:
 
             return (field, indices)
 
-    def _get_matching_request(self, request: _RequestifyObject, value: Any):
-        for (
-            saved_request,
-            saved_response,
-        ) in self._requests_and_their_responses.items():
+    def _get_matching_request(
+        self,
+        request: _RequestifyObject,
+        value: Any,
+        candidates: Optional[list[SavedResponse]] = None,
+    ):
+        for saved_request, saved_response in self._get_saved_responses(
+            candidates
+        ):
             if saved_request == request:
                 continue
             if self._get_key_and_index_where_values_match(
@@ -362,4 +715,4 @@ class _ReplaceRequestify:
     ):
         indices_str = ''.join([f'[{index}]' for index in indices])
         new_assignment = f"self.{REQUEST_MATCHING_DATA_DICT_NAME}['{matching_request._function_name}']['{matching_field}']{indices_str}"
-        return new_assignment
+        return CodeExpression(new_assignment)
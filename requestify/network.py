@@ -0,0 +1,248 @@
+from __future__ import annotations
+import json
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable, Iterator
+from .constants import BENCH_TOTAL_NAME
+from .stats import Histogram
+
+if TYPE_CHECKING:
+    import httpx
+
+# connect includes resolving the host, which httpcore does inside it
+PHASES = ('connect', 'tls', 'ttfb', 'download')
+
+# phase -> trace events (without their connection/http11/http2 prefix)
+# it starts and ends with
+PHASE_EVENTS = {
+    'connect': ('connect_tcp.started', 'connect_tcp.complete'),
+    'tls': ('start_tls.started', 'start_tls.complete'),
+    'ttfb': (
+        'send_request_headers.started',
+        'receive_response_headers.complete',
+    ),
+    'download': (
+        'receive_response_body.started',
+        'receive_response_body.complete',
+    ),
+}
+
+
+def get_phases(events: dict[str, int]) -> dict[str, int]:
+    """
+    Microseconds spent in every phase a request went through,
+    from the perf_counter_ns time of its trace events
+    """
+    return {
+        phase: (events[end] - events[start]) // 1000
+        for phase, (start, end) in PHASE_EVENTS.items()
+        if start in events and end in events
+    }
+
+
+def _get_summary_lines(
+    metric: str,
+    labels: str,
+    phases: dict[str, Histogram],
+    percentiles: Iterable[float],
+) -> Iterator[str]:
+    for phase in PHASES:
+        if phase not in phases:
+            continue
+        histogram = phases[phase]
+        phase_labels = f'{labels}phase="{phase}"'
+        for p in percentiles:
+            yield (
+                f'{metric}{{{phase_labels},quantile="{p / 100:g}"}} '
+                f'{histogram.percentile(p) / 1e6:g}'
+            )
+        yield f'{metric}_sum{{{phase_labels}}} {histogram.total / 1e6:g}'
+        yield f'{metric}_count{{{phase_labels}}} {histogram.count}'
+
+
+class NetworkMetrics:
+    """
+    Phase timings of every replayed request (by function name) from
+    httpcore's trace events, connections opened and reused, bytes sent
+    and received (on the wire and decoded) and response statuses
+    """
+
+    def __init__(self):
+        self.requests: dict[str, dict[str, Histogram]] = {}
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+        self.statuses: Counter[int] = Counter()
+        self.errors: Counter[str] = Counter()
+
+    async def send(
+        self, name: str, send: Callable[..., Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        """
+        Sends a request with send, which takes httpx request extensions,
+        recording where its time went
+        """
+        events: dict[str, int] = {}
+
+        async def trace(event: str, info: dict[str, Any]) -> None:
+            events[event.split('.', 1)[1]] = time.perf_counter_ns()
+
+        try:
+            response = await send(extensions={'trace': trace})
+        except Exception as error:
+            self.errors[type(error).__name__] += 1
+            raise
+        self.record(name, events, response)
+        return response
+
+    def record(
+        self, name: str, events: dict[str, int], response: httpx.Response
+    ) -> None:
+        phases = self.requests.setdefault(name, {})
+        for phase, elapsed in get_phases(events).items():
+            phases.setdefault(phase, Histogram()).record(elapsed)
+        # a request on a pooled connection does not connect again
+        if 'connect_tcp.started' in events:
+            self.connections_opened += 1
+        else:
+            self.connections_reused += 1
+        self.bytes_sent += len(response.request.content)
+        self.bytes_received += response.num_bytes_downloaded
+        self.bytes_decoded += len(response.content)
+        self.statuses[response.status_code] += 1
+
+    @property
+    def phases(self) -> dict[str, Histogram]:
+        """
+        Phase timings of every request together
+        """
+        total: dict[str, Histogram] = {}
+        for phases in self.requests.values():
+            for phase, histogram in phases.items():
+                total.setdefault(phase, Histogram()).merge(histogram)
+        return total
+
+    @property
+    def connection_reuse(self) -> float:
+        connections = self.connections_opened + self.connections_reused
+        return self.connections_reused / connections if connections else 0.0
+
+    @staticmethod
+    def _phases_to_dict(
+        phases: dict[str, Histogram], percentiles: Iterable[float]
+    ) -> dict[str, Any]:
+        return {
+            phase: {
+                'count': phases[phase].count,
+                'mean': phases[phase].mean,
+                **{
+                    f'p{p:g}': phases[phase].percentile(p) for p in percentiles
+                },
+                'max': phases[phase].max,
+            }
+            for phase in PHASES
+            if phase in phases
+        }
+
+    def to_dict(self, percentiles: Iterable[float] = (50, 90, 99)) -> dict:
+        percentiles = tuple(percentiles)
+        return {
+            'connections': {
+                'opened': self.connections_opened,
+                'reused': self.connections_reused,
+                'reuse_rate': self.connection_reuse,
+            },
+            'bytes': {
+                'sent': self.bytes_sent,
+                'received': self.bytes_received,
+                'decoded': self.bytes_decoded,
+            },
+            'statuses': {str(k): v for k, v in sorted(self.statuses.items())},
+            'exceptions': dict(self.errors),
+            'phases_us': {
+                name: self._phases_to_dict(phases, percentiles)
+                for name, phases in [
+                    *self.requests.items(),
+                    (BENCH_TOTAL_NAME, self.phases),
+                ]
+            },
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(
+        self, percentiles: Iterable[float] = (50, 90, 99)
+    ) -> str:
+        """
+        The metrics in Prometheus' text exposition format, with phase
+        timings as summaries labelled with the request's function name,
+        and the timings of all requests as a summary of its own
+        """
+        lines = [
+            '# HELP requestify_connections_total '
+            'Connections replayed requests were sent on.',
+            '# TYPE requestify_connections_total counter',
+            'requestify_connections_total{state="opened"} '
+            f'{self.connections_opened}',
+            'requestify_connections_total{state="reused"} '
+            f'{self.connections_reused}',
+            '# HELP requestify_bytes_total Bytes of replayed requests.',
+            '# TYPE requestify_bytes_total counter',
+            f'requestify_bytes_total{{direction="sent"}} {self.bytes_sent}',
+            'requestify_bytes_total{direction="received",encoding="wire"} '
+            f'{self.bytes_received}',
+            'requestify_bytes_total{direction="received",encoding="decoded"} '
+            f'{self.bytes_decoded}',
+            '# HELP requestify_responses_total Responses by status code.',
+            '# TYPE requestify_responses_total counter',
+            *(
+                f'requestify_responses_total{{status="{status}"}} {count}'
+                for status, count in sorted(self.statuses.items())
+            ),
+            '# HELP requestify_errors_total Requests that raised.',
+            '# TYPE requestify_errors_total counter',
+            *(
+                f'requestify_errors_total{{exception="{error}"}} {count}'
+                for error, count in sorted(self.errors.items())
+            ),
+            '# HELP requestify_phase_seconds '
+            'Time replayed requests spent in every phase, by request.',
+            '# TYPE requestify_phase_seconds summary',
+        ]
+        for name, phases in self.requests.items():
+            lines.extend(
+                _get_summary_lines(
+                    'requestify_phase_seconds',
+                    f'request="{name}",',
+                    phases,
+                    percentiles,
+                )
+            )
+        # a family of its own, so summing the one above counts every
+        # request once
+        lines += [
+            '# HELP requestify_overall_phase_seconds '
+            'Time all replayed requests spent in every phase.',
+            '# TYPE requestify_overall_phase_seconds summary',
+            *_get_summary_lines(
+                'requestify_overall_phase_seconds',
+                '',
+                self.phases,
+                percentiles,
+            ),
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def save(self, path: str) -> None:
+        """
+        Writes the metrics to path, in Prometheus' text format if it
+        ends with .prom and as JSON otherwise
+        """
+        exported = (
+            self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        )
+        with open(path, mode='w', encoding='utf8') as metrics_file:
+            metrics_file.write(exported)
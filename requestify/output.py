@@ -0,0 +1,445 @@
+from __future__ import annotations
+import ast
+import json
+import os
+from collections import defaultdict
+from typing import Any, Callable, Optional, Iterable, Iterator, TextIO, TypeVar
+from .models import _RequestifyObject, _RequestifyList, _ReplaceRequestify
+from .constants import (
+    REQUEST_CLASS_NAME,
+    REQUEST_MATCHING_DATA_DICT_NAME,
+    REQUEST_DEPENDENCIES_DICT_NAME,
+)
+from .text_utils import (
+    generate_imports_text,
+    generate_function_text,
+    generate_requestify_function,
+    generate_requestify_list_function,
+    generate_replay_function,
+    generate_shared_constants_text,
+    generate_replacement_class_body,
+    generate_unnested_class_function,
+    generate_replacement_base_text,
+    generate_replacement_run_text,
+    FunctionBase,
+)
+from .ast_utils import (
+    generate_function_ast,
+    generate_module_ast,
+    generate_replacement_statements,
+    generate_requestify_function_ast,
+    unparse_module,
+    unparse_statement,
+)
+from .utils import (
+    FormatCache,
+    batched,
+    beautify_chunks,
+    beautify_string,
+    get_netloc,
+    iter_join_chunks,
+    join_chunks,
+)
+
+Requestify = _RequestifyObject | _RequestifyList | _ReplaceRequestify
+T = TypeVar('T')
+
+
+def generate_module_chunks(
+    requestify: Requestify,
+    with_headers=True,
+    with_cookies=True,
+    shared_constants=False,
+    replay=False,
+) -> tuple[list[str], list[str]]:
+    """
+    Returns the unformatted top level statements of the module and,
+    for workflows, the functions of the REQUEST_CLASS_NAME class.
+    With replay, lists also get a function that sends their requests
+    in the original order, duplicates included.
+    """
+    if isinstance(requestify, _ReplaceRequestify):
+        imports = generate_imports_text('requests')
+        class_body = generate_replacement_class_body(
+            requestify, with_headers, with_cookies, with_run=True
+        )
+        methods = [
+            generate_function_text(generate_unnested_class_function(base))
+            for base in class_body
+        ]
+        return ['\n'.join(imports)], methods
+
+    imports = generate_imports_text('requests')
+    if isinstance(requestify, _RequestifyObject):
+        function = generate_requestify_function(
+            requestify, with_headers, with_cookies
+        )
+        return ['\n'.join(imports), generate_function_text(function)], []
+
+    constants = (
+        generate_shared_constants_text(requestify, with_headers, with_cookies)
+        if shared_constants
+        else []
+    )
+    functions = generate_requestify_list_function(
+        requestify, with_headers, with_cookies, shared_constants
+    )
+    if replay:
+        functions.append(generate_replay_function(requestify))
+    return [
+        '\n'.join(imports),
+        *constants,
+        *[generate_function_text(function) for function in functions],
+    ], []
+
+
+def generate_module(
+    requestify: Requestify,
+    with_headers=True,
+    with_cookies=True,
+    shared_constants=False,
+    cache: Optional[FormatCache] = None,
+    use_ast=False,
+    replay=False,
+) -> str:
+    # the ast emitter's output is already canonical, so black is skipped
+    if use_ast:
+        return unparse_module(
+            generate_module_ast(
+                requestify,
+                with_headers,
+                with_cookies,
+                shared_constants,
+                replay,
+            )
+        )
+
+    chunks, methods = generate_module_chunks(
+        requestify, with_headers, with_cookies, shared_constants, replay
+    )
+    module = beautify_chunks(chunks, cache)
+    if methods:
+        class_body = '\n\n'.join(beautify_chunks(methods, cache, indent=1))
+        module.append(f'class {REQUEST_CLASS_NAME}:\n{class_body}')
+    return join_chunks(module)
+
+
+def to_file(
+    requestify: Requestify,
+    filename: str,
+    with_headers=True,
+    with_cookies=True,
+    shared_constants=False,
+    cache: Optional[FormatCache] = None,
+    use_ast=False,
+    replay=False,
+) -> None:
+    module = generate_module(
+        requestify,
+        with_headers,
+        with_cookies,
+        shared_constants,
+        cache,
+        use_ast,
+        replay,
+    )
+    with open(filename, mode='w', encoding='utf8') as out_file:
+        out_file.write(module)
+
+
+"""
+Streaming
+"""
+
+
+def iter_module_chunks(
+    requests: Iterable[_RequestifyObject],
+    with_headers=True,
+    with_cookies=True,
+    cache: Optional[FormatCache] = None,
+    use_ast=False,
+    batch_size=100,
+) -> Iterator[str]:
+    """
+    Yields the formatted module one chunk at a time, so only batch_size
+    requests (e.g. from iter_requestify) are held in memory at once.
+    """
+    yield '\n'.join(generate_imports_text('requests'))
+    for batch in batched(requests, batch_size):
+        if use_ast:
+            for request in batch:
+                yield unparse_statement(
+                    generate_requestify_function_ast(
+                        request, with_headers, with_cookies
+                    )
+                )
+        else:
+            functions = [
+                generate_function_text(
+                    generate_requestify_function(
+                        request, with_headers, with_cookies
+                    )
+                )
+                for request in batch
+            ]
+            yield from beautify_chunks(functions, cache)
+
+
+def write_module(
+    sink: TextIO,
+    requests: Iterable[_RequestifyObject],
+    with_headers=True,
+    with_cookies=True,
+    cache: Optional[FormatCache] = None,
+    use_ast=False,
+) -> None:
+    chunks = iter_module_chunks(
+        requests, with_headers, with_cookies, cache, use_ast
+    )
+    for text in iter_join_chunks(chunks):
+        sink.write(text)
+
+
+"""
+NDJSON
+"""
+
+
+def get_record(
+    request: _RequestifyObject, code: Optional[str] = None
+) -> dict[str, Any]:
+    data = request._data
+    if isinstance(data, bytes):
+        data = data.decode('utf-8', errors='replace')
+    record = {
+        'function_name': request._function_name,
+        'method': request._method.upper(),
+        'url': str(request._url),
+        'headers': request._headers,
+        'cookies': request._cookies,
+        'data': data or None,
+    }
+    if code is not None:
+        record['code'] = code
+    return record
+
+
+def iter_ndjson_records(
+    inputs: Iterable[T],
+    parse: Callable[[T], _RequestifyObject],
+    with_code=False,
+    cache: Optional[FormatCache] = None,
+    use_ast=False,
+) -> Iterator[str]:
+    """
+    Yields one JSON line per input (a cURL command, a HAR entry, ...) as
+    soon as it is parsed, with the generated function if with_code.
+    Inputs that cannot be parsed yield an error record instead.
+    """
+    function_names = _RequestifyList()
+    for item in inputs:
+        try:
+            request = parse(item)
+        except (AssertionError, ValueError, KeyError) as error:
+            record = {
+                'error': f'{type(error).__name__}: {error}',
+                'input': item.strip() if isinstance(item, str) else item,
+            }
+            yield json.dumps(record)
+            continue
+
+        function_names._set_function_name(request)
+        code = (
+            _generate_function_code(request, cache, use_ast)
+            if with_code
+            else None
+        )
+        yield json.dumps(get_record(request, code))
+
+
+def _generate_function_code(
+    request: _RequestifyObject, cache: Optional[FormatCache], use_ast: bool
+) -> str:
+    if use_ast:
+        return unparse_statement(generate_requestify_function_ast(request))
+    function = generate_function_text(generate_requestify_function(request))
+    return beautify_chunks([function], cache)[0]
+
+
+def write_ndjson(
+    sink: TextIO,
+    inputs: Iterable[T],
+    parse: Callable[[T], _RequestifyObject],
+    with_code=False,
+    cache: Optional[FormatCache] = None,
+    use_ast=False,
+) -> None:
+    """
+    Writes the records of iter_ndjson_records, flushing every one
+    so the next command in a pipeline gets it right away
+    """
+    records = iter_ndjson_records(inputs, parse, with_code, cache, use_ast)
+    for record in records:
+        sink.write(record + '\n')
+        sink.flush()
+
+
+"""
+Packages
+"""
+
+
+def get_shards(
+    requestify: _RequestifyList | _ReplaceRequestify,
+    shard_size: Optional[int] = None,
+) -> dict[str, list[_RequestifyObject]]:
+    """
+    Groups requests into the modules of a package:
+    one per host, or one per shard_size requests if it is given.
+    """
+    requests = list(requestify._requests)
+    if shard_size:
+        return {
+            f'shard_{index}': batch
+            for index, batch in enumerate(batched(requests, shard_size))
+        }
+
+    shards = defaultdict(list)
+    for request in requests:
+        url = request._url
+        # urls with replaced path values are f-strings
+        if url.startswith("f'"):
+            url = url[2:-1]
+        module_name = get_netloc(url, beautify=True)
+        if not module_name.isidentifier():
+            module_name = f'host_{module_name}'
+        shards[module_name].append(request)
+    return dict(shards)
+
+
+def _generate_shard_module(
+    requests: list[_RequestifyObject],
+    is_in_class: bool,
+    with_headers=True,
+    with_cookies=True,
+    cache: Optional[FormatCache] = None,
+    use_ast=False,
+) -> str:
+    imports = '\n'.join(generate_imports_text('requests'))
+    if use_ast:
+        functions = [
+            unparse_statement(
+                generate_function_ast(
+                    request._function_name,
+                    generate_replacement_statements(
+                        request, with_headers, with_cookies
+                    ),
+                    is_in_class=True,
+                )
+                if is_in_class
+                else generate_requestify_function_ast(
+                    request, with_headers, with_cookies
+                )
+            )
+            for request in requests
+        ]
+        return join_chunks([imports, *functions])
+
+    functions = [
+        generate_function_text(
+            generate_unnested_class_function(
+                FunctionBase(
+                    request._function_name,
+                    generate_replacement_base_text(
+                        request, with_headers, with_cookies
+                    ),
+                )
+            )
+            if is_in_class
+            else generate_requestify_function(
+                request, with_headers, with_cookies
+            )
+        )
+        for request in requests
+    ]
+    return join_chunks(beautify_chunks([imports, *functions], cache))
+
+
+# Resolves names lazily through a module level __getattr__, so importing
+# the package and using one function only imports that function's shard
+def _generate_package_init_text(
+    requestify: _RequestifyList | _ReplaceRequestify,
+    shards: dict[str, list[_RequestifyObject]],
+) -> str:
+    modules = {
+        request._function_name: module_name
+        for module_name, requests in shards.items()
+        for request in requests
+    }
+    load_function = (
+        'def _load(name):\n'
+        '\tif name not in _SHARDS:\n'
+        "\t\traise AttributeError(f'{__name__!r} has no attribute {name!r}')\n"
+        "\tmodule = importlib.import_module(f'.{_SHARDS[name]}', __name__)\n"
+        '\treturn getattr(module, name)'
+    )
+    is_workflow = isinstance(requestify, _ReplaceRequestify)
+    imports = generate_imports_text('importlib')
+    text = ['\n'.join(imports), f'_SHARDS = {modules}', load_function]
+
+    if is_workflow:
+        run = generate_unnested_class_function(
+            FunctionBase('run', generate_replacement_run_text())
+        )
+        run_text = generate_function_text(run).replace('\n', '\n\t')
+        text.append(
+            f'class {REQUEST_CLASS_NAME}:\n'
+            '\tdef __init__(self):\n'
+            f'\t\tself.{REQUEST_MATCHING_DATA_DICT_NAME} = {{}}\n'
+            f'\t\tself.{REQUEST_DEPENDENCIES_DICT_NAME} = {requestify._dependencies}\n'
+            '\tdef __getattr__(self, name):\n'
+            '\t\treturn _load(name).__get__(self)\n'
+            f'\t{run_text}'
+        )
+    else:
+        text += [
+            'def __getattr__(name):\n\treturn _load(name)',
+            'def __dir__():\n\treturn [*globals(), *_SHARDS]',
+        ]
+    return '\n\n'.join(text)
+
+
+def write_package(
+    requestify: _RequestifyList | _ReplaceRequestify,
+    directory: str,
+    shard_size: Optional[int] = None,
+    with_headers=True,
+    with_cookies=True,
+    cache: Optional[FormatCache] = None,
+    use_ast=False,
+) -> None:
+    """
+    Writes a package with one module per host (or per shard_size requests)
+    and an __init__ that imports them only when they are used.
+    """
+    os.makedirs(directory, exist_ok=True)
+    shards = get_shards(requestify, shard_size)
+    is_in_class = isinstance(requestify, _ReplaceRequestify)
+
+    for module_name, requests in shards.items():
+        module = _generate_shard_module(
+            requests, is_in_class, with_headers, with_cookies, cache, use_ast
+        )
+        path = os.path.join(directory, f'{module_name}.py')
+        with open(path, mode='w', encoding='utf8') as out_file:
+            out_file.write(module)
+
+    init_text = _generate_package_init_text(requestify, shards)
+    init_text = (
+        unparse_module(ast.parse(init_text))
+        if use_ast
+        else beautify_string(init_text)
+    )
+    path = os.path.join(directory, '__init__.py')
+    with open(path, mode='w', encoding='utf8') as out_file:
+        out_file.write(init_text)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable, Iterable, Optional
+import httpx
+from .models import _RequestifyObject, _RequestifyList
+from .bench import BenchResult, PreparedRequest, areplay, prepare
+from .utils import shard
+
+
+async def _abench_shard(
+    requests: list[PreparedRequest],
+    concurrency: int,
+    client_factory: Optional[Callable[[], httpx.AsyncClient]],
+) -> BenchResult:
+    if client_factory is None:
+        return await areplay(requests, concurrency)
+    # closed with the shard, so the worker does not leak its connections
+    async with client_factory() as client:
+        return await areplay(requests, concurrency, client)
+
+
+def _bench_shard(
+    requests: list[PreparedRequest],
+    concurrency: int,
+    client_factory: Optional[Callable[[], httpx.AsyncClient]],
+) -> BenchResult:
+    # every process has its own event loop and connection pool
+    return asyncio.run(_abench_shard(requests, concurrency, client_factory))
+
+
+def bench_processes(
+    requests: _RequestifyList | Iterable[_RequestifyObject],
+    iterations=1,
+    concurrency=10,
+    processes: Optional[int] = None,
+    client_factory: Optional[Callable[[], httpx.AsyncClient]] = None,
+) -> BenchResult:
+    """
+    Like bench, but the replays are split between `processes` worker
+    processes (one per cpu by default), which share the concurrency.
+    Their results are merged, and elapsed is the wall time of the run.
+    client_factory must be picklable, and builds each worker's client.
+    """
+    assert iterations > 0 and concurrency > 0, 'Nothing to replay'
+    prepared = [prepare(request) for request in requests]
+    assert prepared, 'There must be at least one request'
+    queue = [request for _ in range(iterations) for request in prepared]
+    processes = min(processes or os.cpu_count() or 1, len(queue))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(processes) as executor:
+        results = executor.map(
+            _bench_shard,
+            shard(queue, processes),
+            repeat(max(1, concurrency // processes)),
+            repeat(client_factory),
+        )
+        result = BenchResult()
+        for shard_result in results:
+            result.merge(shard_result)
+    result.elapsed = time.perf_counter() - start
+    return result
@@ -0,0 +1,150 @@
+from __future__ import annotations
+import contextlib
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Iterator, Optional
+from .stats import Histogram
+
+# the stages conversions and replays are timed in, in the order they run
+STAGES = ('parse_url', 'decode_body', 'fetch', 'match', 'format')
+
+# called with the stage, the request it ran for (None if it ran for many)
+# and how long it took in nanoseconds
+Hook = Callable[[str, Any, int], None]
+
+
+class Profiler:
+    """
+    Time spent in every stage, in nanoseconds, overall and for every
+    request it ran for. A hook, if given, is called as every stage ends.
+    """
+
+    def __init__(self, hook: Optional[Hook] = None):
+        self.hook = hook
+        self.stages: dict[str, Histogram] = {}
+        # id of the request -> the request and its time in every stage;
+        # kept by id, as requests change their hash while being matched
+        self._requests: dict[int, tuple[Any, dict[str, int]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, request: Any, elapsed: int) -> None:
+        with self._lock:
+            if stage not in self.stages:
+                self.stages[stage] = Histogram()
+            self.stages[stage].record(elapsed)
+            if request is not None:
+                _, times = self._requests.setdefault(
+                    id(request), (request, {})
+                )
+                times[stage] = times.get(stage, 0) + elapsed
+        if self.hook is not None:
+            self.hook(stage, request, elapsed)
+
+    @property
+    def requests(self) -> dict[str, dict[str, int]]:
+        """
+        Time in every stage by function name, read when asked for, as
+        requests get their unique function names after being parsed.
+        Requests that failed to parse have no name and are left out, and
+        requests named alike by different lists get #2, #3, ... appended.
+        """
+        requests = {}
+        counts = defaultdict(int)
+        for request, times in self._requests.values():
+            name = str(request)
+            if not name:
+                continue
+            counts[name] += 1
+            if counts[name] > 1:
+                name = f'{name}#{counts[name]}'
+            requests[name] = dict(times)
+        return requests
+
+    @property
+    def total(self) -> int:
+        return sum(histogram.total for histogram in self.stages.values())
+
+    def _get_stages(self) -> list[str]:
+        known = [stage for stage in STAGES if stage in self.stages]
+        return known + sorted(set(self.stages) - set(STAGES))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'stages': {
+                stage: {
+                    'count': self.stages[stage].count,
+                    'total': self.stages[stage].total,
+                    'max': self.stages[stage].max,
+                }
+                for stage in self._get_stages()
+            },
+            'requests': self.requests,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def format_table(self) -> str:
+        header = (
+            f'{"stage":<12} {"count":>8} {"total ms":>10} {"mean ms":>9} '
+            f'{"max ms":>9} {"share":>7}'
+        )
+        rows = [header, '-' * len(header)]
+        total = self.total
+        for stage in self._get_stages():
+            histogram = self.stages[stage]
+            rows.append(
+                f'{stage:<12} {histogram.count:>8} '
+                f'{histogram.total / 1e6:>10.2f} '
+                f'{histogram.mean / 1e6:>9.3f} '
+                f'{(histogram.max or 0) / 1e6:>9.3f} '
+                f'{histogram.total / total if total else 0:>7.1%}'
+            )
+        rows.append(f'{total / 1e6:.2f} ms in {len(self.requests)} requests')
+        return '\n'.join(rows)
+
+
+class _Timer:
+    __slots__ = ('profiler', 'stage', 'request', 'start')
+
+    def __init__(self, profiler: Profiler, stage: str, request: Any):
+        self.profiler = profiler
+        self.stage = stage
+        self.request = request
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *_):
+        elapsed = time.perf_counter_ns() - self.start
+        self.profiler.record(self.stage, self.request, elapsed)
+
+
+_profiler: Optional[Profiler] = None
+# what timed() returns while nothing is profiled, so it costs one check
+_NOT_TIMED = contextlib.nullcontext()
+
+
+def timed(stage: str, request: Any = None):
+    """
+    Times a stage (for a request, if given) when a profiler is enabled
+    """
+    if _profiler is None:
+        return _NOT_TIMED
+    return _Timer(_profiler, stage, request)
+
+
+@contextlib.contextmanager
+def profiled(profiler: Optional[Profiler] = None) -> Iterator[Profiler]:
+    """
+    Times every stage run inside it (from any thread) with the profiler
+    """
+    global _profiler
+    profiler = profiler or Profiler()
+    previous, _profiler = _profiler, profiler
+    try:
+        yield profiler
+    finally:
+        _profiler = previous
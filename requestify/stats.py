@@ -0,0 +1,186 @@
+from __future__ import annotations
+import math
+from collections import Counter
+from typing import Any, Optional, Iterable
+
+
+class Histogram:
+    """
+    HDR-style histogram of integer values (latencies in microseconds).
+    Values are kept in log-linear buckets with `significant_figures`
+    digits of precision, so memory does not grow with the number of
+    recorded values and histograms from different runs can be merged.
+    """
+
+    def __init__(self, significant_figures=3):
+        assert 1 <= significant_figures <= 5, 'Use 1 to 5 significant figures'
+        self.significant_figures = significant_figures
+        self._counts: Counter[int] = Counter()
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def __len__(self):
+        return self.count
+
+    def __eq__(self, other):
+        if isinstance(other, Histogram):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    def _bucket(self, value: int) -> int:
+        # lowest value with the same first significant_figures digits
+        if value < 10**self.significant_figures:
+            return value
+        unit = 10 ** (int(math.log10(value)) + 1 - self.significant_figures)
+        return value - value % unit
+
+    def _highest_equivalent(self, bucket: int) -> int:
+        if bucket < 10**self.significant_figures:
+            return bucket
+        unit = 10 ** (int(math.log10(bucket)) + 1 - self.significant_figures)
+        return bucket + unit - 1
+
+    def record(self, value: int, count=1) -> None:
+        assert value >= 0, 'Only non-negative values can be recorded'
+        value = int(value)
+        self._counts[self._bucket(value)] += count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: Histogram) -> None:
+        assert (
+            self.significant_figures == other.significant_figures
+        ), 'Histograms need the same precision to be merged'
+        self._counts.update(other._counts)
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> int:
+        """
+        Highest value (within the histogram's precision) at or below which
+        `percentile` percent of the recorded values are
+        """
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(self.count * percentile / 100))
+        seen = 0
+        for bucket in sorted(self._counts):
+            seen += self._counts[bucket]
+            if seen >= rank:
+                return min(self._highest_equivalent(bucket), self.max)
+        return self.max
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'significant_figures': self.significant_figures,
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+            'counts': {str(k): v for k, v in sorted(self._counts.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Histogram:
+        histogram = cls(data['significant_figures'])
+        histogram._counts.update(
+            {int(k): v for k, v in data['counts'].items()}
+        )
+        histogram.count = data['count']
+        histogram.total = data['total']
+        histogram.min = data['min']
+        histogram.max = data['max']
+        return histogram
+
+
+class RequestStats:
+    """
+    Latency histogram, status codes, errors and bytes transferred
+    of one request (or of all of them)
+    """
+
+    def __init__(self, significant_figures=3):
+        self.latency = Histogram(significant_figures)
+        self.statuses: Counter[int] = Counter()
+        self.errors: Counter[str] = Counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    @property
+    def count(self) -> int:
+        return self.latency.count
+
+    @property
+    def error_count(self) -> int:
+        # exceptions and http error statuses
+        return sum(self.errors.values()) + sum(
+            count for status, count in self.statuses.items() if status >= 400
+        )
+
+    @property
+    def error_rate(self) -> float:
+        return self.error_count / self.count if self.count else 0.0
+
+    def record(
+        self,
+        latency: int,
+        status: Optional[int] = None,
+        bytes_sent=0,
+        bytes_received=0,
+        error: Optional[str] = None,
+    ) -> None:
+        self.latency.record(latency)
+        if status is not None:
+            self.statuses[status] += 1
+        if error is not None:
+            self.errors[error] += 1
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+
+    def merge(self, other: RequestStats) -> None:
+        self.latency.merge(other.latency)
+        self.statuses.update(other.statuses)
+        self.errors.update(other.errors)
+        self.bytes_sent += other.bytes_sent
+        self.bytes_received += other.bytes_received
+
+    def to_dict(self, percentiles: Iterable[float] = (50, 90, 99)) -> dict:
+        return {
+            'count': self.count,
+            'errors': self.error_count,
+            'error_rate': self.error_rate,
+            'statuses': {str(k): v for k, v in sorted(self.statuses.items())},
+            'exceptions': dict(self.errors),
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'latency_us': {
+                'min': self.latency.min,
+                'mean': self.latency.mean,
+                **{f'p{p:g}': self.latency.percentile(p) for p in percentiles},
+                'max': self.latency.max,
+            },
+            'histogram': self.latency.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> RequestStats:
+        histogram = Histogram.from_dict(data['histogram'])
+        stats = cls(histogram.significant_figures)
+        stats.latency = histogram
+        stats.statuses.update({int(k): v for k, v in data['statuses'].items()})
+        stats.errors.update(data['exceptions'])
+        stats.bytes_sent = data['bytes_sent']
+        stats.bytes_received = data['bytes_received']
+        return stats
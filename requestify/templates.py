@@ -0,0 +1,271 @@
+from __future__ import annotations
+import ast
+import copy
+import csv
+import json
+import keyword
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional
+from .models import _RequestifyObject
+from .constants import (
+    GENERATED_NAMES,
+    TEMPLATE_PLACEHOLDER_REGEX,
+    TEMPLATE_SENTINEL,
+    TEMPLATE_SENTINEL_REGEX,
+    TEMPLATE_PARAMETERS_FILE_NAME,
+)
+from .text_utils import generate_imports_text
+from .ast_utils import (
+    generate_function_ast,
+    generate_request_statements,
+    unparse_statement,
+)
+from .utils import CodeExpression, FormatCache, beautify_chunks, join_chunks
+
+Row = Mapping[str, Any]
+
+# fields of a request that can hold placeholders
+TEMPLATE_FIELDS = ('_url', '_headers', '_cookies', '_data')
+
+
+"""
+Parameters
+"""
+
+
+def iter_csv_rows(lines: Iterable[str]) -> Iterator[dict[str, str]]:
+    yield from csv.DictReader(lines)
+
+
+def iter_ndjson_rows(lines: Iterable[str]) -> Iterator[dict[str, Any]]:
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_rows(filename: str) -> Iterator[Row]:
+    """
+    Rows of a .csv file, or of an NDJSON file for any other extension.
+    The file is read lazily, one row at a time.
+    """
+    reader = iter_csv_rows if filename.endswith('.csv') else iter_ndjson_rows
+    with open(filename, mode='r', encoding='utf8', newline='') as in_file:
+        yield from reader(in_file)
+
+
+"""
+Templates
+"""
+
+
+class CurlTemplate:
+    """
+    A cURL with {{name}} placeholders, parsed once. Rows of parameters
+    are rendered straight into requests, without parsing a cURL per row.
+    """
+
+    def __init__(self, curl: str):
+        self._names: list[str] = []
+        self._request = _RequestifyObject(
+            TEMPLATE_PLACEHOLDER_REGEX.sub(self._to_sentinel, curl)
+        )
+        assert self._names, 'The template has no {{placeholders}}'
+
+        self._request._function_name = TEMPLATE_SENTINEL_REGEX.sub(
+            lambda match: self._names[int(match.group(1))],
+            self._request._function_name,
+        )
+        # only these need to be rendered for every row
+        self._templated_fields = [
+            field
+            for field in TEMPLATE_FIELDS
+            if self._has_sentinel(getattr(self._request, field))
+        ]
+        self._renderers = {
+            field: self._compile(getattr(self._request, field))
+            for field in self._templated_fields
+        }
+
+    def __repr__(self):
+        return f'CurlTemplate({self._request._base_string})'
+
+    def _to_sentinel(self, match) -> str:
+        name = match.group(1)
+        # placeholders become arguments of the generated function
+        if not name.isidentifier() or keyword.iskeyword(name):
+            raise ValueError(
+                f'{{{{{name}}}}} is not a valid python argument name'
+            )
+        if name in GENERATED_NAMES:
+            raise ValueError(
+                f'{{{{{name}}}}} is used by the generated code, rename it'
+            )
+        if name not in self._names:
+            self._names.append(name)
+        return TEMPLATE_SENTINEL.format(self._names.index(name))
+
+    def _has_sentinel(self, value: Any) -> bool:
+        if isinstance(value, (str, bytes)):
+            return bool(TEMPLATE_SENTINEL_REGEX.search(str(value)))
+        if isinstance(value, dict):
+            return any(
+                self._has_sentinel(k) or self._has_sentinel(v)
+                for k, v in value.items()
+            )
+        if isinstance(value, list):
+            return any(self._has_sentinel(v) for v in value)
+        return False
+
+    def _get_parameter(self, row: Row, name: str) -> Any:
+        try:
+            return row[name]
+        except KeyError:
+            raise ValueError(f'No value for {{{{{name}}}}} in {row}') from None
+
+    def _compile(self, value: Any) -> Callable[[Row], Any]:
+        """
+        A function building value from a row of parameters,
+        with the text around the placeholders split up front
+        """
+        if isinstance(value, (str, bytes)):
+            text = value.decode() if isinstance(value, bytes) else value
+            parts = TEMPLATE_SENTINEL_REGEX.split(text)
+            if len(parts) == 1:
+                return lambda row: value
+            names = [self._names[int(index)] for index in parts[1::2]]
+            texts = parts[::2]
+
+            # a value that is only a placeholder keeps the row value's type
+            if isinstance(value, str) and texts == ['', '']:
+                return lambda row: self._get_parameter(row, names[0])
+
+            def render(row: Row) -> str | bytes:
+                rendered = texts[0]
+                for name, text in zip(names, texts[1:]):
+                    rendered += str(self._get_parameter(row, name)) + text
+                return (
+                    rendered if isinstance(value, str) else rendered.encode()
+                )
+
+            return render
+        if isinstance(value, dict):
+            items = [
+                (self._compile(k), self._compile(v)) for k, v in value.items()
+            ]
+            return lambda row: {k(row): v(row) for k, v in items}
+        if isinstance(value, list):
+            values = [self._compile(v) for v in value]
+            return lambda row: [v(row) for v in values]
+        return lambda row: value
+
+    def render(self, row: Row) -> _RequestifyObject:
+        request = copy.copy(self._request)
+        for field in TEMPLATE_FIELDS:
+            if field in self._renderers:
+                setattr(request, field, self._renderers[field](row))
+            elif isinstance(getattr(request, field), dict):
+                setattr(request, field, dict(getattr(request, field)))
+        return request
+
+    def iter_requests(
+        self, rows: Iterable[Row]
+    ) -> Iterator[_RequestifyObject]:
+        for row in rows:
+            yield self.render(row)
+
+    def _parametrize_value(self, value: Any) -> Any:
+        if isinstance(value, str):
+            whole = TEMPLATE_SENTINEL_REGEX.fullmatch(value)
+            if whole:
+                return CodeExpression(self._names[int(whole.group(1))])
+            if TEMPLATE_SENTINEL_REGEX.search(value):
+                return self._to_fstring(value)
+            return value
+        if isinstance(value, dict):
+            return {
+                self._parametrize_value(k): self._parametrize_value(v)
+                for k, v in value.items()
+            }
+        if isinstance(value, list):
+            return [self._parametrize_value(v) for v in value]
+        return value
+
+    def _to_fstring(self, value: str) -> CodeExpression:
+        parts = []
+        position = 0
+        for match in TEMPLATE_SENTINEL_REGEX.finditer(value):
+            if match.start() > position:
+                parts.append(ast.Constant(value[position : match.start()]))
+            name = ast.Name(self._names[int(match.group(1))], ast.Load())
+            parts.append(ast.FormattedValue(name, -1, None))
+            position = match.end()
+        if position < len(value):
+            parts.append(ast.Constant(value[position:]))
+        return CodeExpression(ast.unparse(ast.JoinedStr(parts)))
+
+    def parametrize(self) -> _RequestifyObject:
+        """
+        The template request, with every placeholder replaced by
+        the argument of the same name
+        """
+        request = copy.copy(self._request)
+        for field in self._templated_fields:
+            value = getattr(self._request, field)
+            setattr(request, field, self._parametrize_value(value))
+        return request
+
+
+"""
+Code generation
+"""
+
+
+def _generate_template_replay_ast(
+    template: CurlTemplate, parameters_file: str
+) -> ast.FunctionDef:
+    name = template._request._function_name
+    arguments = ', '.join(f'row[{argument!r}]' for argument in template._names)
+    rows = (
+        'csv.DictReader(parameters)'
+        if parameters_file.endswith('.csv')
+        else 'map(json.loads, filter(str.strip, parameters))'
+    )
+    return ast.parse(
+        f'def replay_{name}():\n'
+        f"    with open({TEMPLATE_PARAMETERS_FILE_NAME}, encoding='utf8', newline='') as parameters:\n"
+        f'        for row in {rows}:\n'
+        f'            {name}({arguments})'
+    ).body[0]
+
+
+def generate_template_module(
+    template: CurlTemplate,
+    parameters_file: str,
+    with_headers=True,
+    with_cookies=True,
+    cache: Optional[FormatCache] = None,
+    use_ast=False,
+) -> str:
+    """
+    One function taking the placeholders as arguments, and a replay_
+    function that calls it for every row of parameters_file,
+    read when the replay runs
+    """
+    reader = 'csv' if parameters_file.endswith('.csv') else 'json'
+    function = generate_function_ast(
+        template._request._function_name,
+        generate_request_statements(
+            template.parametrize(), with_headers, with_cookies
+        ),
+        arguments=tuple(template._names),
+    )
+    chunks = [
+        '\n'.join(generate_imports_text(reader, 'requests')),
+        f'{TEMPLATE_PARAMETERS_FILE_NAME} = {parameters_file!r}',
+        unparse_statement(function),
+        unparse_statement(
+            _generate_template_replay_ast(template, parameters_file)
+        ),
+    ]
+    if not use_ast:
+        chunks = beautify_chunks(chunks, cache)
+    return join_chunks(chunks)
@@ -1,10 +1,20 @@
 from __future__ import annotations
-from collections import namedtuple
-from typing import TYPE_CHECKING
+from collections import namedtuple, defaultdict
+from typing import Any, Optional, TYPE_CHECKING
 from .constants import (
     REQUEST_VARIABLE_NAME,
     REQUEST_CLASS_NAME,
     REQUEST_MATCHING_DATA_DICT_NAME,
+    REQUEST_DEPENDENCIES_DICT_NAME,
+    URLLIB3_POOL_VARIABLE_NAME,
+    REPLAY_FUNCTION_NAME,
+)
+from .utils import (
+    code_repr,
+    encode_body,
+    get_netloc,
+    get_sent_headers,
+    get_shared_items,
 )
 
 if TYPE_CHECKING:
@@ -47,9 +57,7 @@ Functions
 
 
 def generate_function_text(function: Function) -> str:
-    return function.name + ''.join(function.body).replace('"', '`').replace(
-        '`', ''
-    )
+    return function.name + '\n' + '\n'.join(function.body)
 
 
 def generate_class_function(base: FunctionBase) -> Function:
@@ -83,6 +91,13 @@ def _generate_unindented_function(
     return function_text
 
 
+# class function written without the class indentation,
+# so it can be formatted on its own
+def generate_unnested_class_function(base: FunctionBase) -> Function:
+    function_text = _generate_unindented_function(base, is_in_class=True)
+    return _indent_function(function_text, indent_amount=1)
+
+
 def _indent_function_inside_class(function: Function) -> Function:
     return _indent_function(function, indent_amount=2)
 
@@ -127,7 +142,7 @@ def generate_class_text(class_tuple: Class) -> str:
     functions = [
         generate_function_text(function) for function in class_tuple.body
     ]
-    return class_tuple.name + ''.join(functions)
+    return class_tuple.name + '\n' + '\n'.join(functions)
 
 
 # generates class for functions that were already
@@ -145,32 +160,102 @@ Requestify text
 """
 
 
+def _get_shared_constant_name(req: _RequestifyObject, kind: str) -> str:
+    name = get_netloc(req._url, beautify=True).upper()
+    # hosts can start with a digit (1password.com)
+    if not name.isidentifier():
+        name = f'HOST_{name}'
+    return f'{name}_{kind}'
+
+
+# Headers and cookies that every request to the same host sends,
+# keyed by the name of the module-level constant they are written to
+def get_shared_constants(rl: _RequestifyList) -> dict[str, dict[str, Any]]:
+    hosts = defaultdict(list)
+    for request in rl._requests:
+        hosts[get_netloc(request._url, beautify=True)].append(request)
+
+    shared_constants = {}
+    for requests in hosts.values():
+        # a constant used by a single request would not save anything
+        if len(requests) < 2:
+            continue
+        for kind, attribute in (
+            ('HEADERS', '_headers'),
+            ('COOKIES', '_cookies'),
+        ):
+            shared = get_shared_items(
+                [getattr(request, attribute) for request in requests]
+            )
+            if shared:
+                name = _get_shared_constant_name(requests[0], kind)
+                shared_constants[name] = shared
+    return shared_constants
+
+
+def generate_shared_constants_text(
+    rl: _RequestifyList, with_headers=True, with_cookies=True
+) -> list[str]:
+    return [
+        f'{name} = {values}'
+        for name, values in get_shared_constants(rl).items()
+        if (with_headers and name.endswith('_HEADERS'))
+        or (with_cookies and name.endswith('_COOKIES'))
+    ]
+
+
+def _generate_dict_text(
+    req: _RequestifyObject,
+    values: dict[str, Any],
+    kind: str,
+    shared_constants: Optional[dict[str, dict[str, Any]]],
+) -> str:
+    name = _get_shared_constant_name(req, kind) if shared_constants else ''
+    if name not in (shared_constants or {}):
+        return code_repr(values)
+
+    shared = shared_constants[name]
+    overrides = {k: v for k, v in values.items() if k not in shared}
+    if not overrides:
+        return name
+    return f'{{**{name}, {code_repr(overrides)[1:-1]}}}'
+
+
 def generate_requestify_base_text(
-    req: _RequestifyObject, with_headers=True, with_cookies=True
+    req: _RequestifyObject,
+    with_headers=True,
+    with_cookies=True,
+    shared_constants: Optional[dict[str, dict[str, Any]]] = None,
 ) -> list[str]:
     requestify_text = []
     request_options = ''
 
     if with_headers:
-        requestify_text.append(f'headers = {req._headers}')
+        headers = _generate_dict_text(
+            req, req._headers, 'HEADERS', shared_constants
+        )
+        requestify_text.append(f'headers = {headers}')
         request_options += ', headers=headers'
     else:
         requestify_text.append(None)
 
     if with_cookies:
-        requestify_text.append(f'cookies = {req._cookies}')
+        cookies = _generate_dict_text(
+            req, req._cookies, 'COOKIES', shared_constants
+        )
+        requestify_text.append(f'cookies = {cookies}')
         request_options += ', cookies=cookies'
     else:
         requestify_text.append(None)
 
     if req._data:
-        requestify_text.append(f'data = {req._data}')
+        requestify_text.append(f'data = {code_repr(req._data)}')
         request_options += ', data=data'
     else:
         requestify_text.append(None)
 
     requestify_text.append(
-        f"{REQUEST_VARIABLE_NAME} = requests.{req._method}('{req._url}'{request_options})"
+        f'{REQUEST_VARIABLE_NAME} = requests.{req._method}({code_repr(req._url)}{request_options})'
     )
     return requestify_text
 
@@ -185,10 +270,13 @@ def generate_replacement_base_text(
 
 
 def generate_requestify_function(
-    req: _RequestifyObject, with_headers=True, with_cookies=True
+    req: _RequestifyObject,
+    with_headers=True,
+    with_cookies=True,
+    shared_constants: Optional[dict[str, dict[str, Any]]] = None,
 ) -> Function:
     request_text = generate_requestify_base_text(
-        req, with_headers, with_cookies
+        req, with_headers, with_cookies, shared_constants
     )
     return generate_function_outside_class(
         FunctionBase(req._function_name, request_text)
@@ -206,36 +294,106 @@ def generate_requestify_class(
     )
 
 
+# with shared_constants, the functions reference the constants written by
+# generate_shared_constants_text instead of repeating them
 def generate_requestify_list_function(
-    rl: _RequestifyList, with_headers=True, with_cookies=True
+    rl: _RequestifyList,
+    with_headers=True,
+    with_cookies=True,
+    shared_constants=False,
 ) -> list[Function]:
+    constants = get_shared_constants(rl) if shared_constants else None
     request_functions = [
-        generate_requestify_function(request, with_headers, with_cookies)
+        generate_requestify_function(
+            request, with_headers, with_cookies, constants
+        )
         for request in rl._requests
     ]
     return request_functions
 
 
+# Calls the functions in the order the requests were originally sent,
+# so a deduplicated list still replays every occurrence
+def generate_replay_function(rl: _RequestifyList) -> Function:
+    names = ', '.join(
+        request._function_name for request in rl._get_replay_order()
+    )
+    return generate_function_outside_class(
+        FunctionBase(
+            REPLAY_FUNCTION_NAME,
+            [f'for function in [{names}]:', '\tfunction()'],
+        )
+    )
+
+
 def generate_requestify_list_class(
-    rl: _RequestifyList, with_headers=True, with_cookies=True
+    rl: _RequestifyList,
+    with_headers=True,
+    with_cookies=True,
+    shared_constants=False,
 ) -> Class:
+    constants = get_shared_constants(rl) if shared_constants else None
     class_body = [
         FunctionBase(
             request._function_name,
-            generate_requestify_base_text(request, with_headers, with_cookies),
+            generate_requestify_base_text(
+                request, with_headers, with_cookies, constants
+            ),
         )
         for request in rl._requests
     ]
     return generate_class(REQUEST_CLASS_NAME, class_body)
 
 
+# Runs every step on a thread pool, starting each one as soon as all the
+# workflow entries it reads from exist. Imports what it uses itself, so the
+# class works wherever it is written, not only in generate_module's output.
+def generate_replacement_run_text() -> list[str]:
+    workflow = f'self.{REQUEST_MATCHING_DATA_DICT_NAME}'
+    return [
+        'import concurrent.futures',
+        f'pending = dict(self.{REQUEST_DEPENDENCIES_DICT_NAME})',
+        'running = {}',
+        'with concurrent.futures.ThreadPoolExecutor() as executor:',
+        '\twhile pending or running:',
+        f'\t\tready = [name for name, needs in pending.items() if all(need in {workflow} for need in needs)]',
+        '\t\tfor name in ready:',
+        '\t\t\tdel pending[name]',
+        '\t\t\trunning[executor.submit(getattr(self, name))] = name',
+        '\t\tif not running:',
+        "\t\t\traise RuntimeError(f'Unresolvable dependencies: {sorted(pending)}')",
+        '\t\tdone, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)',
+        '\t\tfor future in done:',
+        '\t\t\tdel running[future]',
+        '\t\t\tfuture.result()',
+        f'return {workflow}',
+    ]
+
+
 def generate_replacement(
-    rreq: _ReplaceRequestify, with_headers=True, with_cookies=True
+    rreq: _ReplaceRequestify,
+    with_headers=True,
+    with_cookies=True,
+    with_run=False,
 ) -> Class:
-    init_function = FunctionBase(
-        '__init__',
-        [f'self.{REQUEST_MATCHING_DATA_DICT_NAME} = {{}}'],
+    class_body = generate_replacement_class_body(
+        rreq, with_headers, with_cookies, with_run
     )
+    return generate_class(REQUEST_CLASS_NAME, class_body)
+
+
+def generate_replacement_class_body(
+    rreq: _ReplaceRequestify,
+    with_headers=True,
+    with_cookies=True,
+    with_run=False,
+) -> list[FunctionBase]:
+    init_body = [f'self.{REQUEST_MATCHING_DATA_DICT_NAME} = {{}}']
+    if with_run:
+        init_body.append(
+            f'self.{REQUEST_DEPENDENCIES_DICT_NAME} = {rreq._dependencies}'
+        )
+    init_function = FunctionBase('__init__', init_body)
 
     class_body = [init_function]
 
@@ -246,4 +404,85 @@ def generate_replacement(
         function = FunctionBase(request._function_name, body)
         class_body.append(function)
 
+    if with_run:
+        class_body.append(FunctionBase('run', generate_replacement_run_text()))
+
+    return class_body
+
+
+"""
+urllib3 text
+"""
+
+
+def generate_urllib3_pool_text() -> str:
+    return f'{URLLIB3_POOL_VARIABLE_NAME} = urllib3.PoolManager()'
+
+
+def _get_urllib3_constant_names(req: _RequestifyObject) -> tuple[str, str]:
+    prefix = req._function_name.upper()
+    return f'{prefix}_HEADERS', f'{prefix}_BODY'
+
+
+# headers (with cookies folded into a single Cookie header) and body are
+# built once at module level, so calling the generated function only does
+# the request itself
+def generate_urllib3_constants_text(
+    req: _RequestifyObject, with_headers=True, with_cookies=True
+) -> list[str]:
+    headers_name, body_name = _get_urllib3_constant_names(req)
+    headers = get_sent_headers(
+        req._headers if with_headers else {},
+        req._cookies if with_cookies else {},
+        req._data,
+    )
+    return [
+        f'{headers_name} = {headers!r}',
+        f'{body_name} = {encode_body(req._data)!r}',
+    ]
+
+
+def generate_urllib3_base_text(req: _RequestifyObject) -> list[str]:
+    headers_name, body_name = _get_urllib3_constant_names(req)
+    return [
+        f"{REQUEST_VARIABLE_NAME} = {URLLIB3_POOL_VARIABLE_NAME}.request('{req._method.upper()}', {code_repr(req._url)}, headers={headers_name}, body={body_name})"
+    ]
+
+
+def generate_urllib3_function(req: _RequestifyObject) -> Function:
+    return generate_function_outside_class(
+        FunctionBase(req._function_name, generate_urllib3_base_text(req))
+    )
+
+
+def generate_urllib3_class(req: _RequestifyObject) -> Class:
+    return generate_class(
+        REQUEST_CLASS_NAME,
+        [FunctionBase(req._function_name, generate_urllib3_base_text(req))],
+    )
+
+
+def generate_urllib3_list_constants_text(
+    rl: _RequestifyList, with_headers=True, with_cookies=True
+) -> list[str]:
+    return [
+        line
+        for request in rl._requests
+        for line in generate_urllib3_constants_text(
+            request, with_headers, with_cookies
+        )
+    ]
+
+
+def generate_urllib3_list_function(rl: _RequestifyList) -> list[Function]:
+    return [generate_urllib3_function(request) for request in rl._requests]
+
+
+def generate_urllib3_list_class(rl: _RequestifyList) -> Class:
+    class_body = [
+        FunctionBase(
+            request._function_name, generate_urllib3_base_text(request)
+        )
+        for request in rl._requests
+    ]
     return generate_class(REQUEST_CLASS_NAME, class_body)
@@ -1,19 +1,59 @@
 from __future__ import annotations
-from typing import Any, TYPE_CHECKING, Optional
+from typing import Any, TYPE_CHECKING, Optional, Iterable, Iterator, TypeVar
 import itertools
-import asyncio
+import functools
+import hashlib
 import json
+import os
 import re
-from urllib.parse import parse_qsl
-import httpx
-import requests
-from werkzeug.urls import url_parse
-from black import format_str, FileMode
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode
 from .constants import URL_REGEX, METHOD_REGEX, OPTS_REGEX, DATA_HANDLER
+from .profiling import timed
 
-
+# httpx, requests, black and werkzeug take most of the import time, so they
+# are imported by the functions that use them, the first time they are called
 if TYPE_CHECKING:
+    import httpx
+    import requests
+    from black import Mode
     from models import _RequestifyObject, _RequestifyList
+    from hedge import HedgePolicy
+    from network import NetworkMetrics
+
+T = TypeVar('T')
+
+
+class CodeExpression(str):
+    """
+    A value that is python code, such as a reference to a previous
+    response, rather than a literal string
+    """
+
+
+def code_repr(value: Any) -> str:
+    """
+    Like repr, but CodeExpressions are written as the code they hold
+    """
+    if isinstance(value, CodeExpression):
+        # urls with replaced path values are f-strings quoted with the same
+        # quotes as the subscripts inside them, which needs python 3.12+
+        if (
+            value.startswith("f'")
+            and value.endswith("'")
+            and '"' not in value
+        ):
+            return f'f"{value[2:-1]}"'
+        return str(value)
+    if isinstance(value, dict):
+        items = ', '.join(
+            f'{code_repr(key)}: {code_repr(v)}' for key, v in value.items()
+        )
+        return f'{{{items}}}'
+    if isinstance(value, list):
+        return f'[{", ".join(code_repr(v) for v in value)}]'
+    return repr(value)
 
 
 def format_url(url: str) -> str:
@@ -62,6 +102,26 @@ def uppercase_boolean_values(
     return ret_opts
 
 
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """s, 2 -> [s0, s1], [s2, s3], [s4]"""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+# Groups lines into cURL commands. A new command starts on every line
+# that begins with `curl`, so commands can span multiple lines.
+def iter_curls(lines: Iterable[str]) -> Iterator[str]:
+    request = ''
+    for line in lines:
+        if line.lstrip().startswith('curl') and request.strip():
+            yield request
+            request = ''
+        request += line
+    if request.strip():
+        yield request
+
+
 def flatten_list(l: list) -> list:
     return list(itertools.chain.from_iterable(l))
 
@@ -91,6 +151,8 @@ def split_list(l: list[str]) -> list[str]:
 
 
 def get_response(requestify_object: _RequestifyObject) -> Any | str:
+    import asyncio
+
     try:
         response = asyncio.run(_get_response_async(requestify_object))
     except TimeoutError:
@@ -101,9 +163,23 @@ def get_response(requestify_object: _RequestifyObject) -> Any | str:
     return response_data
 
 
-def get_responses(requestify_list: _RequestifyList) -> list[Any]:
+def get_responses(
+    requestify_list: _RequestifyList,
+    processes: Optional[int] = None,
+    hedge: Optional[HedgePolicy] = None,
+    metrics: Optional[NetworkMetrics] = None,
+) -> list[Any]:
+    import asyncio
+
+    if processes and processes > 1 and len(requestify_list) > 1:
+        assert hedge is None, 'Hedged requests must be sent from one process'
+        assert metrics is None, 'Metrics must be collected in one process'
+        return _get_responses_processes(list(requestify_list), processes)
+
     try:
-        responses = asyncio.run(_get_responses_async(requestify_list))
+        responses = asyncio.run(
+            _get_responses_async(requestify_list, hedge, metrics=metrics)
+        )
     except TimeoutError:
         print('Async call failed. Using synchronous requests instead')
         responses = _get_responses_requests(requestify_list)
@@ -111,42 +187,111 @@ def get_responses(requestify_list: _RequestifyList) -> list[Any]:
     return [get_json_or_text(response) for response in responses]
 
 
+# every process sends its share of the requests on its own event loop
+def _get_responses_processes(
+    requests: list[_RequestifyObject], processes: int
+) -> list[Any]:
+    from concurrent.futures import ProcessPoolExecutor
+
+    processes = min(processes, len(requests))
+    with ProcessPoolExecutor(processes) as executor:
+        return unshard(executor.map(get_responses, shard(requests, processes)))
+
+
+async def aget_response(
+    requestify_object: _RequestifyObject,
+    client: Optional[httpx.AsyncClient] = None,
+) -> Any | str:
+    """
+    get_response for code running in an event loop, on the given client
+    (so its connection pool is shared) or on a client of its own
+    """
+    response = await _get_response_async(requestify_object, client)
+    return get_json_or_text(response)
+
+
+async def aget_responses(
+    requestify_list: _RequestifyList | list[_RequestifyObject],
+    hedge: Optional[HedgePolicy] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    metrics: Optional[NetworkMetrics] = None,
+) -> list[Any]:
+    """
+    get_responses for code running in an event loop, on the given client
+    (so its connection pool is shared) or on a client of its own
+    """
+    responses = await _get_responses_async(
+        requestify_list, hedge, client, metrics
+    )
+    return [get_json_or_text(response) for response in responses]
+
+
 async def _get_response_async(
     requestify_object: _RequestifyObject,
+    client: Optional[httpx.AsyncClient] = None,
 ) -> httpx._models.Response:
-    async with httpx.AsyncClient() as client:
-        response = await client.request(
-            method=requestify_object._method,
-            url=requestify_object._url,
-            data=requestify_object._data,
-            headers=requestify_object._headers,
-            cookies=requestify_object._cookies,
-        )
+    import httpx
 
-    return response
+    if client is None:
+        async with httpx.AsyncClient() as client:
+            return await _get_response_async(requestify_object, client)
+
+    return await client.request(
+        method=requestify_object._method,
+        url=requestify_object._url,
+        data=requestify_object._data,
+        headers=requestify_object._headers,
+        cookies=requestify_object._cookies,
+    )
 
 
 async def _get_responses_async(
-    requestify_list: _RequestifyList,
+    requestify_list: _RequestifyList | list[_RequestifyObject],
+    hedge: Optional[HedgePolicy] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    metrics: Optional[NetworkMetrics] = None,
 ) -> tuple[httpx._models.Response] | list[Any]:
-    async with httpx.AsyncClient() as client:
-        request = (
-            client.request(
-                method=requestify_object._method,
-                url=requestify_object._url,
-                headers=requestify_object._headers,
-                cookies=requestify_object._cookies,
+    import asyncio
+    import httpx
+    from .hedge import get_endpoint
+
+    if client is None:
+        async with httpx.AsyncClient() as client:
+            return await _get_responses_async(
+                requestify_list, hedge, client, metrics
             )
-            for requestify_object in requestify_list
+
+    async def send(requestify_object: _RequestifyObject):
+        request = functools.partial(
+            client.request,
+            method=requestify_object._method,
+            url=requestify_object._url,
+            headers=requestify_object._headers,
+            cookies=requestify_object._cookies,
         )
-        responses = await asyncio.gather(*request)
+        if metrics is not None:
+            # every send, hedges included, is traced on its own
+            request = functools.partial(
+                metrics.send, requestify_object._function_name, request
+            )
+        with timed('fetch', requestify_object):
+            if hedge is None:
+                return await request()
+            endpoint = get_endpoint(
+                requestify_object._method, requestify_object._url
+            )
+            return await hedge.request(
+                endpoint, requestify_object._method, request
+            )
 
-    return responses
+    return await asyncio.gather(*map(send, requestify_list))
 
 
 def _get_response_requests(
     requestify_object: _RequestifyObject,
 ) -> requests.models.Response:
+    import requests
+
     response = requests.request(
         method=requestify_object._method,
         url=requestify_object._url,
@@ -192,8 +337,222 @@ def get_data_dict(query: str) -> dict[str, str] | str:
     return data if data else alt
 
 
+# Serializes request data the same way requests does when passed as `data=`,
+# so generated urllib3 code can send it as a prebuilt bytes constant
+def encode_body(data: dict[str, Any] | str | bytes) -> Optional[bytes]:
+    if not data:
+        return None
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, dict):
+        return urlencode(data, doseq=True).encode('utf-8')
+    return data.encode('utf-8')
+
+
+# headers with the cookies folded into a single Cookie header
+def fold_cookies(
+    headers: dict[str, Any], cookies: dict[str, Any]
+) -> dict[str, Any]:
+    headers = dict(headers)
+    if cookies:
+        headers['Cookie'] = '; '.join(
+            f'{name}={value}' for name, value in cookies.items()
+        )
+    return headers
+
+
+def get_sent_headers(
+    headers: dict[str, Any],
+    cookies: dict[str, Any],
+    data: dict[str, Any] | str | bytes,
+) -> dict[str, Any]:
+    """
+    The headers to send with encode_body(data): the cookies folded into
+    a Cookie header and, for form encoded data, the Content-Type that
+    requests adds when given data= unless the capture sets its own
+    """
+    headers = fold_cookies(headers, cookies)
+    if (
+        data
+        and isinstance(data, dict)
+        and not any(name.lower() == 'content-type' for name in headers)
+    ):
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+    return headers
+
+
+# round robin, so every shard gets the same mix of items
+def shard(items: list[T], shards: int) -> list[list[T]]:
+    return [items[index::shards] for index in range(shards)]
+
+
+def unshard(shards: Iterable[list[T]]) -> list[T]:
+    """
+    The items of shard's shards, back in their original order
+    """
+    shards = list(shards)
+    items = []
+    for index in range(max(map(len, shards), default=0)):
+        items.extend(part[index] for part in shards if index < len(part))
+    return items
+
+
+# Items that are present, with the same value, in every one of the dicts
+def get_shared_items(dicts: list[dict[str, Any]]) -> dict[str, Any]:
+    if not dicts:
+        return {}
+    first, *rest = dicts
+    return {
+        key: value
+        for key, value in first.items()
+        if all(key in d and d[key] == value for d in rest)
+    }
+
+
+def format_str(string: str, mode: Mode) -> str:
+    import black
+
+    return black.format_str(string, mode=mode)
+
+
+def _get_mode(line_length: Optional[int] = None) -> Mode:
+    import black
+
+    if line_length is None:
+        return black.Mode()
+    return black.Mode(line_length=line_length)
+
+
 def beautify_string(string: str) -> str:
-    return format_str(string, mode=FileMode())
+    with timed('format'):
+        return format_str(string, mode=_get_mode())
+
+
+# separates chunks that are formatted together, so they can be split back
+CHUNK_SEPARATOR = '# requestify: chunk'
+INDENT = '    '
+
+
+class FormatCache:
+    """
+    Formatted code, keyed by a hash of the unformatted code,
+    optionally persisted to a JSON file between runs. It keeps the
+    max_size entries used last, so a long running process (a watch,
+    a daemon) does not grow it forever, and it can be shared by threads.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_size=10_000):
+        self._path = path
+        self._max_size = max_size
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        # reading moves an entry to the end, so every access is locked
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, mode='r', encoding='utf8') as cache_file:
+                # saved least recently used first
+                for key, formatted in json.load(cache_file).items():
+                    self[key] = formatted
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: str):
+        return key in self._entries
+
+    def __getitem__(self, key: str) -> str:
+        with self._lock:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            return self[key]
+        except KeyError:
+            return None
+
+    def __setitem__(self, key: str, formatted: str) -> None:
+        with self._lock:
+            self._entries[key] = formatted
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def key(chunk: str, line_length: int) -> str:
+        from black import __version__ as black_version
+
+        content = f'{black_version}:{line_length}:{chunk}'
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def save(self) -> None:
+        """
+        Writes the entries that are still cached, evicted ones are gone
+        """
+        if self._path:
+            with self._lock:
+                entries = dict(self._entries)
+            with open(self._path, mode='w', encoding='utf8') as cache_file:
+                json.dump(entries, cache_file)
+
+
+def beautify_chunks(
+    chunks: list[str], cache: Optional[FormatCache] = None, indent=0
+) -> list[str]:
+    """
+    Formats top level statements (functions, classes, assignments),
+    reusing cached results and formatting everything else in one call.
+    An indent of 1 formats methods as if they were inside a class.
+    """
+    line_length = _get_mode().line_length - len(INDENT) * indent
+    mode = _get_mode(line_length)
+    cache = cache if cache is not None else FormatCache()
+
+    keys = [FormatCache.key(chunk, line_length) for chunk in chunks]
+    # kept here, as the cache may evict them before they are returned
+    formatted_chunks = {key: cache.get(key) for key in keys}
+    missing = {
+        key: chunk
+        for key, chunk in zip(keys, chunks)
+        if formatted_chunks[key] is None
+    }
+    if missing:
+        separator = f'\n\n{CHUNK_SEPARATOR}\n\n'
+        with timed('format'):
+            formatted = format_str(separator.join(missing.values()), mode=mode)
+        split = re.split(
+            f'^{re.escape(CHUNK_SEPARATOR)}$', formatted, flags=re.MULTILINE
+        )
+        for key, chunk in zip(missing, split):
+            chunk = _indent_lines(chunk.strip('\n'), indent)
+            formatted_chunks[key] = cache[key] = chunk
+
+    return [formatted_chunks[key] for key in keys]
+
+
+# blank lines between chunks, the way black would leave them
+def iter_join_chunks(chunks: Iterable[str]) -> Iterator[str]:
+    previous = ''
+    for chunk in chunks:
+        if previous:
+            is_definition = any(
+                c.startswith(('def ', 'class ', '@'))
+                for c in (previous, chunk)
+            )
+            yield '\n\n\n' if is_definition else '\n\n'
+        yield chunk
+        previous = chunk
+    yield '\n'
+
+
+def join_chunks(chunks: Iterable[str]) -> str:
+    return ''.join(iter_join_chunks(chunks))
+
+
+def _indent_lines(text: str, indent: int) -> str:
+    prefix = INDENT * indent
+    return '\n'.join(
+        prefix + line if line else line for line in text.split('\n')
+    )
 
 
 def beautify_netloc(netloc: str) -> str:
@@ -201,6 +560,12 @@ def beautify_netloc(netloc: str) -> str:
     return re.sub(url_regex, '_', netloc)
 
 
+def url_parse(url: str):
+    from werkzeug.urls import url_parse
+
+    return url_parse(url)
+
+
 def get_netloc(url: str, beautify=False) -> str:
     url_parts = url_parse(url)
 
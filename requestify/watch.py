@@ -0,0 +1,281 @@
+from __future__ import annotations
+import copy
+import ctypes
+import ctypes.util
+import difflib
+import os
+import select
+import struct
+import sys
+import time
+from collections import namedtuple
+from typing import Any, Callable, Optional
+from .models import _RequestifyObject, _RequestifyList, _ReplaceRequestify
+from .utils import FormatCache, iter_curls, join_chunks
+
+Changes = namedtuple('Changes', 'added edited removed errors')
+"""
+numbers of cURL commands added, edited and removed since the last update,
+errors maps the ones that could not be parsed to their error
+"""
+
+# inotify_event is int wd; uint32_t mask, cookie, len; then the name
+INOTIFY_EVENT = struct.Struct('iIII')
+# the file was written, or replaced by a rename (as most editors save)
+IN_CLOSE_WRITE = 0x08
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+
+
+class IncrementalModule:
+    """
+    The module generated from the last version of a capture. An update
+    only parses the cURL commands that are new, black only formats the
+    functions that changed, and in replace mode only new requests are
+    sent (the others are still parsed again, to match their responses).
+    """
+
+    def __init__(self, replace=False, use_ast=False):
+        self.replace = replace
+        self.use_ast = use_ast
+        self._cache = FormatCache()
+        # normalized cURL commands of the last version, in order
+        self._curls: list[str] = []
+        # normalized cURL -> request parsed from it, or why it failed
+        self._parsed: dict[str, _RequestifyObject | str] = {}
+        # fingerprint -> response, of the requests of the last version
+        self._responses: dict[str, Any] = {}
+
+    def update(self, text: str) -> Changes:
+        curls = [
+            _RequestifyObject._normalize(curl)
+            for curl in iter_curls(text.splitlines(keepends=True))
+        ]
+        changes = _count_changes(self._curls, curls)
+
+        parsed = {}
+        for curl in curls:
+            if curl in parsed:
+                continue
+            if curl in self._parsed:
+                parsed[curl] = self._parsed[curl]
+                continue
+            try:
+                parsed[curl] = _RequestifyObject(curl)
+            except (AssertionError, ValueError) as error:
+                parsed[curl] = f'{type(error).__name__}: {error}'
+        self._curls = curls
+        self._parsed = parsed
+
+        errors = {
+            curl: error
+            for curl, error in parsed.items()
+            if isinstance(error, str)
+        }
+        return Changes(*changes, errors)
+
+    def _get_requests(self) -> list[_RequestifyObject]:
+        # copied, as their function names depend on the requests before them
+        function_names = _RequestifyList()
+        requests = []
+        for curl in self._curls:
+            if isinstance(self._parsed[curl], _RequestifyObject):
+                request = copy.copy(self._parsed[curl])
+                function_names._set_function_name(request)
+                requests.append(request)
+        return requests
+
+    def generate(self) -> str:
+        from .output import generate_module, iter_module_chunks
+
+        requests = self._get_requests()
+        if self.replace and requests:
+            # only the responses of requests still in the capture are kept
+            live = {request._fingerprint() for request in requests}
+            self._responses = {
+                fingerprint: response
+                for fingerprint, response in self._responses.items()
+                if fingerprint in live
+            }
+            workflow = _ReplaceRequestify(
+                *(request._base_string for request in requests),
+                responses=self._responses,
+            )
+            return generate_module(
+                workflow, cache=self._cache, use_ast=self.use_ast
+            )
+        chunks = iter_module_chunks(
+            requests, cache=self._cache, use_ast=self.use_ast
+        )
+        return join_chunks(chunks)
+
+
+def _count_changes(old: list[str], new: list[str]) -> tuple[int, int, int]:
+    added = edited = removed = 0
+    matcher = difflib.SequenceMatcher(a=old, b=new, autojunk=False)
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        old_count, new_count = old_end - old_start, new_end - new_start
+        if tag == 'replace':
+            edited += min(old_count, new_count)
+            added += max(0, new_count - old_count)
+            removed += max(0, old_count - new_count)
+        elif tag == 'insert':
+            added += new_count
+        elif tag == 'delete':
+            removed += old_count
+    return added, edited, removed
+
+
+def _get_libc() -> Optional[ctypes.CDLL]:
+    # inotify is only reachable through libc on linux
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, 'inotify_init1') else None
+
+
+class CaptureFile:
+    """
+    A capture file, whose changes are waited for with inotify on linux,
+    and by checking its size and modification time every interval
+    seconds elsewhere (or with polling=True)
+    """
+
+    def __init__(self, path: str, interval=0.5, polling=False):
+        self.path = path
+        self.interval = interval
+        self._stat = self._get_stat()
+        self._fd: Optional[int] = None
+        libc = None if polling else _get_libc()
+        if libc is not None:
+            self._watch(libc)
+
+    def _watch(self, libc: ctypes.CDLL) -> None:
+        fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if fd < 0:
+            return
+        # the directory, as editors often replace the file when saving
+        directory = os.path.dirname(os.path.abspath(self.path))
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            os.close(fd)
+            return
+        self._fd = fd
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def _get_stat(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def read(self) -> str:
+        with open(self.path, mode='r', encoding='utf8') as capture:
+            return capture.read()
+
+    def wait(self) -> bool:
+        """
+        Whether the file may have changed in the next interval seconds
+        """
+        if self._fd is None:
+            time.sleep(self.interval)
+            stat, self._stat = self._stat, self._get_stat()
+            return stat != self._stat
+
+        ready, _, _ = select.select([self._fd], [], [], self.interval)
+        if not ready:
+            return False
+        name = os.fsencode(os.path.basename(self.path))
+        changed = False
+        while True:
+            try:
+                events = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(events):
+                *_, length = INOTIFY_EVENT.unpack_from(events, offset)
+                offset += INOTIFY_EVENT.size
+                event_name = events[offset : offset + length].rstrip(b'\0')
+                changed = changed or event_name == name
+                offset += length
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class Clipboard:
+    """
+    The clipboard, checked for changes every interval seconds
+    """
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+
+    def read(self) -> str:
+        import pyperclip
+
+        return pyperclip.paste()
+
+    def wait(self) -> bool:
+        # there is no way to be told, so it may always have changed
+        time.sleep(self.interval)
+        return True
+
+    def close(self) -> None:
+        pass
+
+
+def format_changes(changes: Changes) -> str:
+    lines = [f'{curl}: {error}' for curl, error in changes.errors.items()]
+    lines.append(
+        f'{changes.added} added, {changes.edited} edited, '
+        f'{changes.removed} removed'
+    )
+    return '\n'.join(lines)
+
+
+def watch(
+    source: CaptureFile | Clipboard,
+    write: Callable[[str], None],
+    module: Optional[IncrementalModule] = None,
+    report: Optional[Callable[[Changes], None]] = None,
+    should_stop: Callable[[], bool] = lambda: False,
+) -> None:
+    """
+    Writes the module generated from the source, and again every time
+    the cURL commands in it change, until should_stop() or Ctrl+C
+    """
+    module = module or IncrementalModule()
+    text = None
+    is_first_read = True
+    try:
+        while not should_stop():
+            if not is_first_read and not source.wait():
+                continue
+            is_first_read = False
+            try:
+                new_text = source.read()
+            except FileNotFoundError:
+                # between an editor removing the file and writing it again
+                continue
+            if new_text == text:
+                continue
+            text = new_text
+            changes = module.update(text)
+            write(module.generate())
+            if report is not None:
+                report(changes)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        source.close()
@@ -0,0 +1,125 @@
+import ast
+import pytest
+from requestify.models import (
+    _ReplaceRequestify,
+    _RequestifyObject,
+    _RequestifyList,
+)
+from requestify.ast_utils import (
+    value_to_ast,
+    generate_request_statements,
+    generate_requestify_list_class_ast,
+    generate_module_ast,
+    unparse_module,
+)
+from requestify.constants import (
+    REQUEST_CLASS_NAME,
+    REQUEST_MATCHING_DATA_DICT_NAME,
+    REQUEST_VARIABLE_NAME,
+)
+from requestify.utils import CodeExpression
+
+GOOGLE = 'https://google.com'
+GITHUB = 'https://github.com'
+
+
+def unparse(statements):
+    module = ast.fix_missing_locations(ast.Module(statements, []))
+    return [ast.unparse(statement) for statement in module.body]
+
+
+class TestValues:
+    @pytest.mark.parametrize(
+        'value',
+        [
+            'text',
+            'has "double" and \'single\' quotes',
+            b'bytes',
+            {'x': [1, 2.5, None, True], 'y': {'z': ('a',)}},
+        ],
+    )
+    def test_literals_round_trip(self, value):
+        assert ast.literal_eval(value_to_ast(value)) == value
+
+    def test_code_expression(self):
+        expression = CodeExpression("self.workflow['get_google_com']['foo']")
+        assert ast.unparse(value_to_ast({'x': expression})) == (
+            "{'x': self.workflow['get_google_com']['foo']}"
+        )
+
+
+class TestRequests:
+    def test_request_statements(self):
+        req = _RequestifyObject(
+            f"""curl -X POST -H 'x: "y"' -H "Cookie: span=eggs" -d '{{"bar": "foo"}}' {GOOGLE}"""
+        )
+        assert unparse(generate_request_statements(req)) == [
+            """headers = {'x': '"y"'}""",
+            "cookies = {'span': 'eggs'}",
+            "data = {'bar': 'foo'}",
+            f"{REQUEST_VARIABLE_NAME} = requests.post('{GOOGLE}', headers=headers, cookies=cookies, data=data)",
+        ]
+
+    def test_request_statements_no_headers_no_cookies(self):
+        req = _RequestifyObject(f"curl -X GET -H 'x: y' {GOOGLE}")
+        assert unparse(generate_request_statements(req, False, False)) == [
+            f"{REQUEST_VARIABLE_NAME} = requests.get('{GOOGLE}')",
+        ]
+
+    def test_list_class(self):
+        rl = _RequestifyList(f'curl -X GET {GOOGLE}', f'curl -X GET {GOOGLE}')
+        class_ast = generate_requestify_list_class_ast(rl)
+        assert class_ast.name == REQUEST_CLASS_NAME
+        assert [f.name for f in class_ast.body] == [
+            'get_google_com',
+            'get_google_com_1',
+        ]
+
+
+class TestModules:
+    def test_requestify_object(self):
+        req = _RequestifyObject(f"curl {GOOGLE} -H 'x: y'")
+        assert unparse_module(generate_module_ast(req)) == (
+            'import requests\n'
+            '\n'
+            '\n'
+            'def get_google_com():\n'
+            "    headers = {'x': 'y'}\n"
+            '    cookies = {}\n'
+            "    request = requests.get('https://google.com', headers=headers, cookies=cookies)\n"
+        )
+
+    def test_shared_constants(self):
+        rl = _RequestifyList(
+            f"curl {GOOGLE} -H 'x: y'",
+            f"curl {GOOGLE}/a -H 'x: y' -H 'z: 1'",
+            f'curl -X POST {GITHUB}',
+        )
+        module = unparse_module(generate_module_ast(rl, shared_constants=True))
+        assert "GOOGLE_COM_HEADERS = {'x': 'y'}" in module
+        assert "headers = {**GOOGLE_COM_HEADERS, 'z': '1'}" in module
+        compile(module, '<generated>', 'exec')
+
+    def test_replacement(self, mocker):
+        mocker.patch(
+            'requestify.models.get_responses',
+            return_value=[{'foo': 1}, None],
+        )
+        rreq = _ReplaceRequestify(
+            f'curl -X GET {GOOGLE}', f'curl -X GET {GOOGLE}/foo/1'
+        )
+        r1, r2 = rreq._requests
+        module = unparse_module(generate_module_ast(rreq))
+        workflow = (
+            f"self.{REQUEST_MATCHING_DATA_DICT_NAME}['{r1._function_name}']"
+        )
+        url = 'f"' + GOOGLE + '/foo/{' + workflow + "['foo']}" + '"'
+        assert f'requests.get({url}, ' in module
+        assert f"{workflow} = {REQUEST_VARIABLE_NAME}" in module
+        assert '    def run(self):' in module
+        compile(module, '<generated>', 'exec')
+
+    def test_output_is_stable(self):
+        rl = _RequestifyList(f"curl {GOOGLE} -H 'x: y'", f'curl {GITHUB}')
+        module = unparse_module(generate_module_ast(rl))
+        assert unparse_module(ast.parse(module)) == module
@@ -0,0 +1,87 @@
+import asyncio
+import httpx
+from requestify.models import _ReplaceRequestify, _RequestifyList
+from requestify.utils import aget_response, aget_responses
+from requestify.__main__ import afrom_file, afrom_string
+from requestify.constants import REQUEST_MATCHING_DATA_DICT_NAME
+
+GOOGLE = 'https://google.com'
+GITHUB = 'https://github.com'
+LOGIN = f'curl -X POST {GOOGLE}/login'
+ORDERS = f"curl -X GET {GITHUB}/orders -H 'token: abc'"
+
+
+def get_client(sent: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(str(request.url))
+        if request.url.path == '/login':
+            return httpx.Response(200, json={'token': 'abc'})
+        return httpx.Response(200, json=[{'id': 1}])
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestAsync:
+    def test_responses_inside_a_running_loop(self):
+        sent = []
+
+        async def main():
+            async with get_client(sent) as client:
+                rl = _RequestifyList(LOGIN, ORDERS)
+                return (
+                    await aget_response(rl[0], client),
+                    await aget_responses(rl, client=client),
+                )
+
+        response, responses = asyncio.run(main())
+        assert response == {'token': 'abc'}
+        assert responses == [{'token': 'abc'}, [{'id': 1}]]
+        assert len(sent) == 3
+
+    def test_replace_matches_like_the_constructor(self, mocker):
+        mocker.patch(
+            'requestify.models.get_responses',
+            return_value=[{'token': 'abc'}, [{'id': 1}]],
+        )
+        expected = _ReplaceRequestify(LOGIN, ORDERS)
+
+        async def main():
+            async with get_client([]) as client:
+                return await _ReplaceRequestify.acreate(
+                    LOGIN, ORDERS, client=client
+                )
+
+        rr = asyncio.run(main())
+        assert rr._requests[1]._headers == {
+            'token': f"self.{REQUEST_MATCHING_DATA_DICT_NAME}"
+            "['post_google_com']['token']"
+        }
+        assert rr._dependencies == expected._dependencies
+        assert [r._headers for r in rr._requests] == [
+            r._headers for r in expected._requests
+        ]
+
+    def test_workflows_share_the_client(self, tmp_path):
+        sent = []
+        path = tmp_path / 'capture.curl'
+        path.write_text(f'{LOGIN}\n{ORDERS}\n')
+
+        async def main():
+            async with get_client(sent) as client:
+                workflows = await asyncio.gather(
+                    *(
+                        afrom_file(str(path), replace=True, client=client)
+                        for _ in range(3)
+                    )
+                )
+                await workflows[0].aappend(f'curl -X GET {GOOGLE}', client)
+                return workflows
+
+        workflows = asyncio.run(main())
+        assert len(sent) == 7
+        assert all(isinstance(w, _ReplaceRequestify) for w in workflows)
+        assert len(workflows[0]._requests) == 3
+
+    def test_from_string(self):
+        request = asyncio.run(afrom_string(LOGIN))
+        assert request._function_name == 'post_google_com'
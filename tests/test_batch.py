@@ -0,0 +1,140 @@
+import json
+import os
+from requestify.batch import (
+    MIN_PARALLEL_FILES,
+    convert_batch,
+    format_batch_result,
+    get_base_directory,
+    get_batch_files,
+    hash_sources,
+    is_batch_pattern,
+)
+from requestify.constants import BATCH_MANIFEST_NAME
+from requestify.output import generate_module
+from requestify.models import _RequestifyObject
+
+GOOGLE = 'https://google.com'
+GITHUB = 'https://github.com'
+
+
+def _write(path, text: str) -> None:
+    os.makedirs(path.parent, exist_ok=True)
+    path.write_text(text)
+
+
+class TestBatch:
+    def setup_captures(self, tmp_path):
+        captures = tmp_path / 'captures'
+        _write(captures / 'google.curl', f'curl -X GET {GOOGLE}\n')
+        _write(
+            captures / 'nested' / 'both.curl',
+            f'curl -X GET {GOOGLE}\ncurl -X POST {GITHUB}\n',
+        )
+        _write(captures / 'notes.txt', 'not a capture')
+        return f'{captures}/**/*.curl', tmp_path / 'out'
+
+    def test_existing_files_are_not_patterns(self, tmp_path):
+        path = tmp_path / 'capture[1].curl'
+        assert is_batch_pattern(str(path))
+        _write(path, f'curl -X GET {GOOGLE}\n')
+        assert not is_batch_pattern(str(path))
+        assert not is_batch_pattern(str(tmp_path / 'capture.curl'))
+
+    def test_files(self, tmp_path):
+        pattern, _ = self.setup_captures(tmp_path)
+        assert get_base_directory(pattern) == str(tmp_path / 'captures')
+        assert get_base_directory('a/b.curl') == 'a'
+        assert list(get_batch_files(pattern)) == [
+            'google.curl',
+            os.path.join('nested', 'both.curl'),
+        ]
+
+    def test_only_changed_files_are_converted(self, tmp_path):
+        pattern, out = self.setup_captures(tmp_path)
+        nested = os.path.join('nested', 'both.curl')
+
+        result = convert_batch(pattern, out, use_ast=True)
+        assert result.converted == ['google.curl', nested]
+        assert (out / 'google.py').read_text() == generate_module(
+            _RequestifyObject(f'curl -X GET {GOOGLE}'), use_ast=True
+        )
+        assert (
+            'def post_github_com' in (out / 'nested' / 'both.py').read_text()
+        )
+
+        result = convert_batch(pattern, out, use_ast=True)
+        assert result.converted == []
+        assert result.unchanged == ['google.curl', nested]
+
+        _write(tmp_path / 'captures' / 'google.curl', f'curl -X POST {GOOGLE}')
+        result = convert_batch(pattern, out, use_ast=True)
+        assert result.converted == ['google.curl']
+        assert 'def post_google_com' in (out / 'google.py').read_text()
+
+        os.remove(out / 'nested' / 'both.py')
+        assert convert_batch(pattern, out, use_ast=True).converted == [nested]
+
+    def test_removed_files(self, tmp_path):
+        pattern, out = self.setup_captures(tmp_path)
+        convert_batch(pattern, out, use_ast=True)
+        os.remove(tmp_path / 'captures' / 'google.curl')
+        result = convert_batch(pattern, out, use_ast=True)
+        assert result.removed == ['google.curl']
+        assert not (out / 'google.py').exists()
+
+    def test_settings_change_converts_everything(self, tmp_path, mocker):
+        pattern, out = self.setup_captures(tmp_path)
+        convert_batch(pattern, out, use_ast=True)
+        assert len(convert_batch(pattern, out).converted) == 2
+
+        mocker.patch('requestify.batch.VERSION', '0.0.0')
+        assert len(convert_batch(pattern, out).converted) == 2
+        manifest = json.loads((out / BATCH_MANIFEST_NAME).read_text())
+        assert manifest['settings']['version'] == '0.0.0'
+
+    def test_uninstalled_version_is_the_sources(self, tmp_path, mocker):
+        package = tmp_path / 'package'
+        _write(package / 'models.py', 'x = 1\n')
+        _write(package / 'notes.txt', 'not a source')
+        before = hash_sources(str(package))
+        (package / 'notes.txt').write_text('changed')
+        assert hash_sources(str(package)) == before
+        (package / 'models.py').write_text('x = 2\n')
+        assert hash_sources(str(package)) != before
+
+        pattern, out = self.setup_captures(tmp_path)
+        mocker.patch('requestify.batch.VERSION', 'unknown')
+        convert_batch(pattern, out, use_ast=True)
+        manifest = json.loads((out / BATCH_MANIFEST_NAME).read_text())
+        assert manifest['settings']['version'].startswith('source ')
+
+    def test_failed_files_are_retried(self, tmp_path):
+        pattern, out = self.setup_captures(tmp_path)
+        _write(tmp_path / 'captures' / 'bad.curl', 'curl nope')
+        result = convert_batch(pattern, out, use_ast=True)
+        assert list(result.failed) == ['bad.curl']
+        assert format_batch_result(result) == (
+            'bad.curl: ValueError: Request method not specified, '
+            'and is not a GET\n2 converted, 0 unchanged, 0 removed, 1 failed'
+        )
+        result = convert_batch(pattern, out, use_ast=True)
+        assert list(result.failed) == ['bad.curl']
+        assert len(result.unchanged) == 2
+
+    def test_processes(self, tmp_path):
+        captures = tmp_path / 'captures'
+        for index in range(MIN_PARALLEL_FILES):
+            _write(
+                captures / f'{index}.curl',
+                f'curl -X GET https://api{index}.example.com',
+            )
+        pattern = f'{captures}/*.curl'
+        convert_batch(pattern, tmp_path / 'serial', use_ast=True, processes=1)
+        result = convert_batch(
+            pattern, tmp_path / 'parallel', use_ast=True, processes=2
+        )
+        assert len(result.converted) == MIN_PARALLEL_FILES
+        for index in range(MIN_PARALLEL_FILES):
+            assert (tmp_path / 'parallel' / f'{index}.py').read_text() == (
+                tmp_path / 'serial' / f'{index}.py'
+            ).read_text()
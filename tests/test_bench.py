@@ -0,0 +1,112 @@
+import json
+import httpx
+import pytest
+from requestify.models import _RequestifyList
+from requestify.bench import bench, prepare, BenchResult
+from requestify.constants import BENCH_TOTAL_NAME
+
+GOOGLE = 'https://google.com'
+GITHUB = 'https://github.com'
+
+
+def _get_client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.host == 'github.com':
+        return httpx.Response(500, content=b'error')
+    return httpx.Response(200, content=b'{"ok": true}')
+
+
+class TestBench:
+    def test_prepare(self):
+        (request,) = _RequestifyList(
+            f"curl -X POST {GOOGLE} -H 'a: b' -H 'Cookie: c=d; e=f' "
+            """-d '{"x": 1}'"""
+        )
+        prepared = prepare(request)
+        assert prepared.method == 'POST'
+        assert prepared.headers == {
+            'a': 'b',
+            'Cookie': 'c=d; e=f',
+            'Content-Type': 'application/x-www-form-urlencoded',
+        }
+        assert prepared.body == b'x=1'
+
+    def test_bench(self):
+        rl = _RequestifyList(
+            f"""curl -X POST {GOOGLE} -d '{{"x": 1}}'""",
+            f'curl -X GET {GITHUB}',
+        )
+        result = bench(
+            rl, iterations=5, concurrency=3, client=_get_client(_handler)
+        )
+
+        google = result.requests['post_google_com']
+        assert google.count == 5
+        assert google.error_count == 0
+        assert google.bytes_sent == 5 * len(b'x=1')
+        assert google.bytes_received == 5 * len(b'{"ok": true}')
+
+        github = result.requests['get_github_com']
+        assert github.statuses == {500: 5}
+        assert github.error_rate == 1
+
+        assert result.total.count == 10
+        assert result.throughput > 0
+
+    def test_exceptions_are_recorded(self):
+        def handler(request):
+            raise httpx.ConnectError('refused', request=request)
+
+        rl = _RequestifyList(f'curl -X GET {GOOGLE}')
+        result = bench(rl, iterations=2, client=_get_client(handler))
+        assert result.requests['get_google_com'].errors == {'ConnectError': 2}
+
+    def test_exceptions_that_are_not_http_errors(self):
+        def handler(request):
+            if request.url.host == 'github.com':
+                raise httpx.StreamClosed()
+            return httpx.Response(200)
+
+        rl = _RequestifyList(f'curl -X GET {GOOGLE}', f'curl -X GET {GITHUB}')
+        rl[0]._url = 'https://exa mple.com:port'
+        result = bench(rl, client=_get_client(handler))
+        assert result.requests['get_google_com'].errors == {'InvalidURL': 1}
+        assert result.requests['get_github_com'].errors == {'StreamClosed': 1}
+
+    def test_nothing_to_replay(self):
+        with pytest.raises(AssertionError):
+            bench([], client=_get_client(_handler))
+
+    def test_reports(self):
+        rl = _RequestifyList(f'curl -X GET {GOOGLE}', f'curl -X GET {GITHUB}')
+        result = bench(rl, iterations=2, client=_get_client(_handler))
+
+        table = result.format_table()
+        assert 'get_google_com' in table
+        assert BENCH_TOTAL_NAME in table
+        assert '4 requests in' in table
+
+        data = json.loads(result.to_json())
+        assert data[BENCH_TOTAL_NAME]['count'] == 4
+        assert data[BENCH_TOTAL_NAME]['errors'] == 2
+        assert set(data[BENCH_TOTAL_NAME]['latency_us']) == {
+            'min',
+            'mean',
+            'p50',
+            'p90',
+            'p99',
+            'max',
+        }
+        assert (
+            BenchResult.from_dict(data).to_dict()['requests']
+            == data['requests']
+        )
+
+    def test_merge(self):
+        rl = _RequestifyList(f'curl -X GET {GOOGLE}')
+        result = bench(rl, iterations=2, client=_get_client(_handler))
+        result.merge(bench(rl, iterations=3, client=_get_client(_handler)))
+        assert result.requests['get_google_com'].count == 5
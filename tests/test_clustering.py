@@ -0,0 +1,154 @@
+from requestify.models import _RequestifyList
+from requestify.clustering import (
+    Slot,
+    cluster_requests,
+    get_table,
+    parametrize,
+    generate_clustered_module,
+)
+from requestify.utils import beautify_string
+
+API = 'https://api.example.com'
+GOOGLE = 'https://google.com'
+
+
+def _get_user_posts(index):
+    return (
+        f"curl '{API}/users/{index}/posts?page={index % 2}&q=x' "
+        f"-H 'x-trace: t{index}' -H 'accept: json'"
+    )
+
+
+class TestClusterRequests:
+    def test_groups_by_shape(self):
+        rl = _RequestifyList(
+            _get_user_posts(1),
+            f'curl {GOOGLE}',
+            _get_user_posts(2),
+            f'curl -X POST {API}/users/1/posts',
+        )
+        clusters = cluster_requests(rl)
+        assert [len(cluster.requests) for cluster in clusters] == [2, 1, 1]
+        assert clusters[0].name == 'get_api_example_com_users_posts'
+        assert clusters[0].slots == [
+            Slot('users_id', 'path', 1),
+            Slot('page', 'query', 0),
+            Slot('x_trace', 'headers', 'x-trace'),
+        ]
+        assert clusters[1].slots == []
+
+    def test_different_keys_are_not_clustered(self):
+        rl = _RequestifyList(
+            f"curl {API}/items -H 'a: 1'", f"curl {API}/items -H 'b: 1'"
+        )
+        assert len(cluster_requests(rl)) == 2
+
+    def test_table(self):
+        rl = _RequestifyList(*(_get_user_posts(i) for i in range(3)))
+        (cluster,) = cluster_requests(rl)
+        assert get_table(cluster) == [
+            ('0', '0', 't0'),
+            ('1', '1', 't1'),
+            ('2', '0', 't2'),
+        ]
+
+    def test_parametrize(self):
+        rl = _RequestifyList(
+            f"curl -X POST {API}/items -d '{{\"a\": 1, \"b\": 1}}'",
+            f"curl -X POST {API}/items -d '{{\"a\": 2, \"b\": 1}}'",
+        )
+        (cluster,) = cluster_requests(rl)
+        request = parametrize(cluster)
+        assert request._url == f'{API}/items'
+        assert request._data == {'a': 'a', 'b': 1}
+        # the clustered requests are left untouched
+        assert cluster.requests[0]._data == {'a': 1, 'b': 1}
+
+    def test_fixed_query_values_are_encoded_again(self):
+        rl = _RequestifyList(
+            *(
+                f"curl -X GET '{API}/items/{i}?q=a%20b%26c&x=1'"
+                for i in range(2)
+            )
+        )
+        request = parametrize(cluster_requests(rl)[0])
+        assert request._url == (f"f'{API}/items/{{items_id}}?q=a+b%26c&x=1'")
+
+
+class TestGenerateClusteredModule:
+    def test_module(self, mocker):
+        rl = _RequestifyList(
+            *(_get_user_posts(i) for i in range(3)), f'curl {GOOGLE}'
+        )
+        for use_ast in (False, True):
+            module = generate_clustered_module(rl, use_ast=use_ast)
+            if not use_ast:
+                assert beautify_string(module) == module
+            assert 'def get_api_example_com_users_posts(' in module
+            assert 'def get_google_com():' in module
+
+            requests = mocker.MagicMock()
+            namespace = {}
+            exec(compile(module, '<generated>', 'exec'), namespace)
+            namespace['requests'] = requests
+            namespace['replay_get_api_example_com_users_posts']()
+            assert [call.args[0] for call in requests.get.call_args_list] == [
+                f'{API}/users/{i}/posts?page={i % 2}&q=x' for i in range(3)
+            ]
+            assert requests.get.call_args_list[1].kwargs['headers'] == {
+                'x-trace': 't1',
+                'accept': 'json',
+            }
+
+    def test_min_cluster_size(self):
+        rl = _RequestifyList(*(_get_user_posts(i) for i in range(2)))
+        module = generate_clustered_module(rl, min_cluster_size=3)
+        assert 'replay_' not in module
+        assert module.count('def ') == 2
+
+    def test_slots_do_not_shadow_generated_names(self, mocker):
+        rl = _RequestifyList(
+            *(
+                f"curl -X POST '{API}/items?requests={i}' "
+                f"-H 'x: 1' -d '{{\"headers\": {i}}}'"
+                for i in range(2)
+            )
+        )
+        (cluster,) = cluster_requests(rl)
+        assert [slot.name for slot in cluster.slots] == [
+            'requests_1',
+            'headers_1',
+        ]
+
+        module = generate_clustered_module(rl, use_ast=True)
+        requests = mocker.MagicMock()
+        namespace = {}
+        exec(compile(module, '<generated>', 'exec'), namespace)
+        namespace['requests'] = requests
+        namespace['replay_post_api_example_com_items']()
+        assert [call.args[0] for call in requests.post.call_args_list] == [
+            f'{API}/items?requests={i}' for i in range(2)
+        ]
+        assert [
+            call.kwargs['data'] for call in requests.post.call_args_list
+        ] == [{'headers': i} for i in range(2)]
+        assert requests.post.call_args.kwargs['headers'] == {'x': '1'}
+
+    def test_cluster_names_differ_from_unclustered_functions(self, mocker):
+        rl = _RequestifyList(
+            f'curl {API}/about', f'curl {API}/12', f'curl {API}/13'
+        )
+        module = generate_clustered_module(rl, use_ast=True)
+        assert module.count('def get_api_example_com(') == 1
+
+        requests = mocker.MagicMock()
+        namespace = {}
+        exec(compile(module, '<generated>', 'exec'), namespace)
+        namespace['requests'] = requests
+        namespace['get_api_example_com']()
+        namespace['replay_get_api_example_com_3']()
+        assert [call.args[0] for call in requests.get.call_args_list] == [
+            f'{API}/about',
+            f'{API}/12',
+            f'{API}/13',
+        ]
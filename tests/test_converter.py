@@ -0,0 +1,115 @@
+import httpx
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from requestify.converter import (
+    Conversion,
+    ConversionError,
+    Converter,
+    ConverterConfig,
+)
+from requestify.models import _RequestifyList
+from requestify.output import generate_module
+from requestify.constants import REQUEST_CLASS_NAME
+
+MockClient = httpx.AsyncClient
+
+GOOGLE = 'https://google.com'
+GITHUB = 'https://github.com'
+LOGIN = f'curl -X POST {GOOGLE}/login'
+ORDERS = f"curl -X GET {GITHUB}/orders -H 'token: abc'"
+BAD_HEADER = f"curl -X GET {GOOGLE} -H 'no separator'"
+
+
+class TestConverter:
+    def test_config_cannot_change(self):
+        converter = Converter(ConverterConfig(use_ast=True))
+        with pytest.raises(AttributeError):
+            converter.config = ConverterConfig()
+        with pytest.raises(AttributeError):
+            converter.config.use_ast = False
+
+    def test_convert(self):
+        converter = Converter(ConverterConfig(use_ast=True))
+        assert converter.convert(f'{LOGIN}\n{ORDERS}\n') == Conversion(
+            generate_module(_RequestifyList(LOGIN, ORDERS), use_ast=True), []
+        )
+
+    def test_errors_are_returned_not_printed(self, capsys):
+        converter = Converter()
+        code, errors = converter.convert(f'{BAD_HEADER}\n{LOGIN}\n')
+        assert errors == [
+            ConversionError(
+                BAD_HEADER, 'ValueError', 'Invalid header: no separator'
+            )
+        ]
+        assert 'def post_google_com' in code
+        assert converter.convert(BAD_HEADER).code is None
+        assert capsys.readouterr().out == ''
+
+    def test_threads_share_a_converter(self):
+        converter = Converter()
+        texts = [
+            f'curl -X GET {GOOGLE}/{index % 5}\n{LOGIN}\n'
+            for index in range(50)
+        ]
+        expected = [Converter().convert(text) for text in texts]
+        with ThreadPoolExecutor(8) as executor:
+            assert list(executor.map(converter.convert, texts)) == expected
+
+    def test_replays_share_one_client(self, mocker):
+        clients = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={'token': 'abc'})
+
+        def get_client(**_):
+            clients.append(MockClient(transport=httpx.MockTransport(handler)))
+            return clients[-1]
+
+        mocker.patch('httpx.AsyncClient', side_effect=get_client)
+        with Converter(ConverterConfig(replace=True)) as converter:
+            with ThreadPoolExecutor(4) as executor:
+                conversions = list(
+                    executor.map(converter.convert, [f'{LOGIN}\n{ORDERS}'] * 8)
+                )
+        assert len(clients) == 1
+        assert clients[0].is_closed
+        for code, errors in conversions:
+            assert errors == []
+            assert f'class {REQUEST_CLASS_NAME}' in code
+
+    def test_replays_do_not_share_cookies(self, mocker):
+        sent = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            sent.append(request.headers.get('cookie'))
+            return httpx.Response(
+                200, json={'token': 'abc'}, headers={'set-cookie': 'id=1'}
+            )
+
+        mocker.patch(
+            'httpx.AsyncClient',
+            side_effect=lambda **kwargs: MockClient(
+                transport=httpx.MockTransport(handler), **kwargs
+            ),
+        )
+        login = f"{LOGIN} -H 'Cookie: session=a'"
+        with Converter(ConverterConfig(replace=True)) as converter:
+            for _ in range(2):
+                assert converter.convert(f'{login}\n{ORDERS}').errors == []
+        assert sent == ['session=a', None] * 2
+
+    def test_replay_errors_are_returned(self, mocker):
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.InvalidURL('bad url')
+
+        mocker.patch(
+            'httpx.AsyncClient',
+            side_effect=lambda **kwargs: MockClient(
+                transport=httpx.MockTransport(handler), **kwargs
+            ),
+        )
+        with Converter(ConverterConfig(replace=True)) as converter:
+            assert converter.convert(f'{LOGIN}\n{ORDERS}') == Conversion(
+                None, [ConversionError(None, 'InvalidURL', 'bad url')]
+            )
@@ -0,0 +1,141 @@
+import json
+import os
+import socket
+import stat
+import sys
+import subprocess
+import threading
+import httpx
+import pytest
+from requestify.__main__ import get_args, get_daemon_job
+from requestify.daemon import Daemon, EventLoopThread, send_job
+
+GOOGLE = 'https://google.com'
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, 'AF_UNIX'), reason='needs unix sockets'
+)
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    # unix socket paths are limited to about a hundred characters
+    path = tmp_path / 'requestify.sock'
+    return str(path) if len(str(path)) < 100 else f'/tmp/rq-{os.getpid()}.sock'
+
+
+def _serve(path: str, job):
+    daemon = Daemon(path, job)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    return daemon
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={'path': request.url.path})
+
+
+class TestDaemon:
+    def test_jobs(self, socket_path, tmp_path):
+        def job(argv, stdout):
+            if argv == ['fail']:
+                raise ValueError('no')
+            if argv == ['exit']:
+                sys.exit(2)
+            print('printed')
+            stdout.write(f'{os.getcwd()} {argv}')
+
+        daemon = _serve(socket_path, job)
+        try:
+            response = send_job(socket_path, ['a'], cwd=str(tmp_path))
+            assert response == {
+                'stdout': f'printed\n{tmp_path} [\'a\']',
+                'stderr': '',
+                'status': 0,
+            }
+            response = send_job(socket_path, ['fail'])
+            assert response['status'] == 1
+            assert 'ValueError: no' in response['stderr']
+            assert send_job(socket_path, ['exit'])['status'] == 2
+        finally:
+            daemon.shutdown()
+            daemon.server_close()
+        assert not os.path.exists(socket_path)
+
+    def test_stale_socket(self, socket_path):
+        open(socket_path, 'w').close()
+        daemon = Daemon(socket_path, lambda argv, stdout: None)
+        assert stat.S_ISSOCK(os.stat(socket_path).st_mode)
+        daemon.server_close()
+
+    def test_already_serving(self, socket_path):
+        daemon = _serve(socket_path, lambda argv, stdout: None)
+        try:
+            with pytest.raises(AssertionError):
+                Daemon(socket_path, lambda argv, stdout: None)
+        finally:
+            daemon.shutdown()
+            daemon.server_close()
+
+
+class TestDaemonJob:
+    def test_convert_and_replay(self, socket_path, tmp_path):
+        loop = EventLoopThread()
+        client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+        job = get_daemon_job(get_args(), client, loop.run)
+        daemon = _serve(socket_path, job)
+        try:
+            response = send_job(socket_path, ['-s', f'curl -X GET {GOOGLE}'])
+            assert 'def get_google_com' in response['stdout']
+
+            response = send_job(
+                socket_path,
+                [
+                    '--bench',
+                    '--json',
+                    '-n',
+                    '3',
+                    '-s',
+                    f'curl -X GET {GOOGLE}',
+                ],
+            )
+            report = json.loads(response['stdout'])
+            assert report['total']['statuses'] == {'200': 3}
+
+            # -o is relative to the client's directory
+            send_job(
+                socket_path,
+                ['-s', f'curl -X GET {GOOGLE}', '-o', 'out.py'],
+                cwd=str(tmp_path),
+            )
+            assert 'get_google_com' in (tmp_path / 'out.py').read_text()
+
+            response = send_job(socket_path, ['--nope'])
+            assert response['status'] == 2
+            assert 'unrecognized arguments' in response['stderr']
+        finally:
+            daemon.shutdown()
+            daemon.server_close()
+            loop.run(client.aclose())
+            loop.close()
+
+    def test_thin_client(self, socket_path):
+        daemon = _serve(socket_path, get_daemon_job(get_args()))
+        try:
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    '-m',
+                    'requestify.daemon',
+                    socket_path,
+                    '-s',
+                    f'curl -X GET {GOOGLE}',
+                ],
+                capture_output=True,
+                text=True,
+            )
+        finally:
+            daemon.shutdown()
+            daemon.server_close()
+        assert result.returncode == 0
+        assert 'def get_google_com' in result.stdout
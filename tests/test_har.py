@@ -0,0 +1,179 @@
+import io
+import os
+import json
+import shlex
+import time
+import httpx
+import pytest
+from requestify.models import _RequestifyObject, _RequestifyList
+from requestify.har import (
+    iter_har_entries,
+    har_entry_to_curl,
+    iter_har_curls,
+    iter_har_requests,
+    get_har_entries,
+    replay_har,
+)
+from requestify.output import iter_ndjson_records
+from requestify.__main__ import get_args, _get_ndjson_inputs
+
+HAR_FILE = os.path.join(os.path.dirname(__file__), 'test_files', 'capture.har')
+
+
+def _get_client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _get_entry(url: str) -> dict:
+    return {
+        'startedDateTime': '2022-06-01T10:00:00.000Z',
+        'request': {
+            'method': 'POST',
+            'url': url,
+            'headers': [],
+            'postData': {'text': '{"name": "O\'Brien"}'},
+        },
+    }
+
+
+class TestHar:
+    def test_entries_are_streamed(self, tmp_path, monkeypatch):
+        entries = [
+            {**_get_entry(f'https://api.example.com/{i}'), 'n': 10**20 + i}
+            for i in range(20)
+        ]
+        har = {
+            'before': [{'entries': []}, 'log'],
+            'log': {
+                'pages': [{'title': '"entries": ['}],
+                'entries': entries,
+                'comment': 1.5,
+            },
+        }
+        path = tmp_path / 'capture.har'
+        path.write_text(json.dumps(har, indent=1))
+        # every entry is split across reads
+        monkeypatch.setattr('requestify.har.HAR_READ_SIZE', 7)
+        assert list(iter_har_entries(str(path))) == entries
+
+        path.write_text(json.dumps(har)[:-20])
+        with pytest.raises(ValueError):
+            list(iter_har_entries(str(path)))
+
+    def test_har_entry_to_curl(self):
+        post, get, _ = iter_har_entries(HAR_FILE)
+        assert har_entry_to_curl(get) == (
+            "curl -X GET https://api.example.com/items "
+            "-H 'accept: application/json' "
+            "-H 'cookie: session=abc; theme=dark'"
+        )
+        # pseudo headers and content-length are left out
+        assert har_entry_to_curl(post) == (
+            "curl -X POST https://api.example.com/items "
+            "-H 'content-type: application/json' "
+            """--data-binary '{"name": "it'"'"'s", "n": 1}'"""
+        )
+
+    def test_curls_are_valid_shell(self):
+        post, *_ = iter_har_curls(iter_har_entries(HAR_FILE))
+        assert shlex.split(post)[-1] == '{"name": "it\'s", "n": 1}'
+
+    def test_iter_har_requests(self):
+        requests = list(iter_har_requests(iter_har_entries(HAR_FILE)))
+        assert [request._function_name for request in requests] == [
+            'post_api_example_com',
+            'get_api_example_com',
+            'get_api_example_com_1',
+        ]
+        assert requests[2]._url.endswith('?q=a.b,c&page=2')
+        assert requests[1]._cookies == {'session': 'abc', 'theme': 'dark'}
+        assert requests[0]._headers == {'content-type': 'application/json'}
+
+    def test_entries(self):
+        entries = get_har_entries(iter_har_entries(HAR_FILE))
+        assert [entry.offset for entry in entries] == [0, 0.5, 1]
+        get, post, search = [entry.request for entry in entries]
+        assert post._data == b'{"name": "it\'s", "n": 1}'
+        # kept as captured, even where the cURL parser would not
+        assert search._url == 'https://api.example.com/search?q=a.b,c&page=2'
+
+    def test_entries_the_curl_parser_would_not_find(self):
+        urls = [
+            'http://localhost/x',
+            'https://api.example.com:8443/items?ids=1,2',
+        ]
+        entries = get_har_entries([_get_entry(url) for url in urls])
+        requests = [entry.request for entry in entries]
+        assert [request._url for request in requests] == urls
+        assert [request._function_name for request in requests] == [
+            'post_localhost',
+            'post_api_example_com_8443',
+        ]
+        assert requests[0]._data == b'{"name": "O\'Brien"}'
+
+    def test_invalid_entries_are_skipped(self):
+        entries = [
+            _get_entry('https://api.example.com/a'),
+            _get_entry('not a url'),
+            {'request': {'url': 'https://api.example.com/b'}},
+            dict(_get_entry('https://api.example.com/c'), startedDateTime=''),
+            _get_entry('https://api.example.com/d'),
+        ]
+        skipped = []
+        report = lambda index, error: skipped.append(
+            (index, type(error).__name__)
+        )
+        requests = [
+            entry.request for entry in get_har_entries(entries, report)
+        ]
+        assert [request._url[-1] for request in requests] == ['a', 'd']
+        assert skipped == [
+            (1, 'ValueError'),
+            (2, 'KeyError'),
+            (3, 'ValueError'),
+        ]
+
+        skipped.clear()
+        assert len(list(iter_har_requests(entries, report))) == 3
+        assert [index for index, _ in skipped] == [1, 2]
+
+    def test_ndjson_entries_from_stdin(self, monkeypatch):
+        entries = iter_har_entries(HAR_FILE)
+        lines = [json.dumps(entry) + '\n' for entry in entries]
+        monkeypatch.setattr('sys.stdin', io.StringIO(''.join(lines) + '\n'))
+        args = get_args().parse_args(['--ndjson', '-har', '-'])
+        records = [
+            json.loads(record)
+            for record in iter_ndjson_records(*_get_ndjson_inputs(args))
+        ]
+        assert [record['function_name'] for record in records] == [
+            'post_api_example_com',
+            'get_api_example_com',
+            'get_api_example_com_1',
+        ]
+        assert records[0]['data'] == '{"name": "it\'s", "n": 1}'
+
+    def test_replay_follows_capture(self):
+        sent = []
+
+        def handler(request):
+            sent.append(
+                (time.perf_counter(), request.method, str(request.url))
+            )
+            return httpx.Response(200, content=b'ok')
+
+        entries = get_har_entries(iter_har_entries(HAR_FILE))
+        start = time.perf_counter()
+        result = replay_har(entries, speed=10, client=_get_client(handler))
+
+        assert [(method, url) for _, method, url in sent] == [
+            ('GET', 'https://api.example.com/items'),
+            ('POST', 'https://api.example.com/items'),
+            ('GET', 'https://api.example.com/search?q=a.b,c&page=2'),
+        ]
+        offsets = [at - start for at, _, _ in sent]
+        # 0, 0.5 and 1 second, 10 times faster
+        assert 0.04 <= offsets[1] < 0.09
+        assert 0.09 <= offsets[2] < 0.15
+        assert result.total.count == 3
+        assert result.requests['post_api_example_com'].bytes_sent == 24
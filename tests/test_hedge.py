@@ -0,0 +1,180 @@
+import asyncio
+import httpx
+import pytest
+from requestify.models import _RequestifyList
+from requestify.bench import bench
+from requestify.hedge import HedgePolicy, get_endpoint
+from requestify.utils import _get_responses_async
+
+GOOGLE = 'https://google.com'
+# kept, as a test patches httpx.AsyncClient
+MockClient = httpx.AsyncClient
+
+
+def _slow_first_handler(cancelled: list):
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(0.3)
+            except asyncio.CancelledError:
+                cancelled.append(request)
+                raise
+            return httpx.Response(200, json={'copy': 'first'})
+        return httpx.Response(200, json={'copy': len(calls)})
+
+    return handler
+
+
+def _get_client(handler) -> httpx.AsyncClient:
+    return MockClient(transport=httpx.MockTransport(handler))
+
+
+async def _request(policy, method, handler):
+    async with _get_client(handler) as client:
+        return await policy.request(
+            'endpoint', method, lambda: client.request(method, GOOGLE)
+        )
+
+
+class TestHedgePolicy:
+    def test_delay_before_and_after_samples(self):
+        policy = HedgePolicy(min_samples=5, delay=0.5)
+        assert policy.get_delay('a', 'GET') == 0.5
+        for latency in range(1000, 6000, 1000):
+            policy.record('a', latency)
+        assert policy.get_delay('a', 'get') == 0.005
+        assert policy.get_delay('b', 'GET') == 0.5
+        assert policy.get_delay('a', 'POST') is None
+        assert HedgePolicy().get_delay('a', 'GET') is None
+
+    def test_hedge_wins(self):
+        cancelled = []
+        policy = HedgePolicy(budget=1, delay=0.01)
+        response = asyncio.run(
+            _request(policy, 'GET', _slow_first_handler(cancelled))
+        )
+        assert response.json() == {'copy': 2}
+        assert (policy.requests, policy.hedged, policy.won) == (1, 1, 1)
+        # the slow copy does not keep running
+        assert len(cancelled) == 1
+        assert policy.latencies['endpoint'].count == 1
+
+    def test_losing_copy_is_done_before_returning(self):
+        cancelled = []
+        policy = HedgePolicy(budget=1, delay=0.01)
+
+        async def main():
+            await _request(policy, 'GET', _slow_first_handler(cancelled))
+            # nothing is left pending for the event loop to destroy
+            assert asyncio.all_tasks() == {asyncio.current_task()}
+            return len(cancelled)
+
+        assert asyncio.run(main()) == 1
+
+    def test_not_idempotent(self):
+        policy = HedgePolicy(budget=1, delay=0.01)
+        response = asyncio.run(
+            _request(policy, 'POST', _slow_first_handler([]))
+        )
+        assert response.json() == {'copy': 'first'}
+        assert policy.hedged == 0
+
+    def test_budget(self):
+        policy = HedgePolicy(budget=0.5, delay=0.01)
+        copies = [
+            asyncio.run(
+                _request(policy, 'GET', _slow_first_handler([]))
+            ).json()['copy']
+            for _ in range(4)
+        ]
+        assert copies == [2, 'first', 2, 'first']
+        assert policy.to_dict() == {
+            'requests': 4,
+            'hedged': 2,
+            'won': 2,
+            'hedge_rate': 0.5,
+            'win_rate': 1.0,
+        }
+        assert policy.format_summary() == (
+            'hedged 2 of 4 requests (50.0%), 2 hedges won (100.0%)'
+        )
+
+    def test_failed_copy_waits_for_the_other(self):
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            if len(calls) == 1:
+                await asyncio.sleep(0.05)
+                raise httpx.ConnectError('refused', request=request)
+            await asyncio.sleep(0.1)
+            return httpx.Response(200)
+
+        policy = HedgePolicy(budget=1, delay=0.01)
+        response = asyncio.run(_request(policy, 'GET', handler))
+        assert response.status_code == 200
+        assert policy.won == 1
+
+    def test_every_copy_failed(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectError('refused', request=request)
+
+        policy = HedgePolicy(budget=1, delay=0.01)
+        with pytest.raises(httpx.ConnectError):
+            asyncio.run(_request(policy, 'GET', handler))
+        assert 'endpoint' not in policy.latencies
+
+    def test_endpoint(self):
+        assert get_endpoint('get', f'{GOOGLE}/users/1/posts?page=2') == (
+            'GET google.com/users/{}/posts'
+        )
+        assert get_endpoint('POST', f'{GOOGLE}:8443') == 'POST google.com:8443'
+
+
+class TestHedgedReplay:
+    def test_bench(self):
+        rl = _RequestifyList(f'curl -X GET {GOOGLE}')
+        policy = HedgePolicy(budget=1, delay=0.01)
+        result = bench(
+            rl, client=_get_client(_slow_first_handler([])), hedge=policy
+        )
+        assert result.total.statuses == {200: 1}
+        assert result.total.latency.max < 200_000
+        assert policy.won == 1
+
+    def test_get_responses(self, mocker):
+        handler = _slow_first_handler([])
+        mocker.patch(
+            'httpx.AsyncClient',
+            new=lambda: _get_client(handler),
+        )
+        rl = _RequestifyList(f'curl -X GET {GOOGLE}')
+        policy = HedgePolicy(budget=1, delay=0.01)
+        (response,) = asyncio.run(_get_responses_async(rl, policy))
+        assert response.json() == {'copy': 2}
+        assert list(policy.latencies) == ['GET google.com']
+
+    def test_adaptive_delay(self):
+        # requests for different resources of an endpoint share latencies,
+        # so the default policy learns its delay and hedges the slow one
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            if request.url.path == '/items/25' and len(calls) == 26:
+                await asyncio.sleep(0.5)
+            return httpx.Response(200)
+
+        rl = _RequestifyList(
+            *(f'curl -X GET {GOOGLE}/items/{i}' for i in range(30))
+        )
+        policy = HedgePolicy(budget=1)
+        result = bench(
+            rl, concurrency=1, client=_get_client(handler), hedge=policy
+        )
+        assert list(policy.latencies) == ['GET google.com/items/{}']
+        assert policy.won >= 1
+        assert result.total.latency.max < 300_000
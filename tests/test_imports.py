@@ -0,0 +1,44 @@
+import subprocess
+import sys
+import pytest
+
+HEAVY_MODULES = ('black', 'httpx', 'requests')
+
+PARSE = (
+    'from requestify.models import _RequestifyObject\n'
+    "request = _RequestifyObject(\"curl -X GET 'https://google.com/1' "
+    "-H 'a: b'\")\n"
+    'request._url, request._headers, request._function_name\n'
+)
+GENERATE_AST = (
+    'from requestify.models import _RequestifyList\n'
+    'from requestify.output import generate_module\n'
+    "generate_module(_RequestifyList('curl https://google.com'), "
+    'use_ast=True)\n'
+)
+CLI = 'import requestify.__main__\n'
+
+
+# every case runs in a fresh interpreter, as pytest has imported them all
+def _get_imported(code: str, modules: tuple[str, ...]) -> list[str]:
+    check = f'import sys\nprint(*(m for m in {modules!r} if m in sys.modules))'
+    output = subprocess.run(
+        [sys.executable, '-c', code + check],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return output.split()
+
+
+class TestImports:
+    @pytest.mark.parametrize('code', (PARSE, GENERATE_AST, CLI))
+    def test_heavy_modules_are_not_imported(self, code):
+        assert _get_imported(code, HEAVY_MODULES) == []
+
+    def test_formatting_imports_black(self):
+        code = (
+            'from requestify.utils import beautify_string\n'
+            "beautify_string('x=1')\n"
+        )
+        assert _get_imported(code, HEAVY_MODULES) == ['black']
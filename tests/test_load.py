@@ -0,0 +1,108 @@
+import asyncio
+import time
+import httpx
+import pytest
+from requestify.models import _RequestifyList
+from requestify.bench import prepare, timed_request
+from requestify.load import (
+    Stage,
+    get_stages,
+    iter_schedule,
+    load,
+    LoadResult,
+)
+
+GOOGLE = 'https://google.com'
+GITHUB = 'https://github.com'
+
+
+def _get_client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, content=b'ok')
+
+
+class TestSchedule:
+    def test_constant_rate(self):
+        schedule = list(iter_schedule([Stage(1, 10, 10)]))
+        assert schedule == pytest.approx([i / 10 for i in range(10)])
+
+    def test_ramp_up(self):
+        schedule = list(iter_schedule(get_stages(10, 3, ramp_up=2)))
+        # 10 requests are due during the ramp, 10 more in the last second
+        assert len(schedule) == 20
+        assert schedule == sorted(schedule)
+        gaps = [b - a for a, b in zip(schedule, schedule[1:10])]
+        assert gaps == sorted(gaps, reverse=True)
+        assert schedule[10:] == pytest.approx([2 + i / 10 for i in range(10)])
+
+    def test_ramp_down(self):
+        schedule = list(iter_schedule([Stage(2, 10, 0)]))
+        assert len(schedule) == 10
+        assert max(schedule) < 2
+
+    def test_stages(self):
+        assert get_stages(5, 10) == [Stage(10, 5, 5)]
+        assert get_stages(5, 10, ramp_up=10) == [Stage(10, 0, 5)]
+        with pytest.raises(AssertionError):
+            get_stages(5, 10, ramp_up=11)
+
+
+class TestLoad:
+    def test_load(self):
+        rl = _RequestifyList(f'curl -X GET {GOOGLE}', f'curl -X GET {GITHUB}')
+        result = load(
+            rl,
+            [Stage(0.2, 100, 100)],
+            weights=[3, 1],
+            client=_get_client(_handler),
+            seed=1,
+        )
+        assert result.total.count == 20
+        google = result.requests['get_google_com'].count
+        github = result.requests['get_github_com'].count
+        assert google > github
+        assert result.send_lag.count == 20
+        assert 'send lag' in result.format_table()
+
+    def test_requests_are_not_waited_for(self):
+        async def slow_handler(request):
+            await asyncio.sleep(0.2)
+            return httpx.Response(200)
+
+        rl = _RequestifyList(f'curl -X GET {GOOGLE}')
+        start = time.perf_counter()
+        result = load(
+            rl, [Stage(0.1, 100, 100)], client=_get_client(slow_handler)
+        )
+        # 10 requests taking 0.2s each, all sent in the first 0.1s
+        assert result.total.count == 10
+        assert time.perf_counter() - start < 1
+        assert result.total.latency.min >= 200_000
+
+    def test_latency_counts_from_intended_start(self):
+        (request,) = _RequestifyList(f'curl -X GET {GOOGLE}')
+
+        async def send():
+            async with _get_client(_handler) as client:
+                intended_start = time.perf_counter_ns() - 100_000_000
+                return await timed_request(
+                    client, prepare(request), intended_start
+                )
+
+        assert asyncio.run(send()).latency >= 100_000
+
+    def test_weights_must_match_requests(self):
+        rl = _RequestifyList(f'curl -X GET {GOOGLE}')
+        with pytest.raises(AssertionError):
+            load(rl, [Stage(0.1, 10, 10)], weights=[1, 2])
+
+    def test_dict_round_trip(self):
+        rl = _RequestifyList(f'curl -X GET {GOOGLE}')
+        result = load(
+            rl, [Stage(0.05, 100, 100)], client=_get_client(_handler)
+        )
+        data = result.to_dict()
+        assert LoadResult.from_dict(data).to_dict() == data
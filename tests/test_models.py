@@ -4,6 +4,7 @@ from requestify.models import (
     _ReplaceRequestify,
     _RequestifyObject,
     _RequestifyList,
+    iter_requestify,
 )
 from .helpers import mock_get_responses
 from requestify.constants import REQUEST_MATCHING_DATA_DICT_NAME
@@ -175,8 +176,106 @@ class TestRequestifyList(object):
             'post_github_com': 1,
         }
 
+    def test_iter_requestify(self):
+        r1 = f'curl -X GET {GOOGLE}'
+        r2 = f'curl -X POST {GITHUB}'
+
+        requests = iter_requestify(iter([r1, r1, r2, r1]))
+        assert [r._function_name for r in requests] == [
+            'get_google_com',
+            'get_google_com_1',
+            'post_github_com',
+            'get_google_com_2',
+        ]
+
+    def test_deduplicate(self, mocker):
+        r1 = f"curl {GOOGLE} -H 'a: 1' -H 'b: 2'"
+        # same request, headers in a different order
+        r2 = f"curl {GOOGLE} -H 'b: 2' -H 'a: 1'"
+        r3 = f'curl -X POST {GITHUB}'
+        parse = mocker.spy(_RequestifyObject, '_generate')
+
+        rl = _RequestifyList(r1, r3, r1, r2, r3, deduplicate=True)
+        assert [r._function_name for r in rl] == [
+            'get_google_com',
+            'post_github_com',
+        ]
+        # every distinct cURL string is parsed once
+        assert parse.call_count == 3
+        assert rl._get_occurrences() == {
+            'get_google_com': [0, 2, 3],
+            'post_github_com': [1, 4],
+        }
+        assert [r._function_name for r in rl._get_replay_order()] == [
+            'get_google_com',
+            'post_github_com',
+            'get_google_com',
+            'get_google_com',
+            'post_github_com',
+        ]
+
+    def test_fingerprint(self):
+        fingerprint = _RequestifyObject(
+            f"curl {GOOGLE} -H 'a: 1'"
+        )._fingerprint()
+        assert (
+            _RequestifyObject(f"curl -X GET {GOOGLE} -H 'a: 1'")._fingerprint()
+            == fingerprint
+        )
+        assert (
+            _RequestifyObject(f"curl {GOOGLE} -H 'a: 2'")._fingerprint()
+            != fingerprint
+        )
+
+    def test_extend_names_like_the_constructor(self):
+        curls = [f'curl {GOOGLE}', f'curl -X POST {GITHUB}', f'curl {GOOGLE}']
+        rl = _RequestifyList(curls[0])
+        assert [r._function_name for r in rl.extend(curls[1:])] == [
+            'post_github_com',
+            'get_google_com_1',
+        ]
+        assert rl.append(f'curl {GOOGLE}')._function_name == 'get_google_com_2'
+        expected = _RequestifyList(*curls, f'curl {GOOGLE}')
+        assert [r._function_name for r in rl] == [
+            r._function_name for r in expected
+        ]
+        assert rl._positions == expected._positions
+
+    def test_append_deduplicated(self):
+        rl = _RequestifyList(f'curl {GOOGLE}', deduplicate=True)
+        assert rl.append(f'curl {GOOGLE}') is None
+        assert rl.append(f"curl {GITHUB} -H 'a: 1'")._function_name == (
+            'get_github_com'
+        )
+        assert rl.append(f"curl -X GET {GITHUB} -H 'a: 1'") is None
+        assert rl._get_occurrences() == {
+            'get_google_com': [0, 1],
+            'get_github_com': [2, 3],
+        }
+
+    def test_replay_order_without_deduplication(self):
+        rl = _RequestifyList(f'curl {GOOGLE}', f'curl {GOOGLE}')
+        assert rl._get_replay_order() == rl._requests
+        assert rl._get_occurrences() == {
+            'get_google_com': [0],
+            'get_google_com_1': [1],
+        }
+
 
 class TestReplaceRequestify(object):
+    def test_duplicates_are_fetched_once(self, mocker):
+        get_responses = mocker.patch(
+            'requestify.models.get_responses',
+            return_value=[{'bar': '1'}, None],
+        )
+        curl1 = f'curl -X GET {GOOGLE}'
+        curl2 = f"curl -X GET {GOOGLE} -H 'bar: 1'"
+        rreq = _ReplaceRequestify(curl1, curl2, curl1, deduplicate=True)
+        assert len(get_responses.call_args.args[0]) == 2
+        assert rreq._requests[1]._headers == {
+            'bar': f"self.{REQUEST_MATCHING_DATA_DICT_NAME}['get_google_com']['bar']"
+        }
+
     def test_create_new_assignment_matches_dict(self, mocker):
         mocker.patch(
             'requestify.models.get_responses',
@@ -477,3 +576,47 @@ class TestReplaceRequestify(object):
             r2._url
             == f"""f'{GOOGLE}/{{self.{REQUEST_MATCHING_DATA_DICT_NAME}['{r1._function_name}']['foo']}}/span/eggs'"""
         )
+
+    def test_dependencies(self, mocker):
+        mocker.patch(
+            'requestify.models.get_responses',
+            return_value=[{'foo': 1, 'bar': 'eggs'}, None, None],
+        )
+        curl1 = f'curl -X GET {GOOGLE}'
+        curl2 = f'curl -X GET {GITHUB}/1'
+        curl3 = f"""curl -X POST -d '{{"span": "eggs"}}' {EBS}"""
+        rr = _ReplaceRequestify(curl1, curl2, curl3)
+        assert rr._dependencies == {
+            'get_google_com': [],
+            'get_github_com': ['get_google_com'],
+            'post_ebs_io': ['get_google_com'],
+        }
+
+    def test_extend_fetches_and_matches_only_new_requests(self, mocker):
+        get_responses = mocker.patch(
+            'requestify.models.get_responses',
+            side_effect=[[{'foo': 1}], [None], [{'bar': 'eggs'}]],
+        )
+        rr = _ReplaceRequestify(f"curl -X GET {GOOGLE} -H 'bar: eggs'")
+        assert rr._dependencies == {'get_google_com': []}
+
+        r2 = rr.append(f'curl -X GET {GITHUB}/1')
+        assert get_responses.call_args.args[0] == [r2]
+        # the new request reads from the earlier response
+        assert r2._url == (
+            f"f'{GITHUB}/{{self.{REQUEST_MATCHING_DATA_DICT_NAME}"
+            f"['get_google_com']['foo']}}'"
+        )
+
+        r3 = rr.append(f'curl -X GET {EBS}')
+        assert get_responses.call_args.args[0] == [r3]
+        # and the earlier request from the new response
+        assert rr._requests[0]._headers == {
+            'bar': f"self.{REQUEST_MATCHING_DATA_DICT_NAME}"
+            "['get_ebs_io']['bar']"
+        }
+        assert rr._dependencies == {
+            'get_google_com': ['get_ebs_io'],
+            'get_github_com': ['get_google_com'],
+            'get_ebs_io': [],
+        }
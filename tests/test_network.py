@@ -0,0 +1,120 @@
+import asyncio
+import gzip
+import json
+import threading
+import httpx
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from requestify.models import _RequestifyList
+from requestify.network import NetworkMetrics, get_phases
+from requestify.utils import aget_responses
+
+BODY = json.dumps({'items': ['requestify'] * 100}).encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = gzip.compress(BODY)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def _get_requests(base_url: str) -> _RequestifyList:
+    rl = _RequestifyList('curl -X GET https://example.com/items')
+    # the url regex does not accept ip:port
+    rl[0]._url = base_url + '/items'
+    return rl
+
+
+class TestNetworkMetrics:
+    def test_phases(self):
+        events = {
+            'connect_tcp.started': 0,
+            'connect_tcp.complete': 2_000,
+            'send_request_headers.started': 3_000,
+            'receive_response_headers.complete': 10_000,
+            'receive_response_body.started': 10_000,
+            'receive_response_body.complete': 15_000,
+        }
+        assert get_phases(events) == {'connect': 2, 'ttfb': 7, 'download': 5}
+
+    def test_replay(self, base_url):
+        metrics = NetworkMetrics()
+        rl = _get_requests(base_url)
+
+        async def main():
+            async with httpx.AsyncClient() as client:
+                for _ in range(2):
+                    await aget_responses(rl, client=client, metrics=metrics)
+
+        asyncio.run(main())
+        assert metrics.connections_opened == 1
+        assert metrics.connections_reused == 1
+        assert metrics.statuses == {200: 2}
+        assert metrics.bytes_decoded == 2 * len(BODY)
+        assert metrics.bytes_received == 2 * len(gzip.compress(BODY))
+        phases = metrics.requests['get_example_com']
+        assert phases['connect'].count == 1
+        assert phases['ttfb'].count == phases['download'].count == 2
+        assert 'tls' not in phases
+
+    def test_errors(self):
+        def handler(request):
+            raise httpx.ConnectError('refused')
+
+        metrics = NetworkMetrics()
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        rl = _RequestifyList('curl -X GET https://example.com')
+        with pytest.raises(httpx.ConnectError):
+            asyncio.run(aget_responses(rl, client=client, metrics=metrics))
+        assert metrics.errors == {'ConnectError': 1}
+
+    def test_export(self, base_url, tmp_path):
+        metrics = NetworkMetrics()
+        asyncio.run(aget_responses(_get_requests(base_url), metrics=metrics))
+
+        metrics.save(str(tmp_path / 'metrics.json'))
+        exported = json.loads((tmp_path / 'metrics.json').read_text())
+        assert exported['connections'] == {
+            'opened': 1,
+            'reused': 0,
+            'reuse_rate': 0.0,
+        }
+        assert exported['statuses'] == {'200': 1}
+        assert list(exported['phases_us']) == ['get_example_com', 'total']
+
+        metrics.save(str(tmp_path / 'metrics.prom'))
+        lines = (tmp_path / 'metrics.prom').read_text().splitlines()
+        assert 'requestify_connections_total{state="opened"} 1' in lines
+        assert 'requestify_responses_total{status="200"} 1' in lines
+        assert (
+            'requestify_phase_seconds_count'
+            '{request="get_example_com",phase="ttfb"} 1'
+        ) in lines
+        assert any(
+            line.startswith(
+                'requestify_overall_phase_seconds{phase="connect",'
+                'quantile="0.5"} '
+            )
+            for line in lines
+        )
+        # every request is counted once in the per-request family
+        assert not any('request="total"' in line for line in lines)
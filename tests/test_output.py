@@ -0,0 +1,259 @@
+import io
+import sys
+import json
+import importlib
+from requestify.models import (
+    _ReplaceRequestify,
+    _RequestifyObject,
+    _RequestifyList,
+    iter_requestify,
+)
+from requestify.output import (
+    generate_module,
+    iter_module_chunks,
+    iter_ndjson_records,
+    get_shards,
+    to_file,
+    write_module,
+    write_ndjson,
+    write_package,
+)
+from requestify.utils import FormatCache, beautify_string, format_str
+from requestify.constants import REQUEST_CLASS_NAME
+
+GOOGLE = 'https://google.com'
+GITHUB = 'https://github.com'
+
+
+class TestGenerateModule:
+    def test_requestify_object(self):
+        module = generate_module(_RequestifyObject(f"curl {GOOGLE} -H 'x: y'"))
+        assert module == (
+            'import requests\n'
+            '\n'
+            '\n'
+            'def get_google_com():\n'
+            '    headers = {"x": "y"}\n'
+            '    cookies = {}\n'
+            '    request = requests.get("https://google.com", headers=headers, cookies=cookies)\n'
+        )
+
+    def test_requestify_list_is_black_formatted(self):
+        rl = _RequestifyList(
+            f"curl {GOOGLE} -H 'x: y' -H 'Cookie: span=eggs'",
+            f"curl {GOOGLE}/a -H 'x: y' -H 'z: 1'",
+            f'curl -X POST {GITHUB}',
+        )
+        for shared_constants in (False, True):
+            module = generate_module(rl, shared_constants=shared_constants)
+            assert beautify_string(module) == module
+        assert 'GOOGLE_COM_HEADERS = {"x": "y"}' in module
+
+    def test_replace_requestify_is_black_formatted(self, mocker):
+        mocker.patch(
+            'requestify.models.get_responses',
+            return_value=[{'foo': '1'}, None],
+        )
+        rreq = _ReplaceRequestify(
+            f'curl -X GET {GOOGLE}', f"curl -X GET {GOOGLE} -H 'bar: 1'"
+        )
+        module = generate_module(rreq)
+        assert beautify_string(module) == module
+        assert f'class {REQUEST_CLASS_NAME}:' in module
+        assert '    def run(self):' in module
+
+    def test_only_changed_functions_are_formatted(self, mocker):
+        cache = FormatCache()
+        generate_module(
+            _RequestifyList(f'curl {GOOGLE}', f'curl {GITHUB}'), cache=cache
+        )
+        mock_format_str = mocker.patch(
+            'requestify.utils.format_str', side_effect=format_str
+        )
+        module = generate_module(
+            _RequestifyList(f'curl {GOOGLE}', f'curl -X POST {GITHUB}'),
+            cache=cache,
+        )
+
+        mock_format_str.assert_called_once()
+        formatted = mock_format_str.call_args.args[0]
+        assert 'post_github_com' in formatted
+        assert 'get_google_com' not in formatted
+        assert 'def get_google_com():' in module
+
+    def test_replay(self, mocker):
+        rl = _RequestifyList(
+            f'curl {GOOGLE}',
+            f'curl -X POST {GITHUB}',
+            f'curl {GOOGLE}',
+            deduplicate=True,
+        )
+        for use_ast in (False, True):
+            module = generate_module(rl, use_ast=use_ast, replay=True)
+            assert module.count('def get_google_com') == 1
+
+            namespace = {}
+            exec(compile(module, '<generated>', 'exec'), namespace)
+            namespace['requests'] = requests = mocker.MagicMock()
+            namespace['replay']()
+            assert [call[0] for call in requests.method_calls] == [
+                'get',
+                'post',
+                'get',
+            ]
+
+    def test_to_file(self, tmp_path):
+        filename = tmp_path / 'out.py'
+        req = _RequestifyObject(f'curl {GOOGLE}')
+        to_file(req, filename)
+        assert filename.read_text() == generate_module(req)
+
+
+class TestStreaming:
+    curls = (f"curl {GOOGLE} -H 'x: y'", f'curl {GOOGLE}', f'curl {GITHUB}')
+
+    def test_write_module_matches_generate_module(self):
+        for use_ast in (False, True):
+            sink = io.StringIO()
+            write_module(sink, iter_requestify(self.curls), use_ast=use_ast)
+            assert sink.getvalue() == generate_module(
+                _RequestifyList(*self.curls), use_ast=use_ast
+            )
+
+    def test_chunks_are_yielded_before_input_is_consumed(self):
+        consumed = []
+
+        def curls():
+            for curl in self.curls:
+                consumed.append(curl)
+                yield curl
+
+        chunks = iter_module_chunks(iter_requestify(curls()), batch_size=1)
+        assert next(chunks) == 'import requests'
+        assert consumed == []
+        assert next(chunks).startswith('def get_google_com():')
+        assert consumed == [self.curls[0]]
+
+
+class TestNdjson:
+    curls = (
+        f"curl -X GET {GOOGLE} -H 'x: y' -H 'Cookie: a=b'",
+        'curl nope',
+        f"""curl -X POST {GOOGLE} -d '{{"x": 1}}'""",
+        f'curl -X GET {GOOGLE}',
+    )
+
+    def test_records(self):
+        records = [
+            json.loads(record)
+            for record in iter_ndjson_records(self.curls, _RequestifyObject)
+        ]
+        assert records == [
+            {
+                'function_name': 'get_google_com',
+                'method': 'GET',
+                'url': GOOGLE,
+                'headers': {'x': 'y'},
+                'cookies': {'a': 'b'},
+                'data': None,
+            },
+            {
+                'error': 'ValueError: Request method not specified, '
+                'and is not a GET',
+                'input': 'curl nope',
+            },
+            {
+                'function_name': 'post_google_com',
+                'method': 'POST',
+                'url': GOOGLE,
+                'headers': {},
+                'cookies': {},
+                'data': {'x': 1},
+            },
+            {
+                'function_name': 'get_google_com_1',
+                'method': 'GET',
+                'url': GOOGLE,
+                'headers': {},
+                'cookies': {},
+                'data': None,
+            },
+        ]
+
+    def test_code(self):
+        curls = self.curls[:1]
+        for use_ast in (False, True):
+            (record,) = iter_ndjson_records(
+                curls, _RequestifyObject, with_code=True, use_ast=use_ast
+            )
+            assert json.loads(record)['code'] == generate_module(
+                _RequestifyObject(curls[0]), use_ast=use_ast
+            ).split('\n\n\n', 1)[1].rstrip('\n')
+
+    def test_records_are_written_as_they_are_parsed(self):
+        sink = io.StringIO()
+
+        def curls():
+            for curl in self.curls:
+                yield curl
+                # everything parsed so far was written and flushed
+                assert len(sink.getvalue().splitlines()) == len(written) + 1
+                written.append(curl)
+
+        written = []
+        write_ndjson(sink, curls(), _RequestifyObject)
+        assert len(sink.getvalue().splitlines()) == len(self.curls)
+
+
+class TestPackages:
+    curls = (f'curl {GOOGLE}', f'curl {GITHUB}', f'curl {GOOGLE}/a')
+
+    def import_package(self, tmp_path, name):
+        sys.path.insert(0, str(tmp_path))
+        try:
+            return importlib.import_module(name)
+        finally:
+            sys.path.remove(str(tmp_path))
+
+    def test_get_shards_by_host(self):
+        shards = get_shards(_RequestifyList(*self.curls))
+        assert {
+            module: [r._function_name for r in requests]
+            for module, requests in shards.items()
+        } == {
+            'google_com': ['get_google_com', 'get_google_com_1'],
+            'github_com': ['get_github_com'],
+        }
+
+    def test_get_shards_by_size(self):
+        shards = get_shards(_RequestifyList(*self.curls), shard_size=2)
+        assert [len(requests) for requests in shards.values()] == [2, 1]
+        assert list(shards) == ['shard_0', 'shard_1']
+
+    def test_shards_are_imported_lazily(self, tmp_path):
+        write_package(_RequestifyList(*self.curls), tmp_path / 'lazy_client')
+        package = self.import_package(tmp_path, 'lazy_client')
+
+        assert 'lazy_client.github_com' not in sys.modules
+        assert package.get_github_com.__module__ == 'lazy_client.github_com'
+        assert 'lazy_client.google_com' not in sys.modules
+        assert 'get_google_com_1' in dir(package)
+
+    def test_workflow_package(self, tmp_path, mocker):
+        mocker.patch(
+            'requestify.models.get_responses',
+            return_value=[{'foo': 1}, None],
+        )
+        rreq = _ReplaceRequestify(
+            f'curl -X GET {GOOGLE}', f'curl -X GET {GITHUB}/foo/1'
+        )
+        write_package(rreq, tmp_path / 'lazy_workflow', use_ast=True)
+        package = self.import_package(tmp_path, 'lazy_workflow')
+
+        workflow = getattr(package, REQUEST_CLASS_NAME)()
+        assert workflow.dependencies == {
+            'get_google_com': [],
+            'get_github_com': ['get_google_com'],
+        }
+        assert workflow.get_github_com.__self__ is workflow
+        assert 'lazy_workflow.google_com' not in sys.modules
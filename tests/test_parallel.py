@@ -0,0 +1,120 @@
+import multiprocessing
+import httpx
+import pytest
+from requestify.models import _RequestifyList, _ReplaceRequestify
+from requestify.bench import bench, prepare
+from requestify.parallel import _bench_shard, bench_processes
+from requestify.utils import shard, unshard, get_responses
+from requestify.constants import REQUEST_MATCHING_DATA_DICT_NAME
+
+GOOGLE = 'https://google.com'
+GITHUB = 'https://github.com'
+
+requires_fork = pytest.mark.skipif(
+    multiprocessing.get_start_method() != 'fork',
+    reason='patches only reach worker processes that are forked',
+)
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.host == 'github.com':
+        return httpx.Response(404, content=b'missing')
+    return httpx.Response(200, json={'path': request.url.path})
+
+
+# module level, so worker processes can unpickle it
+def _get_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+
+
+async def _get_responses_async(
+    requests, hedge=None, client=None, metrics=None
+):
+    return [
+        httpx.Response(200, json={'id': request._url.rsplit('/', 1)[-1]})
+        for request in requests
+    ]
+
+
+def _without_timing(result) -> dict:
+    return {
+        name: (
+            stats.count,
+            stats.statuses,
+            stats.bytes_sent,
+            stats.bytes_received,
+        )
+        for name, stats in result.requests.items()
+    }
+
+
+class TestShard:
+    @pytest.mark.parametrize('count', (0, 1, 7, 8))
+    def test_round_trip(self, count):
+        items = list(range(count))
+        shards = shard(items, 3)
+        assert len(shards) == 3
+        assert unshard(shards) == items
+
+
+class TestBenchProcesses:
+    def test_same_results_as_one_process(self):
+        rl = _RequestifyList(
+            f'curl -X GET {GOOGLE}/a',
+            f'curl -X GET {GITHUB}',
+            f"""curl -X POST {GOOGLE}/b -d '{{"x": 1}}'""",
+        )
+        single = bench(rl, iterations=7, concurrency=4, client=_get_client())
+        multi = bench_processes(
+            rl,
+            iterations=7,
+            concurrency=4,
+            processes=3,
+            client_factory=_get_client,
+        )
+        assert _without_timing(multi) == _without_timing(single)
+        assert multi.total.latency.count == 21
+        assert multi.elapsed > 0
+
+    def test_more_processes_than_requests(self):
+        rl = _RequestifyList(f'curl -X GET {GOOGLE}')
+        result = bench_processes(rl, processes=4, client_factory=_get_client)
+        assert result.total.count == 1
+
+    def test_shard_closes_its_client(self):
+        clients = []
+
+        def get_client():
+            clients.append(_get_client())
+            return clients[-1]
+
+        rl = _RequestifyList(f'curl -X GET {GOOGLE}')
+        result = _bench_shard([prepare(rl[0])], 1, get_client)
+        assert result.total.count == 1
+        assert clients[0].is_closed
+
+
+@requires_fork
+class TestGetResponsesProcesses:
+    def test_order_is_kept(self, mocker):
+        mocker.patch(
+            'requestify.utils._get_responses_async', new=_get_responses_async
+        )
+        rl = _RequestifyList(*(f'curl -X GET {GOOGLE}/{i}' for i in range(7)))
+        assert get_responses(rl, processes=3) == get_responses(rl)
+        assert get_responses(rl, processes=3) == [
+            {'id': str(i)} for i in range(7)
+        ]
+
+    def test_replace_requestify(self, mocker):
+        mocker.patch(
+            'requestify.utils._get_responses_async', new=_get_responses_async
+        )
+        rreq = _ReplaceRequestify(
+            f'curl -X GET {GOOGLE}/1',
+            f"curl -X GET {GITHUB}/2 -H 'x: 1'",
+            processes=2,
+        )
+        assert rreq._requests[1]._headers == {
+            'x': f"self.{REQUEST_MATCHING_DATA_DICT_NAME}['get_google_com']['id']"
+        }
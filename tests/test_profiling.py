@@ -0,0 +1,114 @@
+import io
+import json
+import pytest
+from requestify.models import _ReplaceRequestify, _RequestifyList
+from requestify.output import generate_module
+from requestify.profiling import STAGES, Profiler, profiled, timed
+from requestify.__main__ import get_args, run
+
+GOOGLE = 'https://google.com'
+GITHUB = 'https://github.com'
+POST_GOOGLE = f"""curl -X POST -d '{{"a": 1}}' {GOOGLE}"""
+GET_GOOGLE = f'curl -X GET {GOOGLE}'
+
+
+class TestProfiling:
+    def test_nothing_is_timed_when_disabled(self):
+        profiler = Profiler()
+        with profiled(profiler):
+            pass
+        assert timed('format') is timed('parse_url', object())
+        _RequestifyList(POST_GOOGLE)
+        assert profiler.stages == {}
+
+    def test_stages_by_request(self):
+        calls = []
+        with profiled(Profiler(hook=lambda *call: calls.append(call))) as p:
+            rl = _RequestifyList(POST_GOOGLE, GET_GOOGLE, GET_GOOGLE)
+            generate_module(rl)
+        assert list(p.stages) == ['parse_url', 'decode_body', 'format']
+        assert p.stages['parse_url'].count == 3
+        assert p.stages['format'].count == 1
+        # named after parsing, so duplicates get their own entry
+        assert list(p.requests) == [
+            'post_google_com',
+            'get_google_com',
+            'get_google_com_1',
+        ]
+        assert set(p.requests['post_google_com']) == {
+            'parse_url',
+            'decode_body',
+        }
+        assert [call[:2] for call in calls[:2]] == [
+            ('parse_url', rl[0]),
+            ('decode_body', rl[0]),
+        ]
+        assert ('format', None) in [call[:2] for call in calls]
+        assert sum(call[2] for call in calls) == p.total
+
+    def test_requests_that_fail_or_share_a_name(self):
+        with profiled() as profiler:
+            with pytest.raises(ValueError):
+                _RequestifyList(f"{POST_GOOGLE} -H 'no separator'")
+            _RequestifyList(POST_GOOGLE)
+            _RequestifyList(POST_GOOGLE)
+        # the failed request was timed, but has no name to report it under
+        assert profiler.stages['parse_url'].count == 3
+        assert list(profiler.requests) == [
+            'post_google_com',
+            'post_google_com#2',
+        ]
+        assert profiler.format_table().endswith(' in 2 requests')
+
+    def test_matching_is_timed(self, mocker):
+        mocker.patch(
+            'requestify.models.get_responses',
+            return_value=[{'a': 1}, None],
+        )
+        with profiled() as profiler:
+            _ReplaceRequestify(GET_GOOGLE, POST_GOOGLE)
+        assert profiler.stages['match'].count == 2
+        assert 'match' in profiler.requests['post_google_com']
+
+    def test_report(self):
+        profiler = Profiler()
+        profiler.record('format', None, 3_000_000)
+        profiler.record('parse_url', 'a', 1_000_000)
+        assert profiler.to_dict() == {
+            'stages': {
+                'parse_url': {
+                    'count': 1,
+                    'total': 1_000_000,
+                    'max': 1_000_000,
+                },
+                'format': {'count': 1, 'total': 3_000_000, 'max': 3_000_000},
+            },
+            'requests': {'a': {'parse_url': 1_000_000}},
+        }
+        table = profiler.format_table().splitlines()
+        assert [row.split()[0] for row in table[2:4]] == [
+            'parse_url',
+            'format',
+        ]
+        assert table[3].endswith('75.0%')
+        assert table[-1] == '4.00 ms in 1 requests'
+        assert set(STAGES) >= set(profiler.stages)
+
+    def test_cli(self, tmp_path, capsys):
+        capture = tmp_path / 'capture.curl'
+        capture.write_text(f'{POST_GOOGLE}\n{GET_GOOGLE}\n')
+        args = get_args().parse_args(
+            ['-f', str(capture), '--profile', str(tmp_path / 'profile.json')]
+        )
+        stdout = io.StringIO()
+        run(args, stdout)
+        profile = json.loads((tmp_path / 'profile.json').read_text())
+        assert list(profile['requests']) == [
+            'post_google_com',
+            'get_google_com',
+        ]
+        assert 'def get_google_com' in stdout.getvalue()
+
+        args = get_args().parse_args(['-f', str(capture), '--profile'])
+        run(args, io.StringIO())
+        assert capsys.readouterr().err.startswith('stage ')
@@ -0,0 +1,76 @@
+import pytest
+from requestify.stats import Histogram, RequestStats
+
+
+class TestHistogram:
+    def test_percentiles(self):
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.record(value)
+        assert histogram.count == 100
+        assert histogram.min == 1
+        assert histogram.max == 100
+        assert histogram.mean == 50.5
+        assert histogram.percentile(50) == 50
+        assert histogram.percentile(90) == 90
+        assert histogram.percentile(99) == 99
+        assert histogram.percentile(100) == 100
+
+    def test_precision(self):
+        histogram = Histogram(significant_figures=2)
+        histogram.record(12_345)
+        histogram.record(12_399)
+        # both values share a bucket, and are reported within 1%
+        assert len(histogram._counts) == 1
+        assert histogram.percentile(50) == 12_399
+        assert abs(histogram.percentile(50) - 12_345) / 12_345 < 0.01
+
+    def test_memory_does_not_grow_with_values(self):
+        histogram = Histogram(significant_figures=2)
+        for value in range(100_000):
+            histogram.record(value)
+        assert len(histogram._counts) < 500
+
+    def test_empty(self):
+        assert Histogram().percentile(99) == 0
+
+    def test_merge(self):
+        first, second, both = Histogram(), Histogram(), Histogram()
+        for value in range(0, 1000, 3):
+            first.record(value)
+            both.record(value)
+        for value in range(5000, 9000, 7):
+            second.record(value)
+            both.record(value)
+        first.merge(second)
+        assert first == both
+
+    def test_merge_needs_same_precision(self):
+        with pytest.raises(AssertionError):
+            Histogram(2).merge(Histogram(3))
+
+    def test_dict_round_trip(self):
+        histogram = Histogram()
+        histogram.record(1234567)
+        histogram.record(3)
+        assert Histogram.from_dict(histogram.to_dict()) == histogram
+
+
+class TestRequestStats:
+    def test_errors(self):
+        stats = RequestStats()
+        stats.record(100, 200, 10, 20)
+        stats.record(200, 500, 10, 20)
+        stats.record(300, error='ConnectError')
+        assert stats.count == 3
+        assert stats.error_count == 2
+        assert stats.error_rate == 2 / 3
+        assert stats.bytes_sent == 20
+
+    def test_dict_round_trip(self):
+        stats = RequestStats()
+        stats.record(100, 200, 10, 20)
+        stats.record(300, error='ConnectError')
+        data = stats.to_dict()
+        assert data['latency_us']['p50'] == 100
+        assert RequestStats.from_dict(data).to_dict() == data
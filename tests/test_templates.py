@@ -0,0 +1,139 @@
+import io
+import pytest
+from requestify.models import _RequestifyObject
+from requestify.templates import (
+    CurlTemplate,
+    iter_csv_rows,
+    iter_ndjson_rows,
+    iter_rows,
+    generate_template_module,
+)
+from requestify.utils import beautify_string
+
+API = 'https://api.example.com'
+TEMPLATE = (
+    f"curl -X POST '{API}/users/{{{{user_id}}}}?page={{{{page}}}}' "
+    "-H 'x-user: {{ user_id }}' -H 'Authorization: Bearer {{token}}' "
+    "-H 'Cookie: session={{token}}' "
+    """-d '{"count": "{{count}}", "name": "user {{user_id}}"}'"""
+)
+ROW = {'user_id': 5, 'page': 2, 'token': 'abc', 'count': 7}
+
+
+class TestCurlTemplate:
+    def test_placeholders(self):
+        template = CurlTemplate(TEMPLATE)
+        assert template._names == ['user_id', 'page', 'token', 'count']
+        assert template._request._function_name == 'post_api_example_com'
+
+    def test_no_placeholders(self):
+        with pytest.raises(AssertionError):
+            CurlTemplate(f'curl -X GET {API}')
+
+    @pytest.mark.parametrize(
+        'name, message',
+        [
+            ('from', 'not a valid'),
+            ('None', 'not a valid'),
+            ('headers', 'used by the generated code'),
+            ('requests', 'used by the generated code'),
+        ],
+    )
+    def test_invalid_names(self, name, message):
+        with pytest.raises(ValueError, match=message):
+            CurlTemplate(f"curl -X GET '{API}/users?q={{{{{name}}}}}'")
+
+    def test_render_matches_parsing_the_filled_curl(self):
+        request = CurlTemplate(TEMPLATE).render(ROW)
+        filled = _RequestifyObject(
+            TEMPLATE.replace('{{user_id}}', '5')
+            .replace('{{ user_id }}', '5')
+            .replace('{{page}}', '2')
+            .replace('{{token}}', 'abc')
+            .replace('{{count}}', '7')
+        )
+        assert request._url == filled._url
+        assert request._method == filled._method
+        assert request._cookies == filled._cookies
+        assert request._data['name'] == filled._data['name']
+        # a value that is only a placeholder keeps the row value's type
+        assert request._headers['x-user'] == 5
+        assert request._data['count'] == 7
+
+    def test_render_does_not_parse(self, mocker):
+        template = CurlTemplate(TEMPLATE)
+        parse = mocker.spy(_RequestifyObject, '_generate')
+        requests = list(
+            template.iter_requests({**ROW, 'user_id': i} for i in range(3))
+        )
+        assert parse.call_count == 0
+        assert [r._url for r in requests] == [
+            f'{API}/users/{i}?page=2' for i in range(3)
+        ]
+        # rendered requests do not share state with the template
+        requests[0]._headers['x-user'] = 'changed'
+        assert template.render(ROW)._headers['x-user'] == 5
+
+    def test_missing_parameter(self):
+        with pytest.raises(ValueError, match='count'):
+            CurlTemplate(TEMPLATE).render(
+                {'user_id': 1, 'page': 1, 'token': 1}
+            )
+
+
+class TestRows:
+    def test_csv(self):
+        rows = iter_csv_rows(io.StringIO('user_id,page\n1,2\n3,4\n'))
+        assert list(rows) == [
+            {'user_id': '1', 'page': '2'},
+            {'user_id': '3', 'page': '4'},
+        ]
+
+    def test_ndjson(self):
+        rows = iter_ndjson_rows(
+            io.StringIO('{"user_id": 1}\n\n{"user_id": 2}\n')
+        )
+        assert list(rows) == [{'user_id': 1}, {'user_id': 2}]
+
+    def test_iter_rows_by_extension(self, tmp_path):
+        csv_file = tmp_path / 'ids.csv'
+        csv_file.write_text('user_id\n1\n')
+        ndjson_file = tmp_path / 'ids.ndjson'
+        ndjson_file.write_text('{"user_id": 1}\n')
+        assert list(iter_rows(str(csv_file))) == [{'user_id': '1'}]
+        assert list(iter_rows(str(ndjson_file))) == [{'user_id': 1}]
+
+
+class TestGenerateTemplateModule:
+    @pytest.mark.parametrize('extension', ('csv', 'ndjson'))
+    def test_replays_every_row(self, tmp_path, mocker, extension):
+        parameters_file = tmp_path / f'parameters.{extension}'
+        if extension == 'csv':
+            parameters_file.write_text(
+                'user_id,page,token,count\n1,1,a,1\n2,1,b,1\n'
+            )
+        else:
+            parameters_file.write_text(
+                '{"user_id": 1, "page": 1, "token": "a", "count": 1}\n'
+                '{"user_id": 2, "page": 1, "token": "b", "count": 1}\n'
+            )
+
+        template = CurlTemplate(TEMPLATE)
+        for use_ast in (False, True):
+            module = generate_template_module(
+                template, str(parameters_file), use_ast=use_ast
+            )
+            if not use_ast:
+                assert beautify_string(module) == module
+
+            namespace = {}
+            exec(compile(module, '<generated>', 'exec'), namespace)
+            namespace['requests'] = requests = mocker.MagicMock()
+            namespace['replay_post_api_example_com']()
+            calls = requests.post.call_args_list
+            assert [call.args[0] for call in calls] == [
+                f'{API}/users/1?page=1',
+                f'{API}/users/2?page=1',
+            ]
+            assert calls[1].kwargs['headers']['Authorization'] == 'Bearer b'
+            assert calls[1].kwargs['cookies'] == {'session': 'b'}
@@ -12,6 +12,7 @@ from requestify.text_utils import (
     generate_imports_text,
     generate_function_outside_class,
     generate_replacement,
+    generate_replacement_run_text,
     generate_class_function,
     _indent_function_inside_class,
     _indent_function_outside_class,
@@ -24,10 +25,18 @@ from requestify.text_utils import (
     generate_requestify_list_class,
     generate_requestify_function,
     generate_requestify_list_function,
+    generate_shared_constants_text,
+    get_shared_constants,
+    generate_urllib3_constants_text,
+    generate_urllib3_function,
+    generate_urllib3_list_class,
+    URLLIB3_POOL_VARIABLE_NAME,
 )
+from requestify.output import generate_module
 from .helpers import mock_get_responses
 
 GOOGLE = 'https://google.com'
+GITHUB = 'https://github.com'
 
 
 @pytest.fixture
@@ -553,3 +562,152 @@ class TestModelTextGeneration(object):
         assert generate_class_text(
             generate_replacement(rreq)
         ) == generate_class_text(text)
+
+    def test_generate_replacement_with_run(self, mocker):
+        mocker.patch(
+            'requestify.models.get_responses',
+            return_value=[{'foo': '1'}, None],
+        )
+        curl1 = f'curl -X GET {GOOGLE}'
+        curl2 = f"curl -X GET {GOOGLE} -H 'bar: 1'"
+        rreq = _ReplaceRequestify(curl1, curl2)
+        r1, r2 = rreq._requests
+
+        text = generate_replacement(rreq, with_run=True)
+        assert text.body[0].body == [
+            f'\t\tself.{REQUEST_MATCHING_DATA_DICT_NAME} = {{}}',
+            f"\t\tself.dependencies = {{'{r1._function_name}': [], '{r2._function_name}': ['{r1._function_name}']}}",
+        ]
+        assert text.body[-1].name == '\tdef run(self):'
+
+    def test_generated_run_respects_dependencies(self, mocker):
+        mocker.patch(
+            'requestify.models.get_responses',
+            return_value=[{'foo': '1'}, None],
+        )
+        curl1 = f'curl -X GET {GOOGLE}'
+        curl2 = f"curl -X GET {GOOGLE} -H 'bar: 1'"
+        rreq = _ReplaceRequestify(curl1, curl2)
+        r1, r2 = rreq._requests
+
+        requests = mocker.MagicMock()
+        requests.get.return_value = {'foo': '1'}
+        namespace = {'requests': requests}
+        exec(
+            generate_class_text(generate_replacement(rreq, with_run=True)),
+            namespace,
+        )
+        workflow = namespace[REQUEST_CLASS_NAME]().run()
+
+        assert list(workflow) == [r1._function_name, r2._function_name]
+        assert requests.get.call_args_list[1].kwargs['headers'] == {'bar': '1'}
+
+    def test_generate_replacement_run_text_runs_on_its_own(self):
+        run = FunctionBase('run', generate_replacement_run_text())
+        namespace = {}
+        exec(generate_class_text(generate_class('Workflow', [run])), namespace)
+        workflow = namespace['Workflow']()
+        setattr(workflow, REQUEST_MATCHING_DATA_DICT_NAME, {})
+        workflow.dependencies = {'missing': ['never']}
+        with pytest.raises(RuntimeError, match='missing'):
+            workflow.run()
+
+
+class TestSharedConstants(object):
+    curls = (
+        f"curl -X GET {GOOGLE} -H 'x: y' -H 'Cookie: span=eggs'",
+        f"curl -X GET {GOOGLE}/a -H 'x: y' -H 'z: 1' -H 'Cookie: span=eggs'",
+        f"curl -X GET {GITHUB} -H 'x: y'",
+    )
+
+    def test_get_shared_constants(self):
+        rl = _RequestifyList(*self.curls)
+        assert get_shared_constants(rl) == {
+            'GOOGLE_COM_HEADERS': {'x': 'y'},
+            'GOOGLE_COM_COOKIES': {'span': 'eggs'},
+        }
+
+    def test_generate_shared_constants_text(self):
+        rl = _RequestifyList(*self.curls)
+        assert generate_shared_constants_text(rl, with_cookies=False) == [
+            "GOOGLE_COM_HEADERS = {'x': 'y'}"
+        ]
+
+    def test_functions_use_shared_constants(self):
+        rl = _RequestifyList(*self.curls)
+        functions = generate_requestify_list_function(
+            rl, shared_constants=True
+        )
+        assert [function.body[:2] for function in functions] == [
+            [
+                '\theaders = GOOGLE_COM_HEADERS',
+                '\tcookies = GOOGLE_COM_COOKIES',
+            ],
+            [
+                "\theaders = {**GOOGLE_COM_HEADERS, 'z': '1'}",
+                '\tcookies = GOOGLE_COM_COOKIES',
+            ],
+            ["\theaders = {'x': 'y'}", '\tcookies = {}'],
+        ]
+
+    def test_class_uses_shared_constants(self):
+        rl = _RequestifyList(*self.curls)
+        text = generate_requestify_list_class(rl, shared_constants=True)
+        assert text.body[0].body[0] == '\t\theaders = GOOGLE_COM_HEADERS'
+
+    def test_constant_names_are_identifiers(self):
+        host = 'https://1password.com'
+        rl = _RequestifyList(
+            f"curl -X GET {host} -H 'x: y'", f"curl -X GET {host}/a -H 'x: y'"
+        )
+        assert list(get_shared_constants(rl)) == ['HOST_1PASSWORD_COM_HEADERS']
+        for use_ast in (False, True):
+            module = generate_module(
+                rl, shared_constants=True, use_ast=use_ast
+            )
+            compile(module, '<generated>', 'exec')
+
+    def test_no_shared_constants_by_default(self):
+        rl = _RequestifyList(*self.curls)
+        functions = generate_requestify_list_function(rl)
+        assert functions[0].body[0] == "\theaders = {'x': 'y'}"
+
+
+class TestUrllib3TextGeneration(object):
+    def test_constants(self):
+        req = _RequestifyObject(
+            f"""curl -X POST -H "x: y" -H "Cookie: span=eggs" -d '{{"bar": "foo"}}' {GOOGLE}"""
+        )
+        assert generate_urllib3_constants_text(req) == [
+            "POST_GOOGLE_COM_HEADERS = {'x': 'y', 'Cookie': 'span=eggs', "
+            "'Content-Type': 'application/x-www-form-urlencoded'}",
+            "POST_GOOGLE_COM_BODY = b'bar=foo'",
+        ]
+
+    def test_constants_no_headers_no_cookies_no_data(self):
+        req = _RequestifyObject(
+            f"""curl -X GET -H "x: y" -H "Cookie: span=eggs" {GOOGLE}"""
+        )
+        assert generate_urllib3_constants_text(req, False, False) == [
+            'GET_GOOGLE_COM_HEADERS = {}',
+            'GET_GOOGLE_COM_BODY = None',
+        ]
+
+    def test_generate_urllib3_function(self):
+        req = _RequestifyObject(f"curl -X GET '{GOOGLE}'")
+        assert generate_urllib3_function(req) == Function(
+            f'def {req._function_name}():',
+            [
+                f"\t{REQUEST_VARIABLE_NAME} = {URLLIB3_POOL_VARIABLE_NAME}.request('GET', '{GOOGLE}', headers=GET_GOOGLE_COM_HEADERS, body=GET_GOOGLE_COM_BODY)"
+            ],
+        )
+
+    def test_generate_urllib3_list_class(self):
+        rl = _RequestifyList(f'curl -X GET {GOOGLE}', f'curl -X GET {GOOGLE}')
+        text = generate_urllib3_list_class(rl)
+        assert REQUEST_CLASS_NAME in text.name
+        assert [function.name for function in text.body] == [
+            '\tdef get_google_com(self):',
+            '\tdef get_google_com_1(self):',
+        ]
+        assert 'GET_GOOGLE_COM_1_HEADERS' in text.body[1].body[0]
@@ -65,6 +65,93 @@ class TestUtils:
             'booya',
         ]
 
+    @pytest.mark.parametrize(
+        'data, body',
+        [
+            ({}, None),
+            ({'x': 'y', 'z': 1}, b'x=y&z=1'),
+            (b'raw', b'raw'),
+            ('text', b'text'),
+        ],
+    )
+    def test_encode_body(self, data, body):
+        assert utils.encode_body(data) == body
+
+    def test_get_sent_headers(self):
+        form = 'application/x-www-form-urlencoded'
+        assert utils.get_sent_headers({'a': 'b'}, {'c': 'd'}, {'x': 1}) == {
+            'a': 'b',
+            'Cookie': 'c=d',
+            'Content-Type': form,
+        }
+        # the captured Content-Type is kept, and only dicts are form encoded
+        json_type = {'content-type': 'application/json'}
+        assert utils.get_sent_headers(json_type, {}, {'x': 1}) == json_type
+        assert utils.get_sent_headers({}, {}, b'raw') == {}
+        assert utils.get_sent_headers({}, {}, {}) == {}
+
+    def test_get_shared_items(self):
+        assert utils.get_shared_items([]) == {}
+        assert utils.get_shared_items(
+            [{'x': 1, 'y': 2}, {'x': 1, 'y': 3}, {'x': 1, 'z': 2}]
+        ) == {'x': 1}
+
+    def test_beautify_chunks(self):
+        assert utils.beautify_chunks(['x=1', 'def f():\n\treturn {1:2}']) == [
+            'x = 1',
+            'def f():\n    return {1: 2}',
+        ]
+
+    def test_beautify_chunks_indented(self):
+        assert utils.beautify_chunks(['def f(self):\n\tpass'], indent=1) == [
+            '    def f(self):\n        pass'
+        ]
+
+    def test_format_cache_is_persisted(self, tmp_path):
+        path = str(tmp_path / 'cache.json')
+        cache = utils.FormatCache(path)
+        utils.beautify_chunks(['x=1'], cache)
+        cache.save()
+
+        cache = utils.FormatCache(path)
+        assert len(cache) == 1
+        assert cache[utils.FormatCache.key('x=1', 88)] == 'x = 1'
+
+    def test_format_cache_keeps_the_entries_used_last(self, tmp_path):
+        path = str(tmp_path / 'cache.json')
+        cache = utils.FormatCache(path, max_size=2)
+        cache['a'], cache['b'] = 'A', 'B'
+        assert cache['a'] == 'A'
+        cache['c'] = 'C'
+        assert 'b' not in cache
+        # more chunks than fit are still all returned
+        assert utils.beautify_chunks(['x=1', 'y=2', 'z=3'], cache) == [
+            'x = 1',
+            'y = 2',
+            'z = 3',
+        ]
+        cache.save()
+        assert len(utils.FormatCache(path, max_size=2)) == 2
+        assert list(utils.FormatCache(path, max_size=1)._entries) == [
+            utils.FormatCache.key('z=3', 88)
+        ]
+
+    def test_batched(self):
+        assert list(utils.batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+    def test_iter_curls(self):
+        lines = [
+            '\n',
+            "curl 'https://google.com' \\\n",
+            "  -H 'x: y'\n",
+            'curl https://github.com\n',
+            '\n',
+        ]
+        assert list(utils.iter_curls(lines)) == [
+            "\ncurl 'https://google.com' \\\n  -H 'x: y'\n",
+            'curl https://github.com\n\n',
+        ]
+
     # def test_get_json_or_text(self, arg):
     #     r = RequestifyObject(f"curl -X get {GOOGLE}")
     #     assert utils.get_json_or_text(r) ==
@@ -0,0 +1,160 @@
+import os
+import threading
+from requestify.models import _RequestifyList
+from requestify.constants import REQUEST_CLASS_NAME
+from requestify.output import generate_module
+from requestify.watch import (
+    CaptureFile,
+    Changes,
+    Clipboard,
+    IncrementalModule,
+    _count_changes,
+    format_changes,
+    watch,
+)
+
+GOOGLE = 'https://google.com'
+GITHUB = 'https://github.com'
+GET_GOOGLE = f'curl -X GET {GOOGLE}'
+POST_GITHUB = f'curl -X POST {GITHUB}'
+
+
+class TestIncrementalModule:
+    def test_count_changes(self):
+        assert _count_changes([], ['a', 'b']) == (2, 0, 0)
+        assert _count_changes(['a', 'b'], ['a', 'c', 'd']) == (1, 1, 0)
+        assert _count_changes(['a', 'b', 'c'], ['a', 'c']) == (0, 0, 1)
+        assert _count_changes(['a'], ['a']) == (0, 0, 0)
+
+    def test_generates_what_a_full_run_would(self):
+        module = IncrementalModule(use_ast=True)
+        text = f'{GET_GOOGLE}\n{POST_GITHUB}\n{GET_GOOGLE}\n'
+        changes = module.update(text)
+        assert changes == Changes(3, 0, 0, {})
+        assert module.generate() == generate_module(
+            _RequestifyList(GET_GOOGLE, POST_GITHUB, GET_GOOGLE),
+            use_ast=True,
+        )
+
+    def test_only_new_curls_are_parsed(self):
+        module = IncrementalModule(use_ast=True)
+        module.update(f'{GET_GOOGLE}\n{POST_GITHUB}\n')
+        google = module._parsed[GET_GOOGLE]
+
+        edited = f"{POST_GITHUB} -H 'foo: bar'"
+        changes = module.update(f'{GET_GOOGLE}\n{edited}\n')
+        assert changes == Changes(0, 1, 0, {})
+        assert module._parsed[GET_GOOGLE] is google
+        assert POST_GITHUB not in module._parsed
+        assert module.generate() == generate_module(
+            _RequestifyList(GET_GOOGLE, edited), use_ast=True
+        )
+
+    def test_parse_errors_are_reported(self):
+        module = IncrementalModule(use_ast=True)
+        changes = module.update(f'{GET_GOOGLE}\ncurl -X GET\n')
+        assert list(changes.errors) == ['curl -X GET']
+        assert format_changes(changes).splitlines() == [
+            f'curl -X GET: {changes.errors["curl -X GET"]}',
+            '2 added, 0 edited, 0 removed',
+        ]
+        assert 'def get_google_com' in module.generate()
+
+    def test_replace_only_fetches_new_requests(self, mocker):
+        get_responses = mocker.patch(
+            'requestify.models.get_responses',
+            side_effect=lambda requests, *_: [{'bar': '1'}] * len(requests),
+        )
+        module = IncrementalModule(replace=True, use_ast=True)
+        module.update(f'{GET_GOOGLE}\n')
+        module.generate()
+        module.update(f'{GET_GOOGLE}\n{POST_GITHUB}\n')
+        generated = module.generate()
+
+        calls = get_responses.call_args_list
+        assert [len(call.args[0]) for call in calls] == [1, 1]
+        assert get_responses.call_args.args[0][0]._url == GITHUB
+        assert f'class {REQUEST_CLASS_NAME}' in generated
+
+        # the responses of requests removed from the capture are dropped
+        module.update(f'{POST_GITHUB}\n')
+        module.generate()
+        assert len(module._responses) == 1
+        assert len(get_responses.call_args_list) == 2
+
+
+class TestSources:
+    def test_capture_file(self, tmp_path):
+        path = tmp_path / 'capture.curl'
+        path.write_text(GET_GOOGLE)
+        for polling in (False, True):
+            capture = CaptureFile(str(path), interval=0.05, polling=polling)
+            assert capture.uses_inotify is not polling
+            assert not capture.wait()
+            (tmp_path / 'other.curl').write_text(POST_GITHUB)
+            # inotify ignores other files, polling never sees them
+            assert not capture.wait()
+            path.write_text(f'{GET_GOOGLE}\n{POST_GITHUB}')
+            assert capture.wait()
+            assert capture.read() == f'{GET_GOOGLE}\n{POST_GITHUB}'
+            capture.close()
+
+    def test_capture_file_replaced_by_rename(self, tmp_path):
+        path = tmp_path / 'capture.curl'
+        path.write_text(GET_GOOGLE)
+        capture = CaptureFile(str(path), interval=0.05)
+        (tmp_path / 'capture.tmp').write_text(POST_GITHUB)
+        os.replace(tmp_path / 'capture.tmp', path)
+        assert capture.wait()
+        capture.close()
+
+    def test_clipboard(self, mocker):
+        mocker.patch('pyperclip.paste', return_value=GET_GOOGLE)
+        clipboard = Clipboard(interval=0)
+        assert clipboard.wait()
+        assert clipboard.read() == GET_GOOGLE
+
+
+class TestWatch:
+    def test_writes_on_every_change(self, tmp_path):
+        path = tmp_path / 'capture.curl'
+        path.write_text(GET_GOOGLE)
+        written, reported = [], []
+        stop = threading.Event()
+
+        def write(module):
+            written.append(module)
+            if len(written) == 1:
+                path.write_text(f'{GET_GOOGLE}\n{POST_GITHUB}')
+            else:
+                stop.set()
+
+        thread = threading.Thread(
+            target=watch,
+            args=(
+                CaptureFile(str(path), interval=0.05),
+                write,
+                IncrementalModule(use_ast=True),
+                reported.append,
+                stop.is_set,
+            ),
+        )
+        thread.start()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        assert reported == [Changes(1, 0, 0, {}), Changes(1, 0, 0, {})]
+        assert written[1] == generate_module(
+            _RequestifyList(GET_GOOGLE, POST_GITHUB), use_ast=True
+        )
+
+    def test_unchanged_text_is_not_written_again(self, mocker):
+        mocker.patch('pyperclip.paste', return_value=GET_GOOGLE)
+        written = []
+        waits = iter(range(3))
+        watch(
+            Clipboard(interval=0),
+            written.append,
+            IncrementalModule(use_ast=True),
+            should_stop=lambda: next(waits, None) is None,
+        )
+        assert len(written) == 1